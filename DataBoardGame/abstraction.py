@@ -0,0 +1,66 @@
+"""
+State abstractions for the Q-Learning players.
+
+A state abstraction maps a `GameState` to the key a `QLearningPlayer` learns over, so that states
+differing only in detail irrelevant to the policy share their Q-values. The rewards are still
+computed on the real states.
+
+`GameState.key` already counts the cards by type (duplicate cards are the same type). A
+`CanonicalAbstraction` key keeps the layout of `GameState.key` (so it can be stored in an
+`MmapQTable` or exported with `DataBoardGame.export`), with:
+
+- the trash counts dropped (zeroed) if `drop_trash`,
+- every resource of `resource_buckets` replaced by the lower bound of its bucket.
+"""
+
+from bisect import bisect_right
+from DataBoardGame.board import PlayerBoard
+from DataBoardGame.game import GameState
+from DataBoardGame.resources import RESOURCE_KEY_BITS, RESOURCE_KEY_MASK, ResourceType
+
+
+class StateAbstraction:
+    """Map of the game states to the keys of the Q-Table."""
+
+    def key(self, game_state: GameState):
+        """Return the hashable key of the state."""
+        raise NotImplementedError()
+
+    def __call__(self, game_state: GameState):
+        return self.key(game_state)
+
+
+class CanonicalAbstraction(StateAbstraction):
+    """Packed state key without the trash and with bucketed resource counts."""
+
+    def __init__(self, drop_trash: bool = True, resource_buckets: dict = None) -> None:
+        """
+        :param drop_trash: Zero the trash counts of the employee deck.
+        :param resource_buckets: ResourceType -> sorted lower bounds of the buckets of its count,
+            e.g. `{ResourceType.rawdata: [0, 1, 2, 4, 8]}`. The other resources keep their count.
+        """
+        self.drop_trash = drop_trash
+        self.resource_buckets = {ResourceType(resource_type): sorted(bounds) for resource_type, bounds in (resource_buckets or {}).items()}
+
+    def bucket(self, resource_type: ResourceType, value) -> int:
+        """Lower bound of the bucket of the value, the first bound for the values below it."""
+        bounds = self.resource_buckets[resource_type]
+        return bounds[max(bisect_right(bounds, value) - 1, 0)]
+
+    def key(self, game_state: GameState) -> int:
+        player_key = game_state.player_board.encode()
+        if self.resource_buckets:
+            resources = game_state.player_board.resources.values
+            for resource_type in self.resource_buckets:
+                shift = resource_type * RESOURCE_KEY_BITS
+                value = min(max(self.bucket(resource_type, resources[resource_type]), 0), RESOURCE_KEY_MASK)
+                player_key = player_key & ~(RESOURCE_KEY_MASK << shift) | int(value) << shift
+
+        deck = game_state.game_board.employee_deck
+        deck_key = deck.encode()
+        if self.drop_trash:
+            deck_key &= deck.open_key_mask
+        return player_key | deck_key << PlayerBoard.key_bits | game_state.player_deck.encode() << (PlayerBoard.key_bits + deck.key_bits)
+
+    def to_dict(self):
+        return {'drop_trash': self.drop_trash, 'resource_buckets': {resource_type.name: bounds for resource_type, bounds in self.resource_buckets.items()}}
@@ -0,0 +1,295 @@
+"""
+Lockstep batch simulator running many games at once as NumPy arrays.
+
+Every game is a row of struct-of-arrays state (resources, employee rosters, card deck piles) and every
+phase of a turn is applied to all running games with vectorized operations. The rules are the ones of
+`board.py`/`game.py`, decisions are taken by a batched policy callback.
+"""
+
+from enum import IntEnum
+import numpy as np
+from DataBoardGame.board import PlayerBoard
+from DataBoardGame.card import employee_card_list
+from DataBoardGame.resources import ResourceType
+from DataBoardGame.ruleset import Ruleset
+
+# Roles in the iteration order of PlayerBoard.employees, the batch roster axis uses the same order
+BATCH_ROLES = list(PlayerBoard().employees)
+
+# Resource types a player can generate, the resource action index is the position in this list
+BATCH_RESOURCES = [resource_type for resource_type in ResourceType if resource_type != ResourceType.money]
+
+BatchPhase = IntEnum('BatchPhase', 'resource hire fire mandatory_fire', start=0)
+
+
+class BatchRules:
+    """Rules of the game compiled to lookup arrays indexed by card id (position in the card list), taken from the `Ruleset` of the cards."""
+
+    def __init__(self, cards: list) -> None:
+        ruleset = Ruleset(cards)
+        n_cards = len(cards)
+
+        self.ruleset = ruleset
+        self.cards = cards
+        self.n_cards = n_cards
+        # Card id of an empty slot, all card tables have an extra zero row for it
+        self.empty_card = n_cards
+
+        self.open_size = ruleset.open_size
+        self.limits = ruleset.limits[BATCH_ROLES]
+        self.start_resources = ruleset.start_resources
+        self.money_gain_from = ruleset.money_gain_from
+        self.money_gain_to = ruleset.money_gain_to
+        self.money_gain_scale = ruleset.money_gain_scale
+
+        # Position of every role in BATCH_ROLES, indexed by the EmployeeRoles value
+        role_index = np.full(ruleset.n_roles, -1, dtype=np.int64)
+        role_index[BATCH_ROLES] = np.arange(len(BATCH_ROLES))
+        self.resource_roles = role_index[ruleset.resource_role[BATCH_RESOURCES]]
+        self.base_take = ruleset.base_take[BATCH_RESOURCES]
+        self.base_gain = ruleset.base_gain[BATCH_RESOURCES]
+
+        # Cards are equal when they have the same hash (EmloyeeCard.__eq__), equal cards share the type id
+        self.card_type = np.array([ruleset.type_ids[card] for card in cards] + [ruleset.empty_type], dtype=np.int64)
+        self.card_role = role_index[ruleset.card_role[self.card_type]]
+        self.salary_take = ruleset.salary_take[self.card_type]
+        self.salary_gain = ruleset.salary_gain[self.card_type]
+        # Resources required to generate a resource (basic conversion) and the applied net conversion
+        self.check_take = ruleset.check_take[self.card_type][:, BATCH_RESOURCES]
+        self.gain = ruleset.gain[self.card_type][:, BATCH_RESOURCES]
+
+
+class BatchSimulator:
+    """
+    Simulator of `n_games` games with `n_players` players each, played in lockstep.
+
+    Action indices of the phases:
+    - resource: index in BATCH_RESOURCES, `len(BATCH_RESOURCES)` is the empty action
+    - hire: `open_slot * len(BATCH_ROLES) + role`, `open_size * len(BATCH_ROLES)` is the empty action
+    - fire / mandatory_fire: `role * roster_slots + slot`, `len(BATCH_ROLES) * roster_slots` is the empty action
+
+    A policy is a callable `policy(simulator, phase, games, mask) -> choices` getting the indices of the
+    deciding games and their legal action mask and returning one action index per game.
+    """
+
+    def __init__(self, n_games: int, n_players: int, rng=None, cards: list = None) -> None:
+        """
+        Initialize the simulator.
+
+        :param rng: `numpy.random.Generator` or `random.Random` used to shuffle the card decks.
+        :param cards: Employee cards of the deck, `employee_card_list` by default.
+        """
+        self.rules = BatchRules(employee_card_list if cards is None else cards)
+        self.n_games = n_games
+        self.n_players = n_players
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.reset()
+
+    def reset(self) -> None:
+        """Start all the games from the beginning (Game.pre_game_init)."""
+        rules = self.rules
+        n_games, n_players = self.n_games, self.n_players
+        self.roster_slots = int(rules.limits.max())
+
+        self.resources = np.tile(rules.start_resources, (n_games, n_players, 1))
+        self.last_generated = np.full((n_games, n_players), -1, dtype=np.int64)
+        self.roster = np.full((n_games, n_players, len(BATCH_ROLES), self.roster_slots), rules.empty_card, dtype=np.int64)
+        self.roster_size = np.zeros((n_games, n_players, len(BATCH_ROLES)), dtype=np.int64)
+
+        self.pile = np.tile(np.arange(rules.n_cards, dtype=np.int64), (n_games, 1))
+        self.pile_head = np.zeros(n_games, dtype=np.int64)
+        self.pile_end = np.full(n_games, rules.n_cards, dtype=np.int64)
+        self.trash = np.full((n_games, rules.n_cards), rules.empty_card, dtype=np.int64)
+        self.trash_size = np.zeros(n_games, dtype=np.int64)
+        self.open = np.full((n_games, rules.open_size), rules.empty_card, dtype=np.int64)
+
+        self.current_player = np.zeros(n_games, dtype=np.int64)
+        self.current_round = np.zeros(n_games, dtype=np.int64)
+        self.done = np.zeros(n_games, dtype=bool)
+        self.winner = np.full(n_games, -1, dtype=np.int64)
+        self.turns = 0
+
+        games = np.arange(n_games)
+        for slot in range(rules.open_size):
+            self.open[:, slot] = self._draw(games)
+
+    def _reshuffle(self, game: int) -> None:
+        """Move the trash cards of a game back to the pile and shuffle it (CardDeck.move_trash_cards_to_queue)."""
+        items = self.trash[game, : self.trash_size[game]].tolist() + self.pile[game, self.pile_head[game] : self.pile_end[game]].tolist()
+        self.rng.shuffle(items)
+        self.pile[game, : len(items)] = items
+        self.pile_head[game] = 0
+        self.pile_end[game] = len(items)
+        self.trash_size[game] = 0
+
+    def _reshuffle_empty_piles(self, games) -> None:
+        for game in games[self.pile_head[games] == self.pile_end[games]]:
+            self._reshuffle(game)
+
+    def _draw(self, games):
+        """Draw a closed card for every game (CardDeck.open_card)."""
+        self._reshuffle_empty_piles(games)
+        cards = self.pile[games, self.pile_head[games]]
+        self.pile_head[games] += 1
+        self._reshuffle_empty_piles(games)
+        return cards
+
+    def salary_available(self, games, players):
+        """Check if the players can pay the salary of their employees."""
+        take = self.rules.salary_take[self.roster[games, players]].sum(axis=(1, 2))
+        return (self.resources[games, players] >= take).all(axis=-1)
+
+    def resource_mask(self, games, players):
+        """Legal resource actions (PlayerBoard.check_pay_resource_to_player)."""
+        rules = self.rules
+        roster = self.roster[games, players][:, rules.resource_roles]
+        take = rules.base_take + rules.check_take[roster, np.arange(len(BATCH_RESOURCES))[:, None]].sum(axis=2)
+        mask = np.ones((len(games), len(BATCH_RESOURCES) + 1), dtype=bool)
+        mask[:, :-1] = (self.resources[games, players][:, None, :] >= take).all(axis=-1)
+        return mask
+
+    def hire_mask(self, games, players):
+        """Legal hire actions, every open card on every role with a free slot."""
+        available = self.roster_size[games, players] < self.rules.limits
+        is_open = self.open[games] != self.rules.empty_card
+        mask = np.ones((len(games), self.rules.open_size * len(BATCH_ROLES) + 1), dtype=bool)
+        mask[:, :-1] = (is_open[:, :, None] & available[:, None, :]).reshape(len(games), -1)
+        return mask
+
+    def fire_mask(self, games, players):
+        """Legal fire actions, every hired employee."""
+        hired = np.arange(self.roster_slots) < self.roster_size[games, players][:, :, None]
+        mask = np.ones((len(games), len(BATCH_ROLES) * self.roster_slots + 1), dtype=bool)
+        mask[:, :-1] = hired.reshape(len(games), -1)
+        return mask
+
+    def apply_resource(self, games, players, choices) -> None:
+        """Generate the chosen resources (PlayerBoard.action_pay_resource_to_player)."""
+        rules = self.rules
+        selected = choices < len(BATCH_RESOURCES)
+        games, players, choices = games[selected], players[selected], choices[selected]
+        roster = self.roster[games, players, rules.resource_roles[choices]]
+        self.resources[games, players] += rules.base_gain[choices] + rules.gain[roster, choices[:, None]].sum(axis=1)
+        self.last_generated[games, players] = choices
+
+    def apply_hire(self, games, players, choices) -> None:
+        """Hire the chosen open cards (HireEmployeeAction)."""
+        rules = self.rules
+        selected = choices < rules.open_size * len(BATCH_ROLES)
+        games, players, choices = games[selected], players[selected], choices[selected]
+        slots, roles = np.divmod(choices, len(BATCH_ROLES))
+        cards = self.open[games, slots]
+
+        self.roster[games, players, roles, self.roster_size[games, players, roles]] = cards
+        self.roster_size[games, players, roles] += 1
+
+        # CardDeck.get_open_card removes the first equal open card and opens a new one at the end
+        open_cards = self.open[games]
+        removed = np.argmax(rules.card_type[open_cards] == rules.card_type[cards][:, None], axis=1)
+        columns = np.arange(rules.open_size - 1)
+        source = np.where(columns >= removed[:, None], columns + 1, columns)
+        self.open[games, :-1] = np.take_along_axis(open_cards, source, axis=1)
+        self.open[games, -1] = self._draw(games)
+
+    def apply_fire(self, games, players, choices) -> None:
+        """Fire the chosen employees (FireEmployeeAction)."""
+        rules = self.rules
+        selected = choices < len(BATCH_ROLES) * self.roster_slots
+        games, players, choices = games[selected], players[selected], choices[selected]
+        roles, slots = np.divmod(choices, self.roster_slots)
+        cards = self.roster[games, players, roles, slots]
+
+        # PlayerBoard.fire_employee removes the first equal card in the roster iteration order
+        roster = self.roster[games, players]
+        found = np.argmax(rules.card_type[roster].reshape(len(games), len(BATCH_ROLES) * self.roster_slots) == rules.card_type[cards][:, None], axis=1)
+        roles, slots = np.divmod(found, self.roster_slots)
+        role_roster = roster[np.arange(len(games)), roles]
+        columns = np.arange(self.roster_slots)
+        source = np.where(columns >= slots[:, None], columns + 1, columns)
+        padded = np.concatenate([role_roster, np.full((len(games), 1), rules.empty_card)], axis=1)
+        self.roster[games, players, roles] = np.take_along_axis(padded, source, axis=1)
+        self.roster_size[games, players, roles] -= 1
+
+        self.trash[games, self.trash_size[games]] = cards
+        self.trash_size[games] += 1
+
+    def step(self, policy) -> int:
+        """
+        Play one turn of the current player in every running game (Game.next_game_step).
+
+        :param policy: Batched policy callback.
+        :return: Number of games that made a turn.
+        """
+        rules = self.rules
+        games = np.flatnonzero(~self.done)
+        if len(games) == 0:
+            return 0
+        players = self.current_player[games]
+
+        # Money gain
+        self.resources[games, players, rules.money_gain_to] += (self.resources[games, players, rules.money_gain_from] * rules.money_gain_scale).astype(np.int64)
+
+        self.apply_resource(games, players, policy(self, BatchPhase.resource, games, self.resource_mask(games, players)))
+        self.apply_hire(games, players, policy(self, BatchPhase.hire, games, self.hire_mask(games, players)))
+        self.apply_fire(games, players, policy(self, BatchPhase.fire, games, self.fire_mask(games, players)))
+
+        while True:
+            unpaid = ~self.salary_available(games, players)
+            if not unpaid.any():
+                break
+            unpaid_games, unpaid_players = games[unpaid], players[unpaid]
+            mask = self.fire_mask(unpaid_games, unpaid_players)
+            self.apply_fire(unpaid_games, unpaid_players, policy(self, BatchPhase.mandatory_fire, unpaid_games, mask))
+
+        # Salary
+        self.resources[games, players] += rules.salary_gain[self.roster[games, players]].sum(axis=(1, 2))
+
+        self.current_player[games] += 1
+        next_round = self.current_player[games] == self.n_players
+        self.current_player[games[next_round]] = 0
+        self.current_round[games[next_round]] += 1
+        self.turns += len(games)
+
+        self._check_game_over(games)
+        return len(games)
+
+    def _check_game_over(self, games) -> None:
+        """Mark finished games and their winners (Game.is_game_over)."""
+        rich = self.resources[games, :, ResourceType.money] > self.rules.ruleset.money_to_stop
+        has_winner = rich.any(axis=1)
+        self.winner[games[has_winner]] = np.argmax(rich[has_winner], axis=1)
+        self.done[games] = has_winner | (self.current_round[games] >= self.rules.ruleset.round_to_stop)
+
+    def run(self, policy) -> 'BatchSimulator':
+        """Play all the games to the end."""
+        while self.step(policy):
+            pass
+        return self
+
+
+def random_policy(rng=None):
+    """Create a batched policy choosing uniformly among the legal actions."""
+    rng = np.random.default_rng() if rng is None else rng
+
+    def policy(simulator, phase, games, mask):
+        picks = (rng.random(len(mask)) * mask.sum(axis=1)).astype(np.int64)
+        return np.argmax(mask.cumsum(axis=1) > picks[:, None], axis=1)
+
+    return policy
+
+
+def greedy_policy(simulator, phase, games, mask):
+    """
+    Batched policy producing the most refined resource possible and hiring whenever it can.
+
+    It never fires voluntarily and fires the first employee when the salary can't be paid.
+    """
+    empty = mask.shape[1] - 1
+    if phase == BatchPhase.fire:
+        return np.full(len(mask), empty)
+    legal = mask[:, :-1]
+    if phase == BatchPhase.resource:
+        first = legal.shape[1] - 1 - np.argmax(legal[:, ::-1], axis=1)
+    else:
+        first = np.argmax(legal, axis=1)
+    return np.where(legal.any(axis=1), first, empty)
@@ -0,0 +1,287 @@
+"""
+Micro-benchmarks of the engine hot paths.
+
+Run the suite and store the results as a JSON baseline, then compare a later run against it:
+
+    python -m DataBoardGame.benchmark run --output baseline.json
+    python -m DataBoardGame.benchmark run --output current.json
+    python -m DataBoardGame.benchmark compare baseline.json current.json --threshold 0.2
+
+`compare` exits with status 1 if a benchmark got slower than the baseline by more than the threshold.
+`--scale` shrinks (or grows) the work of every benchmark, e.g. `--scale 0.01` for a smoke run.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable
+import numpy as np
+from DataBoardGame.board import PlayerBoard
+from DataBoardGame.card import EmployeeRoles, employee_card_list
+from DataBoardGame.game import Game, GameState, RandomPlayer, action_catalog
+from DataBoardGame.gamelearning import GameFarm, QLearningPlayer
+from DataBoardGame.qtable import ArrayQTable
+from DataBoardGame.resources import ResourceType
+
+# name -> setup(scale) returning the function to time and the number of operations it runs
+BENCHMARKS: dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under `name`."""
+
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _count(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+def _new_game(seed: int, n_players: int = 4) -> Game:
+    game = Game(verbose=False, seed=seed)
+    for index in range(n_players):
+        game.add_player(RandomPlayer(random.Random(seed + index)))
+    game.pre_game_init()
+    return game
+
+
+@benchmark('game.next_game_step')
+def bench_next_game_step(scale: float):
+    n_steps = _count(2000, scale)
+    games = [_new_game(0)]
+
+    def run():
+        game = games[0]
+        for _ in range(n_steps):
+            if game.next_game_step():
+                game = _new_game(game.seed + 1)
+        games[0] = game
+
+    return run, n_steps
+
+
+@benchmark('game_state.construct_hash')
+def bench_game_state(scale: float):
+    n_states = _count(100000, scale)
+    game = _new_game(0)
+    for _ in range(20):
+        game.next_game_step()
+    player = game.current_player
+    game_board, player_board, player_deck = game.game_board, game.players_board[player], game.players_deck[player]
+
+    def run():
+        for _ in range(n_states):
+            hash(GameState(game_board, player_board, player_deck))
+
+    return run, n_states
+
+
+@benchmark('card_deck.get_open_card')
+def bench_get_open_card(scale: float):
+    n_cards = _count(100000, scale)
+    deck = _new_game(0).game_board.employee_deck
+
+    def run():
+        for _ in range(n_cards):
+            deck.return_card(deck.get_open_card(deck.open_cards[0]))
+
+    return run, n_cards
+
+
+@benchmark('card_deck.move_trash_cards_to_queue')
+def bench_move_trash_cards_to_queue(scale: float):
+    n_moves = _count(20000, scale)
+    deck = _new_game(0).game_board.employee_deck
+    deck.rng = random.Random(0)
+
+    def run():
+        for _ in range(n_moves):
+            deck.move_open_cards_to_trash()
+            deck.move_trash_cards_to_queue()
+            deck.reopen_cards()
+
+    return run, n_moves
+
+
+@benchmark('player_board.check_pay_resource_to_player')
+def bench_check_pay_resource_to_player(scale: float):
+    n_checks = _count(100000, scale)
+    board = PlayerBoard()
+    for card, role in zip(employee_card_list, (EmployeeRoles.DE, EmployeeRoles.SA, EmployeeRoles.BI, EmployeeRoles.BA)):
+        board.hire_employee(card, role)
+    resource_types = [resource_type for resource_type in ResourceType if resource_type != ResourceType.money]
+
+    def run():
+        for i in range(n_checks):
+            board.check_pay_resource_to_player(resource_types[i & 3])
+
+    return run, n_checks
+
+
+@benchmark('q_learning_player.update_q_table')
+def bench_update_q_table(scale: float):
+    n_updates = _count(50000, scale)
+    game = _new_game(0)
+    player = QLearningPlayer(learning_rate=0.8, discount_factor=0.8, random_rate=0.1)
+    states = []
+    for _ in range(2):
+        states.append(game.get_current_player_state())
+        actions = game.generate_available_resource_actions(game.current_player)
+        player.q_learning_table[states[-1]] = {action: 0 for action in actions}
+        game.next_game_step()
+    player.last_state, player.last_action = states[0], next(iter(player.q_learning_table[states[0]]))
+
+    def run():
+        for _ in range(n_updates):
+            player.update_q_table(states[1])
+
+    return run, n_updates
+
+
+@benchmark('game_farm.merge_q_tables')
+def bench_merge_q_tables(scale: float):
+    n_states = _count(1000000, scale)
+    n_actions = 4
+    farm = GameFarm(number_of_players_per_game=2, parallel=1, seed=0)
+    rng = random.Random(0)
+    # Two players sharing half of their states, synthetic int states and actions
+    for index, player in enumerate(farm.players):
+        offset = index * n_states // 2
+        states = range(offset, offset + (n_states + 1) // 2 + n_states // 4)
+        player.q_learning_table = {state: {action: rng.random() for action in range(n_actions)} for state in states}
+
+    return farm.merge_q_tables, n_states
+
+
+def _array_tables_farm(scale: float) -> tuple[GameFarm, int]:
+    n_states = _count(100000, scale)
+    farm = GameFarm(number_of_players_per_game=2, parallel=1, seed=0)
+    rng = np.random.default_rng(0)
+    # Two ArrayQTables of the catalog actions sharing half of their states, synthetic int states
+    for index, player in enumerate(farm.players):
+        offset = index * n_states // 2
+        states = range(offset, offset + (n_states + 1) // 2 + n_states // 4)
+        values = np.full((len(states), len(action_catalog)), np.nan, dtype=np.float32)
+        values[:, :4] = rng.random((len(states), 4))
+        player.q_learning_table = ArrayQTable.from_values(states, action_catalog.actions, values)
+    return farm, n_states
+
+
+@benchmark('game_farm.merge_array_q_tables')
+def bench_merge_array_q_tables(scale: float):
+    farm, n_states = _array_tables_farm(scale)
+    return farm.merge_q_tables, n_states
+
+
+@benchmark('game_farm.merge_q_tables_sharded')
+def bench_merge_q_tables_sharded(scale: float):
+    farm, n_states = _array_tables_farm(scale)
+    executor = ProcessPoolExecutor(2)
+
+    def run():
+        farm.merge_q_tables(executor)
+
+    return run, n_states
+
+
+def run_benchmarks(names: list[str] = None, scale: float = 1.0, repeat: int = 5) -> dict:
+    """
+    Run the benchmarks and return the results.
+
+    :param names: Benchmarks to run, all of them if None.
+    :param scale: Factor of the number of operations of every benchmark.
+    :param repeat: Number of timed runs, the fastest one is kept.
+    :return: Dictionary with the run metadata and, per benchmark, the seconds per operation.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        run, n_ops = BENCHMARKS[name](scale)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        results[name] = {'seconds_per_op': min(timings) / n_ops, 'ops': n_ops, 'repeat': repeat}
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'benchmarks': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> list[tuple]:
+    """
+    Find the benchmarks slower than the baseline.
+
+    :param threshold: Allowed relative slowdown, 0.1 flags benchmarks more than 10% slower.
+    :return: List of (name, baseline seconds per op, current seconds per op, ratio) of the regressions.
+    """
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            continue
+        ratio = result['seconds_per_op'] / base['seconds_per_op']
+        if ratio > 1 + threshold:
+            regressions.append((name, base['seconds_per_op'], result['seconds_per_op'], ratio))
+    return regressions
+
+
+def save_results(results: dict, path: str) -> None:
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m DataBoardGame.benchmark', description='Engine hot path benchmarks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks and store the results as JSON')
+    run_parser.add_argument('--output', help='JSON file to store the results to')
+    run_parser.add_argument('--scale', type=float, default=1.0, help='factor of the number of operations')
+    run_parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark, the fastest is kept')
+    run_parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), help='benchmarks to run')
+
+    compare_parser = commands.add_parser('compare', help='compare results against a baseline')
+    compare_parser.add_argument('baseline', help='baseline JSON file')
+    compare_parser.add_argument('current', help='JSON file of the results to check')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative slowdown')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.only, scale=args.scale, repeat=args.repeat)
+        for name, result in results['benchmarks'].items():
+            print(f'{name:45} {result["seconds_per_op"] * 1e6:12.3f} us/op')
+        if args.output:
+            save_results(results, args.output)
+        return 0
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    regressions = compare_results(baseline, current, args.threshold)
+    for name, base, result, ratio in regressions:
+        print(f'{name:45} {base * 1e6:12.3f} -> {result * 1e6:12.3f} us/op ({ratio:.2f}x)')
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}')
+        return 1
+    print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,40 +1,63 @@
+import copy
+import operator
 from DataBoardGame.card import CardDeck, EmloyeeCard, employee_card_list, EmployeeRoles
 from DataBoardGame import globalvars as glb
-from DataBoardGame.resources import Resources, ResourceType, money_gain_per_insight, ResourceConvertion
+from DataBoardGame.resources import RESOURCE_KEY_BITS, Resources, ResourceType, ResourceConvertion
+from DataBoardGame.ruleset import EMPLOYEE_LIMITS, MONEY_GAIN, ROLE_FOR_RESOURCE, RULESET, START_RESOURCES
+
+# Widths of the packed PlayerBoard encoding fields: last generated resource + 1 and employee card type id + 1
+LAST_RESOURCE_KEY_BITS = len(ResourceType).bit_length()
+EMPLOYEE_KEY_BITS = RULESET.n_types.bit_length()
 
 
 def resource_type_to_role_mapping(resource_type: ResourceType):
-    if resource_type == ResourceType.dashboard:
-        return EmployeeRoles.BI
-    if resource_type == ResourceType.rawdata:
-        return EmployeeRoles.DE
-    if resource_type == ResourceType.datamart:
-        return EmployeeRoles.SA
-    if resource_type == ResourceType.insight:
-        return EmployeeRoles.BA
-    if resource_type == ResourceType.money:
-        return EmployeeRoles.PM
+    return ROLE_FOR_RESOURCE[resource_type]
+
+
+def _add_rows(total: tuple, row: tuple) -> tuple:
+    return tuple(map(operator.add, total, row))
 
 
 class GameBoard:
     employee_deck: CardDeck
+    _snapshot: 'GameBoard' = None
     # project_deck: CardDeck
     # specials_deck: CardDeck
 
     def __str__(self) -> str:
         return f'employee_deck:{self.employee_deck}'
 
-    def __init__(self) -> None:
-        self.employee_deck = CardDeck(glb.MAX_EMPLOYEE_OPEN_CARDS, employee_card_list)
+    def __init__(self, rng=None) -> None:
+        """
+        :param rng: Random generator shuffling the decks, the `random` module if None.
+        """
+        self.employee_deck = CardDeck(glb.MAX_EMPLOYEE_OPEN_CARDS, employee_card_list, rng=rng)
 
     def __hash__(self) -> int:
-        return hash(self.employee_deck)
+        return hash(self.encode())
 
     def __eq__(self, other):
         if not isinstance(other, GameBoard):
             return NotImplemented
         return self.employee_deck == other.employee_deck
 
+    @property
+    def key_bits(self) -> int:
+        return self.employee_deck.key_bits
+
+    def encode(self) -> int:
+        return self.employee_deck.encode()
+
+    def snapshot(self) -> 'GameBoard':
+        """Return an immutable copy of the board, shared until the employee deck changes."""
+        employee_deck = self.employee_deck.snapshot()
+        if self._snapshot is None or self._snapshot.employee_deck is not employee_deck:
+            snapshot = copy.copy(self)
+            snapshot.employee_deck = employee_deck
+            snapshot._snapshot = snapshot
+            self._snapshot = snapshot
+        return self._snapshot
+
     def pre_game_init(self) -> None:
         self.employee_deck.pre_game_init()
 
@@ -49,43 +72,78 @@ class GameBoard:
 class PlayerBoard:
     resources: Resources
     last_generated_resource: ResourceType
+    _snapshot: 'PlayerBoard' = None
+
+    # Caches of the employees dependent rules, updated by hire_employee/fire_employee. The requirements
+    # and gains of the resources are vectors indexed by ResourceType summed from the RULESET tables.
+    _resource_requirements: dict[ResourceType, tuple[int, ...]]
+    _resource_gains: dict[ResourceType, tuple[int, ...]]
+    _salary: ResourceConvertion
+    _available_roles: list[EmployeeRoles]
 
-    money_gain = money_gain_per_insight(glb.MONEY_PER_INSIGHT)
+    money_gain = MONEY_GAIN
 
-    convertion_rules = {
-        ResourceType.rawdata: ResourceConvertion(Resources(), Resources(raw_data=1)),
-        ResourceType.datamart: ResourceConvertion(Resources(raw_data=2), Resources(marts=1)),
-        ResourceType.dashboard: ResourceConvertion(Resources(marts=2), Resources(dashboards=1)),
-        ResourceType.insight: ResourceConvertion(Resources(dashboards=2), Resources(insights=1)),
-    }
+    # Read-only: the engine generates the resources from the RULESET tables, not from this mapping
+    convertion_rules = RULESET.base_conversions
 
-    employees = {EmployeeRoles.BA: [], EmployeeRoles.DE: [], EmployeeRoles.BI: [], EmployeeRoles.SA: []}
+    employees: dict[EmployeeRoles, list[EmloyeeCard]]
 
-    employees_limits = {EmployeeRoles.BA: 2, EmployeeRoles.DE: 2, EmployeeRoles.BI: 2, EmployeeRoles.SA: 2}
+    employees_limits = EMPLOYEE_LIMITS
+
+    key_bits = len(ResourceType) * RESOURCE_KEY_BITS + LAST_RESOURCE_KEY_BITS + sum(employees_limits.values()) * EMPLOYEE_KEY_BITS
 
     def __hash__(self) -> int:
-        return hash(
-            (
-                self.resources,
-                self.last_generated_resource,
-                self.money_gain,
-                frozenset(sorted(self.convertion_rules.items())),  # Convert to frozenset for hashing
-                frozenset(sorted((role, tuple(sorted(employees))) for role, employees in self.employees.items())),
-                frozenset(sorted(self.employees_limits.items())),
-            )
-        )
+        return hash(self.encode())
 
     def __eq__(self, other):
         if not isinstance(other, PlayerBoard):
             return NotImplemented
-        return (
-            self.resources == other.resources
-            and self.last_generated_resource == other.last_generated_resource
-            and self.money_gain == other.money_gain
-            and self.convertion_rules == other.convertion_rules
-            and self.employees == other.employees
-            and self.employees_limits == other.employees_limits
-        )
+        return self.encode() == other.encode()
+
+    def encode(self) -> int:
+        """
+        Pack the player board into an int of `key_bits` bits.
+
+        From the low bits: the resources, the last generated resource + 1 (0 if none) and, for every role
+        of `employees_limits`, the sorted employee card type ids + 1 padded with zeros to the role limit.
+        The conversion rules, money gain and limits are the same for every board and are not encoded.
+        """
+        key = self.resources.encode()
+        shift = len(ResourceType) * RESOURCE_KEY_BITS
+
+        if self.last_generated_resource is not None:
+            key |= (self.last_generated_resource + 1) << shift
+        shift += LAST_RESOURCE_KEY_BITS
+
+        for role, limit in self.employees_limits.items():
+            for slot, type_id in enumerate(sorted(RULESET.type_ids[card] for card in self.employees[role])):
+                key |= (type_id + 1) << (shift + slot * EMPLOYEE_KEY_BITS)
+            shift += limit * EMPLOYEE_KEY_BITS
+
+        return key
+
+    @classmethod
+    def key_fields(cls) -> list[tuple[str, int]]:
+        """Names and bit widths of the fields of `encode`, from the low bits."""
+        fields = [(name, RESOURCE_KEY_BITS) for name in Resources.field_names]
+        fields.append(('last_generated_resource', LAST_RESOURCE_KEY_BITS))
+        for role, limit in cls.employees_limits.items():
+            fields += [(f'employee_{role.name}_{slot}', EMPLOYEE_KEY_BITS) for slot in range(limit)]
+        return fields
+
+    def snapshot(self) -> 'PlayerBoard':
+        """
+        Return an immutable copy of the board (the employee lists are tuples).
+
+        The snapshot is shared until the resources or the employees of the board change.
+        """
+        if self._snapshot is None:
+            snapshot = copy.copy(self)
+            snapshot.resources = copy.copy(self.resources)
+            snapshot.employees = {role: tuple(employee_list) for role, employee_list in self.employees.items()}
+            snapshot._snapshot = snapshot
+            self._snapshot = snapshot
+        return self._snapshot
 
     def employees_count(self):
         res = 0
@@ -117,25 +175,59 @@ class PlayerBoard:
         return f'\t resources={self.resources} \n\t salary={self.calc_salary().resource_to_give} \n\t empl={self.employed_count()})'
 
     def __init__(self) -> None:
-        self.resources = Resources(5, 0, 0, 5, 10)
+        self.resources = Resources.from_values(list(START_RESOURCES))
         self.last_generated_resource = None
+        self.employees = {EmployeeRoles.BA: [], EmployeeRoles.DE: [], EmployeeRoles.BI: [], EmployeeRoles.SA: []}
+
+        self._resource_requirements = {}
+        self._resource_gains = {}
+        for role in self.employees:
+            self._update_role_cache(role)
+        self._update_salary_cache()
+
+    def _update_role_cache(self, role: EmployeeRoles):
+        """Recompute the cached conversions of the resources produced by `role` and the available roles."""
+        # New dicts, the previous ones may be shared with a snapshot
+        resource_requirements = dict(self._resource_requirements)
+        resource_gains = dict(self._resource_gains)
+        type_ids = [RULESET.type_ids[empl] for empl in self.employees[role]]
+        for resource_type in RULESET.resources_of_role[role]:
+            requirement = RULESET.base_take_rows[resource_type]
+            resource_gain = RULESET.base_gain_rows[resource_type]
+            for type_id in type_ids:
+                requirement = _add_rows(requirement, RULESET.check_take_rows[type_id][resource_type])
+                resource_gain = _add_rows(resource_gain, RULESET.gain_rows[type_id][resource_type])
+
+            resource_requirements[resource_type] = requirement
+            resource_gains[resource_type] = resource_gain
+
+        self._resource_requirements = resource_requirements
+        self._resource_gains = resource_gains
+        limits = self.get_employee_limits()
+        self._available_roles = [role for role, employee_list in self.employees.items() if len(employee_list) < limits[role]]
+
+    def _update_salary_cache(self):
+        take = gain = RULESET.salary_take_rows[RULESET.empty_type]
+        for employee_list in self.employees.values():
+            for employee in employee_list:
+                type_id = RULESET.type_ids[employee]
+                take = _add_rows(take, RULESET.salary_take_rows[type_id])
+                gain = _add_rows(gain, RULESET.salary_gain_rows[type_id])
+        self._salary = ResourceConvertion.from_vectors(take, gain)
 
     def employed_count(self):
         return [(role, len(employee_list)) for role, employee_list in self.employees.items()]
 
     def calc_salary(self):
-        salary = ResourceConvertion(Resources(), Resources())
-        for role, employee_list in self.employees.items():
-            for employee in employee_list:
-                salary += employee.salary
-
-        return salary
+        """Return the salary of all the employees (cached, do not modify)."""
+        return self._salary
 
     def check_is_salary_available(self):
-        return self.resources.check_pay_aval(self.calc_salary())
+        return self.resources.check_pay_aval(self._salary)
 
     def pay_salary(self):
-        return self.resources.apply_resource_conversion(self.calc_salary())
+        self._snapshot = None
+        return self.resources.apply_resource_conversion(self._salary)
 
     def get_employee_limits(self):
         return self.employees_limits
@@ -148,43 +240,37 @@ class PlayerBoard:
         return result
 
     def get_available_roles(self):
-        limits = self.get_employee_limits()
-        result = []
-        for role, employee_list in self.employees.items():
-            if len(employee_list) < limits[role]:
-                result.append(role)
-        return result
+        """Return the roles with free slots (cached, do not modify)."""
+        return self._available_roles
 
     def hire_employee(self, employee: EmloyeeCard, role: EmployeeRoles):
         self.employees[role].append(employee)
+        self._update_role_cache(role)
+        self._update_salary_cache()
+        self._snapshot = None
 
     def fire_employee(self, employee: EmloyeeCard):
         for role, employee_list in self.employees.items():
             if employee in employee_list:
                 employee_list.remove(employee)
+                self._update_role_cache(role)
+                self._update_salary_cache()
+                self._snapshot = None
                 return
 
     def generate_money(self):
+        self._snapshot = None
         self.resources.apply_resource_scale(self.money_gain)
 
     def check_pay_resource_to_player(self, resource_type):
-        resource_gain = ResourceConvertion(Resources(), Resources())
-        resource_gain += self.convertion_rules[resource_type]
-        for empl in self.employees[resource_type_to_role_mapping(resource_type)]:
-            resource_gain += empl.basic_resource_conversion[resource_type_to_role_mapping(resource_type)]
-        return self.resources.check_pay_aval(resource_gain)
+        # The requirement uses the basic conversions of the employees
+        return self.resources.check_requirement(self._resource_requirements[resource_type])
 
     def action_pay_resource_to_player(self, resource_type):
-        resource_gain = ResourceConvertion(Resources(), Resources())
-        resource_gain += self.convertion_rules[resource_type]
-        for empl in self.employees[resource_type_to_role_mapping(resource_type)]:
-            if empl.role == resource_type_to_role_mapping(resource_type):
-                resource_gain += empl.motivated_resource_conversion[resource_type_to_role_mapping(resource_type)]
-            else:
-                resource_gain += empl.basic_resource_conversion[resource_type_to_role_mapping(resource_type)]
-
-        self.resources.apply_resource_conversion(resource_gain)
+        # Employees of their own role use the motivated conversion
+        self.resources.apply_delta(self._resource_gains[resource_type])
         self.last_generated_resource = resource_type
+        self._snapshot = None
 
 
 class PlayerDeck:
@@ -198,3 +284,9 @@ class PlayerDeck:
 
     def __eq__(self, value: object) -> bool:
         return True
+
+    def encode(self) -> int:
+        return 0
+
+    def snapshot(self) -> 'PlayerDeck':
+        return self
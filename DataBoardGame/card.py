@@ -4,110 +4,270 @@ It includes resource management, card deck handling, and employee roles.
 """
 
 from enum import IntEnum
-import queue
 import copy
-from DataBoardGame.utils import create_queue_from_list, random_sort_queue
+from DataBoardGame.utils import resolve_rng
 from DataBoardGame.resources import ResourceType, ResourceConvertion, Resources, money_pay
 
 
+def card_type_ids(cards: list) -> dict:
+    """Map every card to the id of its type, equal cards share the type id."""
+    type_ids = {}
+    for card in cards:
+        type_ids.setdefault(card, len(type_ids))
+    return type_ids
+
+
 class CardDeck:
-    """Class representing a deck of cards."""
+    """
+    Class representing a deck of cards.
+
+    Cards are referred to by their index in `all_cards` (card id). The closed cards are the ids
+    `pile[head:]`, drawn in that order; the open and trash cards are id lists in the order they were
+    added. `open_mask`, `trash_mask` and `closed_mask` are the bitsets of the ids at each place,
+    the ids in none of them are out of the deck (hired).
+    """
 
     open_size: int
-    card_queue: queue.Queue
-    open_cards: list
-    trash_card: list
     all_cards: list
-
-    def __init__(self, open_size: int, cards: list) -> None:
-        """Initialize the CardDeck with a given size and list of cards."""
+    pile: list
+    head: int
+    open_ids: list
+    trash_ids: list
+    open_mask: int
+    trash_mask: int
+    closed_mask: int
+    rng: object
+    card_type_ids: dict
+    key_count_bits: int
+    key_bits: int
+    open_key_mask: int
+    _key: int
+    _snapshot: 'CardDeck' = None
+
+    def __init__(self, open_size: int, cards: list, rng=None) -> None:
+        """
+        Initialize the CardDeck with a given size and list of cards.
+
+        :param rng: `random.Random` or `numpy.random.Generator` shuffling the deck, the `random` module if None.
+        """
         self.open_size = open_size
-        self.card_queue = create_queue_from_list(cards)
-        self.open_cards = []
-        self.trash_card = []
         self.all_cards = cards
+        self.rng = rng
+        self.pile = list(range(len(cards)))
+        self.head = 0
+        self.open_ids = []
+        self.trash_ids = []
+        self.open_mask = 0
+        self.trash_mask = 0
+        self.closed_mask = (1 << len(cards)) - 1
+
+        self.card_type_ids = card_type_ids(cards)
+        copies = {}
+        for card in cards:
+            copies[card] = copies.get(card, 0) + 1
+        self.key_count_bits = max(copies.values(), default=0).bit_length()
+        self.key_bits = 2 * len(self.card_type_ids) * self.key_count_bits
+
+        # Per card id: the type id and its increment of the open count in the key
+        self._type_of = [self.card_type_ids[card] for card in cards]
+        self._open_key_unit = [1 << (type_id * self.key_count_bits) for type_id in self._type_of]
+        self._trash_key_shift = len(self.card_type_ids) * self.key_count_bits
+        # Bits of the open counts in the key, the low half
+        self.open_key_mask = (1 << self._trash_key_shift) - 1
+        self._key = 0
+        # Card ids of the same card object, to return a hired card to the trash under its own id
+        self._ids_by_identity = {}
+        for card_id, card in enumerate(cards):
+            self._ids_by_identity.setdefault(id(card), []).append(card_id)
 
     def __str__(self) -> str:
         """Return a string representation of the CardDeck."""
-        return f'q:{self.card_queue.qsize()} o:{len(self.open_cards)} t:{len(self.trash_card)}'
+        return f'q:{self.pile_size} o:{len(self.open_ids)} t:{len(self.trash_ids)}'
+
+    def __copy__(self):
+        """Create a copy of the CardDeck, sharing the cards and the random generator."""
+        new_card_deck = object.__new__(CardDeck)
+        new_card_deck.__dict__.update(self.__dict__)
+        if isinstance(self.pile, list):
+            new_card_deck.pile = self.pile.copy()
+            new_card_deck.open_ids = self.open_ids.copy()
+            new_card_deck.trash_ids = self.trash_ids.copy()
+        new_card_deck._snapshot = None
+        return new_card_deck
 
     def __deepcopy__(self, memo):
-        """Create a deep copy of the CardDeck."""
-        new_card_deck = CardDeck(self.open_size, cards=self.all_cards)
-
-        # Use deepcopy for all attributes except card_queue
-        new_card_deck.open_cards = copy.copy(self.open_cards)
-        new_card_deck.trash_card = copy.copy(self.trash_card)
-        new_card_deck.all_cards = copy.copy(self.all_cards)
-
-        # Manually copy the queue elements
-        new_card_deck.card_queue = queue.Queue()
-        for item in list(self.card_queue.queue):
-            new_card_deck.card_queue.put(item)
-
-        return new_card_deck
+        """Create a deep copy of the CardDeck, the cards and the random generator are shared."""
+        return self.__copy__()
+
+    def __getstate__(self):
+        """Do not pickle the cached snapshot."""
+        state = self.__dict__.copy()
+        state.pop('_snapshot', None)
+        # Card identities change when unpickled
+        state['_ids_by_identity'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._ids_by_identity = {}
+        for card_id, card in enumerate(self.all_cards):
+            self._ids_by_identity.setdefault(id(card), []).append(card_id)
+
+    @property
+    def open_cards(self) -> tuple:
+        """The open cards in the order they were opened (read-only, the deck keeps card ids)."""
+        return tuple(self.all_cards[card_id] for card_id in self.open_ids)
+
+    @property
+    def trash_card(self) -> tuple:
+        """The trash cards in the order they were discarded (read-only, the deck keeps card ids)."""
+        return tuple(self.all_cards[card_id] for card_id in self.trash_ids)
+
+    @property
+    def closed_cards(self) -> tuple:
+        """The closed cards in the order they will be drawn (read-only, the deck keeps card ids)."""
+        return tuple(self.all_cards[card_id] for card_id in self.pile[self.head :])
+
+    @property
+    def pile_size(self) -> int:
+        """Number of closed cards."""
+        return len(self.pile) - self.head
+
+    def snapshot(self) -> 'CardDeck':
+        """
+        Return an immutable copy of the open and trash cards.
+
+        The snapshot has no pile and is shared until the open or trash cards change.
+        """
+        if self._snapshot is None:
+            snapshot = copy.copy(self)
+            snapshot.pile = None
+            snapshot.open_ids = tuple(self.open_ids)
+            snapshot.trash_ids = tuple(self.trash_ids)
+            snapshot._snapshot = snapshot
+            self._snapshot = snapshot
+        return self._snapshot
 
     def to_dict(self):
         """Convert the CardDeck to a dictionary representation."""
+        open_types = {self._type_of[card_id] for card_id in self.open_ids}
+        trash_types = {self._type_of[card_id] for card_id in self.trash_ids}
         card_flags = {}
-        for card in self.all_cards:
-            card_flags[str(card.__hash__()) + '_open'] = card in self.open_cards
-            card_flags[str(card.__hash__()) + '_trash'] = card in self.trash_card
+        for card, type_id in zip(self.all_cards, self._type_of):
+            card_flags[str(card.__hash__()) + '_open'] = type_id in open_types
+            card_flags[str(card.__hash__()) + '_trash'] = type_id in trash_types
 
         return {'card_flags': card_flags}
 
+    def encode(self) -> int:
+        """
+        Pack the open and trash cards into an int of `key_bits` bits.
+
+        The low half holds the number of open cards of every card type and the high half the number of
+        trash cards of every card type, `key_count_bits` bits per type. The key is updated as the cards move.
+        """
+        return self._key
+
+    def key_fields(self) -> list[tuple[str, int]]:
+        """Names and bit widths of the fields of `encode`, from the low bits."""
+        return [(f'{place}_{type_id}', self.key_count_bits) for place in ('open', 'trash') for type_id in range(len(self.card_type_ids))]
+
     def __hash__(self) -> int:
         """Generate a hash for the CardDeck."""
-        return hash((tuple(sorted(self.all_cards)), tuple(sorted(self.open_cards)), tuple(sorted(self.trash_card))))
+        return hash(self._key)
 
     def __eq__(self, other) -> bool:
         """Check equality between two CardDeck objects."""
         if not isinstance(other, CardDeck):
             return NotImplemented
-        return self.all_cards == other.all_cards and self.open_cards == other.open_cards and self.trash_card == other.trash_card
+        return self.all_cards == other.all_cards and self._key == other._key
+
+    def _add_open(self, card_id: int) -> None:
+        self.open_ids.append(card_id)
+        self.open_mask |= 1 << card_id
+        self._key += self._open_key_unit[card_id]
+
+    def _add_trash(self, card_id: int) -> None:
+        self.trash_ids.append(card_id)
+        self.trash_mask |= 1 << card_id
+        self._key += self._open_key_unit[card_id] << self._trash_key_shift
+
+    def _draw(self) -> int:
+        card_id = self.pile[self.head]
+        self.head += 1
+        self.closed_mask &= ~(1 << card_id)
+        return card_id
 
     def pre_game_init(self):
         """Initialize the card deck before starting the game."""
         self.reopen_cards()
 
     def get_closed_card(self):
-        """Get a closed card from the queue."""
-        return self.card_queue.get()
+        """Get a closed card from the pile."""
+        if self.head == len(self.pile):
+            raise IndexError('No closed cards left')
+        return self.all_cards[self._draw()]
 
     def return_card(self, card):
         """Return a card to the trash pile."""
-        self.trash_card.append(card)
+        candidates = self._ids_by_identity.get(id(card))
+        if candidates is None:
+            type_id = self.card_type_ids[card]
+            candidates = [card_id for card_id, other in enumerate(self._type_of) if other == type_id]
+        in_deck = self.open_mask | self.trash_mask | self.closed_mask
+        card_id = next((card_id for card_id in candidates if not in_deck >> card_id & 1), candidates[0])
+        self._add_trash(card_id)
+        self._snapshot = None
 
     def move_open_cards_to_trash(self):
         """Move all open cards to the trash pile."""
-        self.trash_card.extend(self.open_cards)
-        self.open_cards.clear()
+        for card_id in self.open_ids:
+            self._add_trash(card_id)
+            self._key -= self._open_key_unit[card_id]
+        self.open_ids.clear()
+        self.open_mask = 0
+        self._snapshot = None
 
     def reopen_cards(self):
         """Reopen cards to match the open size."""
         self.move_open_cards_to_trash()
-        while len(self.open_cards) < self.open_size:
+        while len(self.open_ids) < self.open_size:
             self.open_card()
 
     def move_trash_cards_to_queue(self):
-        """Move all trash cards back to the queue and shuffle them."""
-        self.card_queue = random_sort_queue(create_queue_from_list(self.trash_card + list(self.card_queue.queue)))
-        self.trash_card.clear()
+        """Move all trash cards back to the pile and shuffle it in place."""
+        self.pile[:] = self.trash_ids + self.pile[self.head :]
+        resolve_rng(self.rng).shuffle(self.pile)
+        self.head = 0
+        self.closed_mask |= self.trash_mask
+        self._key &= self.open_key_mask
+        self.trash_ids.clear()
+        self.trash_mask = 0
+        self._snapshot = None
 
     def get_open_card(self, card):
         """Get an open card and replace it with a new one."""
-        self.open_cards.remove(card)
+        type_id = self.card_type_ids[card]
+        type_of = self._type_of
+        index = next((index for index, card_id in enumerate(self.open_ids) if type_of[card_id] == type_id), None)
+        if index is None:
+            raise ValueError(f'{card} is not open')
+        card_id = self.open_ids.pop(index)
+        self.open_mask &= ~(1 << card_id)
+        self._key -= self._open_key_unit[card_id]
+        self._snapshot = None
         self.open_card()
-        if self.card_queue.qsize() == 0:
+        if self.head == len(self.pile):
             self.move_trash_cards_to_queue()
         return card
 
     def open_card(self):
-        """Open a new card from the queue."""
-        if self.card_queue.qsize() == 0:
+        """Open a new card from the pile."""
+        if self.head == len(self.pile):
             self.move_trash_cards_to_queue()
-        self.open_cards.append(self.card_queue.get())
-        if self.card_queue.qsize() == 0:
+        self._add_open(self._draw())
+        self._snapshot = None
+        if self.head == len(self.pile):
             self.move_trash_cards_to_queue()
 
 
@@ -0,0 +1,209 @@
+"""
+Evaluation of trained policies.
+
+`evaluate_policy` plays a frozen policy (a greedy `PolicyPlayer` over a Q-Table) against opponents
+in seeded games, in batches that can run in a process pool. After every wave of batches it
+computes the win rate, the rounds the policy needed to win and its final money with confidence
+intervals, and stops as soon as the win rate interval is tight enough.
+"""
+
+from concurrent.futures import Executor
+from statistics import NormalDist
+import random
+from typing import Callable
+import numpy as np
+from DataBoardGame.abstraction import StateAbstraction
+from DataBoardGame.game import Action, BlindRandomPlayer, Game, Player
+from DataBoardGame.gamelearning import QLearningPlayer, seed_from_sequence
+from DataBoardGame.qtable import ArrayQRow
+from DataBoardGame.utils import resolve_rng
+
+MONEY_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class PolicyPlayer(Player):
+    """
+    Player taking the best known action of a Q-Table, without exploring nor learning.
+
+    States missing from the table, or without a value for any available action, get a random action.
+    """
+
+    def __init__(self, q_table, rng: random.Random = None, abstraction: StateAbstraction = None) -> None:
+        """
+        :param q_table: Mapping of state -> mapping of action -> value, e.g. the table of a
+            QLearningPlayer or the result of `GameFarm.merge_q_tables`. Tables keyed by the int
+            state keys (e.g. merged from a SharedQTable) are supported.
+        :param abstraction: State abstraction the table is keyed by, if any.
+        """
+        super().__init__(rng, record_history=False)
+        self.q_table = q_table
+        self.abstraction = abstraction
+
+    @staticmethod
+    def from_player(player: QLearningPlayer) -> 'PolicyPlayer':
+        """Freeze the policy of a learning player."""
+        return PolicyPlayer(player.q_learning_table, player.rng, player.abstraction)
+
+    def _row(self, game_state):
+        if self.abstraction is not None:
+            return self.q_table.get(self.abstraction(game_state))
+        row = self.q_table.get(game_state)
+        if row is None:
+            row = self.q_table.get(game_state.key)
+        return row
+
+    def decision(self, game_state, action_list: list[Action]) -> Action:
+        row = self._row(game_state)
+        if row is not None:
+            if isinstance(row, ArrayQRow):
+                _, max_action = row.max_item(action_list)
+            else:
+                max_action = max((action for action in action_list if action in row), key=row.__getitem__, default=None)
+            if max_action is not None:
+                return max_action
+
+        return action_list[resolve_rng(self.rng).randint(0, len(action_list) - 1)]
+
+
+def play_evaluation_games(policy: PolicyPlayer, opponents: list[Callable], seeds: list[tuple]) -> list[tuple[bool, int, float]]:
+    """
+    Play a batch of evaluation games, the worker function of `evaluate_policy`.
+
+    :param opponents: Factories of the opponent players taking a `random.Random`, e.g. BlindRandomPlayer.
+    :param seeds: Per game: the game seed, the seat of the policy player and the seeds of the players.
+    :return: Per game: whether the policy won, the number of rounds and the final money of the policy player.
+    """
+    results = []
+    for game_seed, seat, player_seeds in seeds:
+        players = [opponent(random.Random(player_seed)) for opponent, player_seed in zip(opponents, player_seeds[1:])]
+        policy.rng = random.Random(player_seeds[0])
+        players.insert(seat, policy)
+
+        game = Game(verbose=False, seed=game_seed)
+        for player in players:
+            game.add_player(player)
+        game.play()
+        results.append((policy.is_winner, game.current_round, game.players_board[policy].resources.money))
+    return results
+
+
+def _mean_interval(values: np.ndarray, z: float) -> tuple[float, float]:
+    if len(values) < 2:
+        return float('-inf'), float('inf')
+    half_width = z * values.std(ddof=1) / np.sqrt(len(values))
+    return float(values.mean() - half_width), float(values.mean() + half_width)
+
+
+def _wilson_interval(wins: int, games: int, z: float) -> tuple[float, float]:
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    half_width = z * np.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return float(max(0.0, center - half_width)), float(min(1.0, center + half_width))
+
+
+class EvaluationResult:
+    """Statistics of the games of an evaluation, the intervals are (low, high) at the `confidence` level."""
+
+    def __init__(self, wins: np.ndarray, rounds: np.ndarray, money: np.ndarray, confidence: float, stopped_early: bool) -> None:
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.confidence = confidence
+        self.games = len(wins)
+        self.wins = int(wins.sum())
+        self.win_rate = self.wins / self.games if self.games else 0.0
+        self.win_rate_interval = _wilson_interval(self.wins, self.games, z)
+
+        # Rounds of the games won by the policy, i.e. to reach MONEY_TO_STOP
+        won_rounds = rounds[wins]
+        self.mean_rounds_to_win = float(won_rounds.mean()) if len(won_rounds) else float('nan')
+        self.rounds_to_win_interval = _mean_interval(won_rounds, z)
+
+        self.money_mean = float(money.mean()) if len(money) else float('nan')
+        self.money_interval = _mean_interval(money, z)
+        self.money_percentiles = dict(zip(MONEY_PERCENTILES, np.percentile(money, MONEY_PERCENTILES).tolist())) if len(money) else {}
+        self.stopped_early = stopped_early
+
+    def to_dict(self):
+        return {
+            'games': self.games,
+            'wins': self.wins,
+            'win_rate': self.win_rate,
+            'win_rate_interval': self.win_rate_interval,
+            'mean_rounds_to_win': self.mean_rounds_to_win,
+            'rounds_to_win_interval': self.rounds_to_win_interval,
+            'money_mean': self.money_mean,
+            'money_interval': self.money_interval,
+            'money_percentiles': self.money_percentiles,
+            'confidence': self.confidence,
+            'stopped_early': self.stopped_early,
+        }
+
+
+def evaluate_policy(
+    policy,
+    opponents: list[Callable] = (BlindRandomPlayer, BlindRandomPlayer, BlindRandomPlayer),
+    seed: int = 0,
+    max_games: int = 10000,
+    min_games: int = 200,
+    batch_games: int = 100,
+    tolerance: float = 0.02,
+    confidence: float = 0.95,
+    executor: Executor = None,
+    parallel: int = 1,
+) -> EvaluationResult:
+    """
+    Evaluate a frozen policy against opponents in seeded games.
+
+    The seat of the policy player rotates over the games. The games are played in batches of
+    `batch_games`, `parallel` batches at a time in the executor (serially if None). The evaluation
+    stops once at least `min_games` games were played and the half width of the win rate interval is
+    at most `tolerance`, or after `max_games` games.
+
+    :param policy: PolicyPlayer, QLearningPlayer (frozen with `PolicyPlayer.from_player`) or Q-Table.
+    :param opponents: Factories of the opponent players taking a `random.Random`, picklable for a process executor.
+    :param seed: Seed of the games, the same seed plays the same games.
+    :return: The statistics of the played games.
+    """
+    if isinstance(policy, QLearningPlayer):
+        policy = PolicyPlayer.from_player(policy)
+    elif not isinstance(policy, PolicyPlayer):
+        policy = PolicyPlayer(policy)
+    opponents = list(opponents)
+    n_players = len(opponents) + 1
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    seed_sequence = np.random.SeedSequence(seed)
+
+    results = []
+    n_scheduled = 0
+    stopped_early = False
+    while n_scheduled < max_games:
+        batches = []
+        for _ in range(parallel if executor is not None else 1):
+            n_games = min(batch_games, max_games - n_scheduled)
+            if n_games <= 0:
+                break
+            seeds = []
+            for game_sequence in seed_sequence.spawn(n_games):
+                game_seed, *player_seeds = (seed_from_sequence(sequence) for sequence in game_sequence.spawn(1 + n_players))
+                seeds.append((game_seed, n_scheduled % n_players, player_seeds))
+                n_scheduled += 1
+            batches.append(seeds)
+
+        if executor is None:
+            for seeds in batches:
+                results += play_evaluation_games(policy, opponents, seeds)
+        else:
+            futures = [executor.submit(play_evaluation_games, policy, opponents, seeds) for seeds in batches]
+            for future in futures:
+                results += future.result()
+
+        if len(results) >= min_games:
+            low, high = _wilson_interval(sum(won for won, _, _ in results), len(results), z)
+            if (high - low) / 2 <= tolerance:
+                stopped_early = len(results) < max_games
+                break
+
+    wins, rounds, money = (np.array(column) for column in zip(*results))
+    return EvaluationResult(wins.astype(bool), rounds, money.astype(float), confidence, stopped_early)
@@ -0,0 +1,117 @@
+"""
+Structured game event recording.
+
+`EventBuffer` is a preallocated ring buffer of (round, player, phase, action id, resource delta)
+records a `Game` writes to instead of (or besides) formatting log lines.
+"""
+
+from enum import IntEnum
+import numpy as np
+from DataBoardGame.resources import Resources, ResourceType
+
+GamePhase = IntEnum('GamePhase', 'money_gain resource hire fire mandatory_fire salary', start=0)
+
+# Action id of the events without a player decision
+NO_ACTION = -1
+
+
+class EventBuffer:
+    """Ring buffer keeping the last `capacity` game events in NumPy arrays."""
+
+    def __init__(self, capacity: int = 65536) -> None:
+        self.capacity = capacity
+        self.rounds = np.zeros(capacity, dtype=np.int32)
+        self.players = np.zeros(capacity, dtype=np.int16)
+        self.phases = np.zeros(capacity, dtype=np.int8)
+        self.action_ids = np.zeros(capacity, dtype=np.int16)
+        self.deltas = np.zeros((capacity, len(ResourceType)), dtype=np.int32)
+        # Number of events recorded since the last clear, including the overwritten ones
+        self.recorded = 0
+
+    def __len__(self) -> int:
+        return min(self.recorded, self.capacity)
+
+    def record(self, round: int, player: int, phase: GamePhase, action_id: int, before: Resources, after: Resources) -> None:
+        """Record an event with the resources of the player before and after it."""
+        i = self.recorded % self.capacity
+        self.rounds[i] = round
+        self.players[i] = player
+        self.phases[i] = phase
+        self.action_ids[i] = action_id
+        deltas = self.deltas[i]
+        for resource_type in ResourceType:
+            deltas[resource_type] = after[resource_type] - before[resource_type]
+        self.recorded += 1
+
+    def clear(self) -> None:
+        self.recorded = 0
+
+    def dump(self) -> dict:
+        """Return copies of the recorded events in chronological order as a dict of column arrays."""
+        order = np.arange(self.recorded - len(self), self.recorded) % self.capacity
+        return {
+            'round': self.rounds[order],
+            'player': self.players[order],
+            'phase': self.phases[order],
+            'action_id': self.action_ids[order],
+            'delta': self.deltas[order],
+        }
+
+
+class GameStats:
+    """
+    Per-phase instrumentation of `Game.next_game_step`.
+
+    Phase times are wall times and include the decision of the phase. Decision latencies are grouped
+    by player class name. Stats of several games can be collected in the same object.
+    """
+
+    def __init__(self) -> None:
+        self.turns = 0
+        self.game_states = 0
+        self.phase_seconds = [0.0] * len(GamePhase)
+        self.phase_calls = [0] * len(GamePhase)
+        self.phase_actions = [0] * len(GamePhase)
+        self.max_mandatory_fires = 0
+        self.decision_seconds = {}
+        self.decision_count = {}
+
+    def record_phase(self, phase: GamePhase, seconds: float, n_actions: int = 0) -> None:
+        """Record a phase run with the number of actions generated for its decision."""
+        self.phase_seconds[phase] += seconds
+        self.phase_calls[phase] += 1
+        self.phase_actions[phase] += n_actions
+
+    def record_decision(self, player, seconds: float) -> None:
+        """Record the latency of a decision of the player."""
+        name = type(player).__name__
+        self.decision_seconds[name] = self.decision_seconds.get(name, 0.0) + seconds
+        self.decision_count[name] = self.decision_count.get(name, 0) + 1
+
+    def record_turn(self, mandatory_fires: int) -> None:
+        """Record the end of a turn with the number of iterations of its mandatory fire loop."""
+        self.turns += 1
+        self.max_mandatory_fires = max(self.max_mandatory_fires, mandatory_fires)
+
+    def game_states_per_turn(self) -> float:
+        return self.game_states / self.turns if self.turns else 0.0
+
+    def to_dict(self):
+        return {
+            'turns': self.turns,
+            'game_states': self.game_states,
+            'game_states_per_turn': self.game_states_per_turn(),
+            'max_mandatory_fires': self.max_mandatory_fires,
+            'phases': {
+                phase.name: {
+                    'seconds': self.phase_seconds[phase],
+                    'calls': self.phase_calls[phase],
+                    'actions': self.phase_actions[phase],
+                }
+                for phase in GamePhase
+            },
+            'decisions': {
+                name: {'seconds': seconds, 'count': self.decision_count[name], 'mean_seconds': seconds / self.decision_count[name]}
+                for name, seconds in self.decision_seconds.items()
+            },
+        }
@@ -0,0 +1,103 @@
+"""
+Experience replay for the Q-Learning players.
+
+`ExperienceReplay` keeps the last `capacity` transitions of a player in preallocated NumPy arrays
+(a ring buffer): the row of the state and the column of the action in an `ArrayQTable`, the reward
+(the `calc_value` delta), the row of the next state and the mask of the actions available there.
+After every online update the player replays `updates_per_step` minibatches sampled from the
+buffer, each applied to the value matrix as one vectorized Q-Learning update, so every simulated
+transition is learned from many times.
+
+The Q-Table of the player must be an `ArrayQTable` built with `actions=action_catalog.actions`, so the
+columns are the action ids. The rows of the buffer are table rows, so `QLearningPlayer` rejects
+experience replay with a memory budget, which evicts states from the table and reuses their rows.
+"""
+
+import numpy as np
+from DataBoardGame.game import action_catalog
+
+
+class ExperienceReplay:
+    """Ring buffer of transitions and minibatch replay against an ArrayQTable."""
+
+    def __init__(self, capacity: int = 65536, batch_size: int = 64, updates_per_step: int = 1, n_actions: int = None, seed: int = None) -> None:
+        """
+        :param capacity: Number of transitions kept, the oldest ones are overwritten.
+        :param batch_size: Number of transitions of a minibatch.
+        :param updates_per_step: Minibatches replayed after every online update.
+        :param n_actions: Number of action columns, `len(action_catalog)` by default.
+        :param seed: Seed of the minibatch sampling.
+        """
+        n_actions = len(action_catalog) if n_actions is None else n_actions
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.updates_per_step = updates_per_step
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.next_masks = np.zeros((capacity, n_actions), dtype=bool)
+        # Number of transitions added since the last clear, including the overwritten ones
+        self.recorded = 0
+        # Table rows updated by the replays, tracked once set to a set (e.g. by an incremental GameFarm merge)
+        self.updated_rows = None
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return min(self.recorded, self.capacity)
+
+    def add(self, state: int, action: int, reward: float, next_state: int, next_actions) -> None:
+        """
+        Add a transition.
+
+        :param state: Row of the state in the Q-Table.
+        :param action: Column of the action taken.
+        :param next_state: Row of the next state.
+        :param next_actions: Columns of the actions available in the next state.
+        """
+        i = self.recorded % self.capacity
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.next_masks[i] = False
+        self.next_masks[i, next_actions] = True
+        self.recorded += 1
+
+    def clear(self) -> None:
+        self.recorded = 0
+
+    def sample(self, batch_size: int = None) -> np.ndarray:
+        """Indexes of a minibatch sampled uniformly, with replacement, from the buffer."""
+        return self.rng.integers(0, len(self), batch_size or self.batch_size)
+
+    def update(self, values: np.ndarray, batch: np.ndarray, learning_rate: float, discount_factor: float) -> None:
+        """
+        Apply the Q-Learning update of the transitions of `batch` to the value matrix, vectorized.
+
+        The targets use the values before the update. The updates of the same (state, action) in a
+        minibatch (sampling is with replacement) are averaged, so a transition sampled k times still
+        moves its value by one learning rate step, not k.
+        """
+        states, actions, next_states = self.states[batch], self.actions[batch], self.next_states[batch]
+        n_actions = self.next_masks.shape[1]
+        next_values = values[next_states, :n_actions]
+        next_values = np.where(self.next_masks[batch] & ~np.isnan(next_values), next_values, -np.inf).max(axis=1)
+        next_values[np.isneginf(next_values)] = 0
+        targets = self.rewards[batch] + discount_factor * next_values
+        n_columns = values.shape[1]
+        cells, inverse, counts = np.unique(states * n_columns + actions, return_inverse=True, return_counts=True)
+        rows, columns = np.divmod(cells, n_columns)
+        # Entries missing from a row (e.g. deleted) count as 0
+        current = np.nan_to_num(values[rows, columns])
+        errors = np.bincount(inverse, weights=targets - current[inverse], minlength=len(cells)) / counts
+        values[rows, columns] = current + learning_rate * errors
+        if self.updated_rows is not None:
+            self.updated_rows.update(rows.tolist())
+
+    def replay(self, values: np.ndarray, learning_rate: float, discount_factor: float) -> None:
+        """Replay `updates_per_step` minibatches, once the buffer holds a full batch."""
+        if len(self) < self.batch_size:
+            return
+        for _ in range(self.updates_per_step):
+            self.update(values, self.sample(), learning_rate, discount_factor)
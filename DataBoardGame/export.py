@@ -0,0 +1,242 @@
+"""
+Streaming columnar export of Q-Tables for analysis.
+
+`export_q_table` writes one (state features, action features, target) row per Q-Table entry into
+`.npy` column files, `chunk_size` rows at a time. The state features are decoded from the packed
+state keys (`GameState.key`) with vectorized bit operations and the action features are looked up by
+action id, so no intermediate dicts are built. Load the columns with `load_columns`, e.g. into
+`pd.DataFrame(load_columns(path))`.
+"""
+
+import json
+import os
+import struct
+import numpy as np
+from DataBoardGame.board import GameBoard, PlayerBoard
+from DataBoardGame.game import EmptyAction, FireEmployeeAction, GameState, GenerateRsourceAction, HireEmployeeAction, action_catalog, state_value
+from DataBoardGame.qtable import ArrayQTable
+from DataBoardGame.resources import Resources, ResourceType
+from DataBoardGame.ruleset import RULESET
+
+ACTION_TYPES = [EmptyAction, GenerateRsourceAction, HireEmployeeAction, FireEmployeeAction]
+
+# Size of the .npy header, reserved up front so it can be rewritten with the final row count
+NPY_HEADER_SIZE = 128
+
+
+class StateKeyLayout:
+    """Bit fields of the packed state key, see `GameState.encode`, `PlayerBoard.key_fields` and `CardDeck.key_fields`."""
+
+    def __init__(self) -> None:
+        # name -> (bit offset, bit width)
+        self.fields = {}
+        shift = 0
+        deck = GameBoard().employee_deck
+        for name, width in PlayerBoard.key_fields() + deck.key_fields():
+            self.fields[name] = (shift, width)
+            shift += width
+
+        self.n_card_types = len(deck.card_type_ids)
+        self.key_bits = shift
+        self.key_bytes = (shift + 7) // 8
+
+    def decode(self, keys: list[int]) -> dict[str, np.ndarray]:
+        """Decode the state keys to a dict of int64 feature columns."""
+        data = b''.join(key.to_bytes(self.key_bytes, 'little') for key in keys)
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8).reshape(len(keys), self.key_bytes), axis=1, bitorder='little').astype(np.int64)
+        return {name: bits[:, shift : shift + width] @ (1 << np.arange(width, dtype=np.int64)) for name, (shift, width) in self.fields.items()}
+
+
+def state_columns(layout: StateKeyLayout) -> list[tuple[str, str]]:
+    """Names and dtypes of the state feature columns."""
+    columns = [(name, '<i4') for name in Resources.field_names]
+    columns.append(('last_generated_resource', '<i1'))
+    for role, limit in PlayerBoard.employees_limits.items():
+        columns += [(f'employee_{role.name}_{slot}', '<i1') for slot in range(limit)]
+        columns.append((f'employees_{role.name}', '<i1'))
+    for place in ('open', 'trash'):
+        columns += [(f'{place}_{type_id}', '<u1') for type_id in range(layout.n_card_types)]
+    columns.append(('state_value', '<f8'))
+    return columns
+
+
+ACTION_COLUMNS = [
+    ('action_id', '<i2'),
+    ('action_type', '<i1'),
+    ('action_resource_type', '<i1'),
+    ('action_card_type', '<i1'),
+    ('action_role', '<i1'),
+]
+
+
+def action_feature_table() -> dict[str, np.ndarray]:
+    """Action feature columns indexed by action id, -1 where a feature does not apply."""
+    table = {name: np.full(len(action_catalog), -1, dtype=np.int64) for name, _ in ACTION_COLUMNS}
+    for action in action_catalog.actions:
+        action_id = action.action_id
+        table['action_id'][action_id] = action_id
+        table['action_type'][action_id] = ACTION_TYPES.index(type(action))
+        params = action.params
+        if 'resource_type' in params:
+            table['action_resource_type'][action_id] = params['resource_type']
+        if 'employee' in params:
+            table['action_card_type'][action_id] = RULESET.type_ids[params['employee']]
+            table['action_role'][action_id] = params['role']
+    return table
+
+
+def _npy_header(dtype: str, length: int) -> bytes:
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (dtype, length)
+    header = header.ljust(NPY_HEADER_SIZE - 11) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def feature_columns(state_keys: list[int], action_ids: list[int], layout: StateKeyLayout = None, actions: dict = None) -> dict[str, np.ndarray]:
+    """
+    Compute the state and action feature columns of (state key, action id) rows, as exported.
+
+    :param layout: Layout of the state keys, built if None.
+    :param actions: Result of `action_feature_table`, built if None.
+    """
+    layout = StateKeyLayout() if layout is None else layout
+    actions = action_feature_table() if actions is None else actions
+    features = layout.decode(state_keys)
+    # Slots and the last generated resource are encoded + 1, 0 meaning none
+    for role, limit in PlayerBoard.employees_limits.items():
+        names = [f'employee_{role.name}_{slot}' for slot in range(limit)]
+        features[f'employees_{role.name}'] = sum((features[name] > 0).astype(np.int64) for name in names)
+        for name in names:
+            features[name] -= 1
+    features['last_generated_resource'] -= 1
+    employees = sum(features[f'employees_{role.name}'] for role in PlayerBoard.employees_limits)
+    resources = features['dashboards'] + features['marts'] + features['insights'] + features['raw_data']
+    features['state_value'] = state_value(features['money'], resources, employees)
+
+    action_ids = np.array(action_ids, dtype=np.int64)
+    for name, _ in ACTION_COLUMNS:
+        features[name] = actions[name][action_ids]
+    return features
+
+
+class QTableColumnWriter:
+    """Append rows of (state key, action id, target) to `.npy` column files in a directory."""
+
+    def __init__(self, directory: str, chunk_size: int = 65536) -> None:
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.layout = StateKeyLayout()
+        self.actions = action_feature_table()
+        self.columns = state_columns(self.layout) + ACTION_COLUMNS + [('target', '<f4')]
+        self.rows = 0
+
+        self._keys = []
+        self._action_ids = []
+        self._targets = []
+
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+        for name, dtype in self.columns:
+            file = open(os.path.join(directory, f'{name}.npy'), 'wb')
+            file.write(_npy_header(dtype, 0))
+            self._files[name] = file
+
+    def __enter__(self) -> 'QTableColumnWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, state_key: int, action_id: int, target: float) -> None:
+        self._keys.append(state_key)
+        self._action_ids.append(action_id)
+        self._targets.append(target)
+        if len(self._keys) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Decode the buffered rows and append them to the column files."""
+        if not self._keys:
+            return
+        features = feature_columns(self._keys, self._action_ids, self.layout, self.actions)
+        features['target'] = np.array(self._targets)
+
+        for name, dtype in self.columns:
+            self._files[name].write(features[name].astype(dtype).tobytes())
+        self.rows += len(self._keys)
+        self._keys.clear()
+        self._action_ids.clear()
+        self._targets.clear()
+
+    def close(self) -> None:
+        """Flush the rows and write the final row count to the column headers and the schema."""
+        if self._files is None:
+            return
+        self.flush()
+        for name, dtype in self.columns:
+            file = self._files[name]
+            file.seek(0)
+            file.write(_npy_header(dtype, self.rows))
+            file.close()
+        self._files = None
+
+        schema = {
+            'rows': self.rows,
+            'columns': [[name, dtype] for name, dtype in self.columns],
+            'action_types': [action_type.__name__ for action_type in ACTION_TYPES],
+            'resource_types': [resource_type.name for resource_type in ResourceType],
+        }
+        with open(os.path.join(self.directory, 'schema.json'), 'w') as file:
+            json.dump(schema, file, indent=2)
+
+
+def _state_key(state) -> int:
+    return state.key if isinstance(state, GameState) else state
+
+
+def _action_id(action) -> int:
+    if isinstance(action, int):
+        return action
+    return action.action_id if action.action_id is not None else action_catalog.action_ids[action]
+
+
+def export_q_table(q_table, directory: str, chunk_size: int = 65536, skip_zero: bool = False) -> int:
+    """
+    Export the entries of a Q-Table to `.npy` column files.
+
+    :param q_table: Mapping of state (GameState or state key) -> mapping of action (Action or action id)
+        -> value, e.g. the result of `GameFarm.merge_q_tables` or an ArrayQTable.
+    :param directory: Directory of the column files and `schema.json`, created if needed.
+    :param skip_zero: Skip the entries with a zero value.
+    :return: Number of exported rows.
+    """
+    with QTableColumnWriter(directory, chunk_size) as writer:
+        if isinstance(q_table, ArrayQTable):
+            # Read the value matrix directly, a chunk of states at a time
+            column_ids = np.array([_action_id(action) for action in q_table.actions], dtype=np.int64)
+            rows = list(q_table.state_ids.items())
+            states_per_chunk = max(1, chunk_size // max(1, len(column_ids)))
+            for start in range(0, len(rows), states_per_chunk):
+                chunk = rows[start : start + states_per_chunk]
+                values = q_table.values[[row for _, row in chunk], : len(column_ids)]
+                present = ~np.isnan(values)
+                if skip_zero:
+                    present &= values != 0
+                for (state, _), row_values, row_present in zip(chunk, values, present):
+                    key = _state_key(state)
+                    for column in np.flatnonzero(row_present):
+                        writer.append(key, column_ids[column], row_values[column])
+        else:
+            for state, actions in q_table.items():
+                key = _state_key(state)
+                for action, value in actions.items():
+                    if skip_zero and value == 0:
+                        continue
+                    writer.append(key, _action_id(action), value)
+    return writer.rows
+
+
+def load_columns(directory: str, mmap_mode: str = 'r') -> dict[str, np.ndarray]:
+    """Load the exported columns, memory-mapped by default."""
+    with open(os.path.join(directory, 'schema.json')) as file:
+        schema = json.load(file)
+    return {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name, _ in schema['columns']}
@@ -1,12 +1,19 @@
 from DataBoardGame.board import GameBoard, PlayerBoard, PlayerDeck
-from random import randint
-from DataBoardGame.utils import log, make_dict_hashable
+from DataBoardGame.card import employee_card_list
+from array import array
+import random
+from DataBoardGame.events import NO_ACTION, EventBuffer, GamePhase, GameStats
+from DataBoardGame.memory import MemoryBudget, state_key, states_memory, table_memory
+from DataBoardGame.utils import is_log_enabled, log, make_dict_hashable, resolve_rng
 from DataBoardGame.resources import ResourceType
 from functools import wraps
 from typing import List, Callable
 from DataBoardGame import globalvars as glb
 from dataclasses import dataclass
 import copy
+from time import perf_counter
+from types import MappingProxyType
+import zlib
 
 
 class Action:
@@ -16,11 +23,17 @@ class Action:
 
     _params: dict
     _hash: int = None
+    action_id: int = None
 
     def __init__(self, params):
         self._params = params
         self._hash = hash(self)
 
+    @property
+    def params(self) -> MappingProxyType:
+        """Parameters of the action, read-only since they make its hash."""
+        return MappingProxyType(self._params)
+
     def action(self, game, player, **kwargs):
         raise NotImplemented()
 
@@ -33,13 +46,17 @@ class Action:
     def __hash__(self):
         if self._hash:
             return self._hash
-        return hash((type(self).__name__, frozenset(sorted(self._params.items()))))
+        # str hashes are salted per process: the type name and the param names are hashed with crc32 so
+        # that the hashes (pickled with the actions) are the same in spawned worker processes
+        return hash((zlib.crc32(type(self).__name__.encode()), tuple((zlib.crc32(key.encode()), value) for key, value in sorted(self._params.items()))))
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, Action):
             return NotImplemented
 
-        return type(self).__name__ == type(other).__name__ and self._hash == other._hash
+        return type(self) is type(other) and self._hash == other._hash
 
     def to_dict(self):
         res = {}
@@ -78,35 +95,146 @@ class EmptyAction(Action):
         pass
 
 
+class ActionCatalog:
+    """
+    All the actions of the game, created once with a stable integer id.
+
+    Ids are assigned in order: the empty action, a generate action per resource type, a hire action
+    per card and role, a fire action per card and role. Equal cards give equal actions, which share
+    the id of the first of them, so the ids follow the Action equality. `actions` holds one action per id.
+    """
+
+    def __init__(self, cards: list, roles: list) -> None:
+        self.actions = []
+        self.action_ids = {}
+        # (action class, card, role) -> action, finds the action of a copy of a card by equality
+        self._equal_card_actions = {}
+
+        self.empty = self._register(EmptyAction())
+        self.generate = {
+            resource_type: self._register(GenerateRsourceAction({'resource_type': resource_type}))
+            for resource_type in ResourceType
+            if resource_type != ResourceType.money
+        }
+        self.hire = self._register_card_actions(HireEmployeeAction, cards, roles)
+        self.fire = self._register_card_actions(FireEmployeeAction, cards, roles)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def _register(self, action: Action) -> Action:
+        action.action_id = self.action_ids.get(action)
+        if action.action_id is None:
+            action.action_id = len(self.actions)
+            self.action_ids[action] = action.action_id
+            self.actions.append(action)
+        return action
+
+    def _register_card_actions(self, action_class, cards: list, roles: list) -> dict:
+        """Create the action of every card (by identity) on every role."""
+        actions = {}
+        for card in cards:
+            for role in roles:
+                action = actions[id(card), role] = self._register(action_class({'employee': card, 'role': role}))
+                self._equal_card_actions.setdefault((action_class, card, role), action)
+        return actions
+
+    def _card_action(self, actions: dict, action_class, card, role) -> Action:
+        action = actions.get((id(card), role))
+        if action is None:
+            # A copy of a catalog card (e.g. unpickled): use the action of an equal card, the id stays the same
+            action = self._equal_card_actions.get((action_class, card, role))
+            if action is None:
+                action = self._equal_card_actions[action_class, card, role] = self._register(action_class({'employee': card, 'role': role}))
+        return action
+
+    def hire_action(self, card, role) -> Action:
+        return self._card_action(self.hire, HireEmployeeAction, card, role)
+
+    def fire_action(self, card, role) -> Action:
+        return self._card_action(self.fire, FireEmployeeAction, card, role)
+
+    def to_ids(self, actions: list[Action]) -> list[int]:
+        """Convert a list of actions to the list of their ids."""
+        return [action.action_id for action in actions]
+
+    def to_mask(self, actions: list[Action]) -> int:
+        """Convert a list of actions to a bitmask of their ids."""
+        mask = 0
+        for action in actions:
+            mask |= 1 << action.action_id
+        return mask
+
+    def from_ids(self, action_ids: list[int]) -> list[Action]:
+        """Convert a list of action ids to the list of actions."""
+        return [self.actions[action_id] for action_id in action_ids]
+
+
+action_catalog = ActionCatalog(employee_card_list, list(PlayerBoard.employees_limits))
+
+# Action id logged in `Game.action_log` for a decision without an equal catalog action, it can't be replayed
+UNCATALOGED_ACTION = 0xFFFF
+
+
+def state_value(money, resources, employees):
+    """
+    Value of a state (`GameState.calc_value`), also computed on NumPy columns by `DataBoardGame.export`.
+
+    :param resources: Sum of the resources other than money.
+    :param employees: Number of employees.
+    """
+    return money * 100.0 + resources * 5 + employees
+
+
 class GameState:
     """
     A class to represent the state of the game, including the game board,
     player board, and player deck.
 
+    The state keeps immutable snapshots of the boards, so it stays valid while the game
+    continues. The dictionary representation, key, hash and value are computed on first access.
+
     Attributes
     ----------
     game_board : GameBoard
-        The state of the game board.
+        Snapshot of the game board.
     player_board : PlayerBoard
-        The state of the player's board.
+        Snapshot of the player's board.
     player_deck : PlayerDeck
-        The state of the player's deck.
+        Snapshot of the player's deck.
     """
 
     _hash: int = None
+    _key: int = None
     _dict: dict = None
     _value: float = None
 
     def __init__(self, game_board: GameBoard, player_board: PlayerBoard, player_deck: PlayerDeck) -> None:
-        self.game_board = game_board
-        self.player_board = player_board
-        self.player_deck = player_deck
-        self._dict = self.to_dict()
-        self._hash = hash(self)
-        self._value = self.calc_value()
+        self.game_board = game_board.snapshot()
+        self.player_board = player_board.snapshot()
+        self.player_deck = player_deck.snapshot()
+
+    @property
+    def key(self) -> int:
+        """Packed encoding of the state, used as the Q-Table key."""
+        if self._key is None:
+            self._key = self.encode()
+        return self._key
+
+    def encode(self) -> int:
+        """
+        Pack the state into an int of fixed width for a given card list.
+
+        The player board is stored in the low `PlayerBoard.key_bits` bits, followed by the game board
+        and the player deck.
+        """
+        key = self.player_board.encode()
+        key |= self.game_board.encode() << PlayerBoard.key_bits
+        key |= self.player_deck.encode() << (PlayerBoard.key_bits + self.game_board.key_bits)
+        return key
 
     def to_dict(self):
-        if self._dict:
+        if self._dict is not None:
             return self._dict
 
         self._dict = {}
@@ -117,36 +245,30 @@ class GameState:
         return self._dict
 
     def calc_value(self):
-        if self._value:
-            return self._value
-        return (
-            self.player_board.resources.money * 100.0
-            + (
-                self.player_board.resources.dashboards
-                + self.player_board.resources.marts
-                + self.player_board.resources.insights
-                + self.player_board.resources.raw_data
+        if self._value is None:
+            resources = self.player_board.resources
+            self._value = state_value(
+                resources.money, resources.dashboards + resources.marts + resources.insights + resources.raw_data, self.player_board.employees_count()
             )
-            * 5
-            + self.player_board.employees_count()
-        )
+        return self._value
 
     def __hash__(self) -> int:
-        if self._hash:
-            return self._hash
-        return hash((self.game_board, self.player_board, self.player_deck))
+        if self._hash is None:
+            self._hash = hash(self.key)
+        return self._hash
 
     def __eq__(self, other):
         if not isinstance(other, GameState):
             return NotImplemented
 
-        if self._hash:
-            return self._hash == other._hash and self._value == other._value
-
-        return self.game_board == other.game_board and self.player_board == other.player_board and self.player_deck == other.player_deck
+        return self.key == other.key
 
 
 class Player:
+    # Players not inspecting the game state declare False: the game then skips building a GameState
+    # and calls `make_blind_decision` with the action list only
+    needs_observation = True
+
     is_winner = False
     decision_history = {}
     observation_history = {}
@@ -155,15 +277,36 @@ class Player:
     last_state = None
     last_action = None
     max_game_value = 0
-
-    def __init__(self) -> None:
+    rng: random.Random = None
+    memory_budget: MemoryBudget = None
+    record_observations = True
+    record_history = True
+    visits = {}
+    evicted_states = set()
+
+    def __init__(self, rng: random.Random = None, memory_budget: MemoryBudget = None, record_observations: bool = True, record_history: bool = True) -> None:
         """
         Initialize the Player object with an empty decision history.
+
+        :param rng: Random generator of the decisions, the `random` module if None.
+        :param memory_budget: Maximum number of states kept in the player tables, unbounded if None.
+            The visits of the states are tracked to choose the evicted ones.
+        :param record_observations: Keep the states reached after every decision in `observation_history`.
+        :param record_history: Keep the decisions of the game in `decision_history` (and the best
+            decisions in `best_decision_state` at the end of the game) and the observations.
         """
+        self.rng = rng
+        self.record_history = record_history
+        self.memory_budget = memory_budget
+        self.record_observations = record_observations
         self.decision_history = {}  # Dictionary to store decision history
         self.observation_history = {}  # Dictionary to store observation history
         self.best_decision_state = {}
         self.max_game_value = 0
+        # State key -> number of visits, in the order of the last visit (only with a memory budget)
+        self.visits = {}
+        # States evicted since the farm last collected them
+        self.evicted_states = set()
 
         self.last_state = None
         self.last_action = None
@@ -176,7 +319,13 @@ class Player:
         pass
 
     def make_decision(self, game_state, action_list: list[Action]) -> Action:
-        if self.last_state:
+        if not self.record_history:
+            action = self.decision(game_state, action_list)
+            self.last_state = game_state
+            self.last_action = action
+            return action
+
+        if self.last_state and self.record_observations:
             if self.last_state in self.observation_history:
                 self.observation_history[self.last_state][self.last_action] = game_state
             else:
@@ -187,12 +336,21 @@ class Player:
         self.max_game_value = max(game_state.calc_value(), self.max_game_value)
 
         self.decision_history[game_state] = action
+        if self.memory_budget is not None:
+            key = game_state.key
+            self.visits[key] = self.visits.pop(key, 0) + 1
 
         self.last_state = game_state
         self.last_action = action
 
         return action
 
+    def make_blind_decision(self, action_list: list[Action]) -> Action:
+        """Decide from the available actions only, for the players with `needs_observation` False. Nothing is recorded."""
+        action = self.decision(None, action_list)
+        self.last_action = action
+        return action
+
     def post_gamme_init(self):
         for state, action in self.decision_history.items():
             if state not in self.best_decision_state:
@@ -204,16 +362,115 @@ class Player:
             else:
                 self.best_decision_state[state][action] = max(self.best_decision_state[state][action], self.max_game_value)
 
+        self.enforce_memory_budget()
+
+    def memory_tables(self) -> dict:
+        """The tables of the player bounded by the memory budget, by name."""
+        return {'best_decision_state': self.best_decision_state, 'observation_history': self.observation_history}
+
+    def protected_keys(self) -> set:
+        """Keys of the states of the current game, kept by the memory budget."""
+        protected = {state.key for state in self.decision_history}
+        if self.last_state is not None:
+            protected.add(self.last_state.key)
+        return protected
+
+    def enforce_memory_budget(self) -> list:
+        """
+        Evict states from the tables over the memory budget, keeping the states of the current game.
+
+        :return: The evicted states, also added to `evicted_states`.
+        """
+        if self.memory_budget is None:
+            return []
+
+        protected = self.protected_keys()
+        evicted = []
+        for table in self.memory_tables().values():
+            # A shared table is updated by other players too, it is not bounded per player
+            if getattr(table, 'shared', False):
+                continue
+            states = self.memory_budget.select_evictions(table, self.visits, protected)
+            for state in states:
+                del table[state]
+            evicted += states
+
+        if evicted:
+            kept = set()
+            for table in self.memory_tables().values():
+                kept.update(state_key(state) for state in table)
+            self.visits = {key: count for key, count in self.visits.items() if key in kept}
+            self.evicted_states.update(evicted)
+        return evicted
+
+    def usage_tables(self) -> dict:
+        """The tables reported by `memory_usage`, by name."""
+        return {'decision_history': self.decision_history, **self.memory_tables(), 'visits': self.visits, 'evicted_states': self.evicted_states}
+
+    def memory_usage(self) -> dict:
+        """
+        Number of states and approximate bytes of every table of the player (`DataBoardGame.memory.table_memory`),
+        of the GameStates they hold ('game_states', `DataBoardGame.memory.states_memory`) and the total 'bytes'.
+        """
+        tables = self.usage_tables()
+        usage = {name: {'states': len(table), 'bytes': table_memory(table)} for name, table in tables.items()}
+        usage['game_states'] = states_memory([*tables.values(), [self.last_state]])
+        usage['bytes'] = sum(total['bytes'] for total in usage.values())
+        return usage
+
     def decision(self, game_state, action_list: list[Action]) -> Action:
         raise NotImplementedError()
 
+    def get_learning_delta(self, states) -> dict:
+        """
+        Collect everything the player learned about `states` so it can be shipped to another process.
+
+        :param states: States touched since the player was sent to the worker.
+        :return: Dictionary to pass to `apply_learning_delta` of the original player.
+        """
+        states = [state for state in states if state is not None]
+        return {
+            'decision_history': self.decision_history,
+            'observation_history': {state: self.observation_history[state] for state in states if state in self.observation_history},
+            'best_decision_state': {state: self.best_decision_state[state] for state in states if state in self.best_decision_state},
+            'visits': {state.key: self.visits[state.key] for state in states if state.key in self.visits},
+            'max_game_value': self.max_game_value,
+            'is_winner': self.is_winner,
+            'last_state': self.last_state,
+            'last_action': self.last_action,
+        }
+
+    def apply_learning_delta(self, delta: dict):
+        """
+        Merge a delta collected by `get_learning_delta` in a worker process into this player.
+
+        :param delta: Learning delta of the same player.
+        """
+        self.decision_history = delta['decision_history']
+        self.observation_history.update(delta['observation_history'])
+        self.best_decision_state.update(delta['best_decision_state'])
+        for key, count in delta['visits'].items():
+            self.visits.pop(key, None)
+            self.visits[key] = count
+        self.max_game_value = delta['max_game_value']
+        self.is_winner = delta['is_winner']
+        self.last_state = delta['last_state']
+        self.last_action = delta['last_action']
+        self.enforce_memory_budget()
+
 
 class RandomPlayer(Player):
     def decision(self, game_state, action_list: list[Action]) -> Action:
-        i = randint(0, len(action_list) - 1)
+        i = resolve_rng(self.rng).randint(0, len(action_list) - 1)
         return action_list[i]
 
 
+class BlindRandomPlayer(RandomPlayer):
+    """Random player deciding without observing the game state: the game builds no GameState for it and it records no history."""
+
+    needs_observation = False
+
+
 class Game:
     players_board: dict[Player, PlayerBoard]
     players_deck: dict[Player, PlayerDeck]
@@ -224,21 +481,45 @@ class Game:
     current_player: Player
     current_player_index: int
 
-    def __init__(self) -> None:
+    verbose: bool
+    event_sink: EventBuffer
+    seed: int
+    action_log: array
+    stats: GameStats
+
+    def __init__(self, verbose: bool = None, event_sink: EventBuffer = None, seed: int = None, stats: GameStats = None) -> None:
+        """
+        :param verbose: Log the game steps; None follows the level of the logger, False never builds
+            the log messages.
+        :param event_sink: Buffer to record the structured game events to.
+        :param seed: Seed of the game random generator (the deck shuffles). With a seed, the game is
+            reproduced from the seed and `action_log`, see `DataBoardGame.replay`. The global `random`
+            module is used if None.
+        :param stats: Collect the per-phase timings and counters of the game in it, nothing is measured if None.
+        """
         self.players = []
         self.players_board = {}
         self.players_deck = {}
         self.game_board = {}
         self.current_round = 0
-        self.game_board = GameBoard()
+        self.seed = seed
+        self.rng = None if seed is None else random.Random(seed)
+        self.game_board = GameBoard(rng=self.rng)
         self.game_log = []
+        # Action ids of all the decisions of the game, in order
+        self.action_log = array('H')
 
-        pass
+        self.verbose = verbose
+        self.event_sink = event_sink
+        self.stats = stats
+        self._log_enabled = False
 
     def get_current_player_state(self) -> GameState:
         return self.get_player_state(self.current_player)
 
     def get_player_state(self, player: Player) -> GameState:
+        if self.stats is not None:
+            self.stats.game_states += 1
         return GameState(self.game_board, self.players_board[player], self.players_deck[player])
 
     def add_player(self, new_player: Player) -> None:
@@ -250,87 +531,175 @@ class Game:
             self.players_deck[player] = PlayerDeck()
             player.pre_game_init()
 
+        if self.rng is not None:
+            self.rng.seed(self.seed)
         self.game_board.pre_game_init()
         self.game_log = []
+        self.action_log = array('H')
 
         self.current_player = self.players[0]
         self.current_player_index = 0
 
     def generate_available_resource_actions(self, player, is_mandotory: bool = False):
         res_actions = []
-        for item in ResourceType:
-            if item == ResourceType.money:
-                continue
+        for item, action in action_catalog.generate.items():
             if self.players_board[player].check_pay_resource_to_player(item):
-                res_actions.append(GenerateRsourceAction({'resource_type': item}))
+                res_actions.append(action)
 
         if len(res_actions) == 0 or not is_mandotory:
-            res_actions.append(EmptyAction())
+            res_actions.append(action_catalog.empty)
         return res_actions
 
     def generate_available_employee_hire_actions(self, player, is_mandotory: bool = False):
         res_actions = []
 
+        available_roles = self.players_board[player].get_available_roles()
         for card in self.game_board.employee_deck.open_cards:
-            for role in self.players_board[player].get_available_roles():
-                res_actions.append(HireEmployeeAction({'employee': card, 'role': role}))
+            for role in available_roles:
+                res_actions.append(action_catalog.hire_action(card, role))
 
         if len(res_actions) == 0 or not is_mandotory:
-            res_actions.append(EmptyAction())
+            res_actions.append(action_catalog.empty)
         return res_actions
 
     def generate_available_employee_fire_actions(self, player, is_mandotory: bool = False):
-        res_actions = [EmptyAction()]
+        res_actions = [action_catalog.empty]
         if not is_mandotory:
             res_actions.clear()
 
         for employee, role in self.players_board[player].get_employee_list():
-            res_actions.append(FireEmployeeAction({'employee': employee, 'role': role}))
+            res_actions.append(action_catalog.fire_action(employee, role))
 
         if len(res_actions) == 0 or not is_mandotory:
-            res_actions.append(EmptyAction())
+            res_actions.append(action_catalog.empty)
 
         return res_actions
 
     def log_player_state(self, player):
-        log(f'\t player {self.players.index(player)}\n {self.players_board[player]}')
-
-    def action_game_step(self, step_name, player, action_gen_function, is_mandotory=False):
-        log(f'Game step: {step_name}')
-        log(f'{self.game_board}')
+        if self._log_enabled:
+            log('\t player %s\n %s', self.players.index(player), self.players_board[player])
+
+    def record_event(self, player, phase: GamePhase, action_id: int, before) -> None:
+        """Record an event of the player to the event sink, `before` are the resources before it."""
+        self.event_sink.record(self.current_round, self.players.index(player), phase, action_id, before, self.players_board[player].resources)
+
+    def decide(self, player: Player, actions: list[Action]) -> Action:
+        """Ask the player to choose one of the actions, with an observation of the game if it needs one."""
+        if player.needs_observation:
+            state = self.get_player_state(player)
+            if self.stats is not None:
+                decision_start = perf_counter()
+            decision = player.make_decision(state, actions)
+        else:
+            if self.stats is not None:
+                decision_start = perf_counter()
+            decision = player.make_blind_decision(actions)
+        if self.stats is not None:
+            self.stats.record_decision(player, perf_counter() - decision_start)
+        return decision
+
+    def action_game_step(self, step_name, player, action_gen_function, is_mandotory=False, phase: GamePhase = None):
+        steps = self.action_game_steps(step_name, player, action_gen_function, is_mandotory, phase)
+        _, actions = next(steps)
+        try:
+            steps.send(self.decide(player, actions))
+        except StopIteration:
+            pass
+
+    def action_game_steps(self, step_name, player, action_gen_function, is_mandotory=False, phase: GamePhase = None):
+        """Generator of a decision step: yields the player and the available actions and expects the decision to be sent back."""
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+        if self._log_enabled:
+            log('Game step: %s', step_name)
+            log('%s', self.game_board)
         actions = action_gen_function(player, is_mandotory)
-        decision = player.make_decision(self.get_player_state(player), actions)
-        log(decision)
+        if self.event_sink is not None:
+            before = copy.copy(self.players_board[player].resources)
+        decision = yield player, actions
+        if self._log_enabled:
+            log('%s', decision)
         decision.call_function(self, player)
+        action_id = decision.action_id
+        if action_id is None:
+            # An action created by the player, e.g. EmptyAction(), has the id of the equal catalog action
+            action_id = action_catalog.action_ids.get(decision)
+        self.action_log.append(UNCATALOGED_ACTION if action_id is None else action_id)
+        if self.event_sink is not None:
+            self.record_event(player, phase, NO_ACTION if action_id is None else action_id, before)
         self.log_player_state(player)
+        if stats is not None:
+            stats.record_phase(phase, perf_counter() - start, len(actions))
 
     def next_game_step(self) -> int:
-        log('')
-        log(f'Game round {self.current_round} player {self.current_player_index}')
-        for player in self.players:
-            self.log_player_state(player)
+        steps = self.turn_steps()
+        try:
+            player, actions = next(steps)
+            while True:
+                player, actions = steps.send(self.decide(player, actions))
+        except StopIteration as stop:
+            return stop.value
+
+    def turn_steps(self):
+        """
+        Generator of the turn of the current player, pausing at every decision.
 
-        log(f'Game step: Money gain')
-        self.players_board[self.current_player].generate_money()
+        It yields (player, available actions) and expects the chosen action to be sent back, see
+        `DataBoardGame.inference`. It returns whether the game is over, like `next_game_step`.
+        """
+        self._log_enabled = is_log_enabled() if self.verbose is None else self.verbose
+        board = self.players_board[self.current_player]
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+
+        if self._log_enabled:
+            log('')
+            log('Game round %s player %s', self.current_round, self.current_player_index)
+            for player in self.players:
+                self.log_player_state(player)
+            log('Game step: Money gain')
+
+        if self.event_sink is not None:
+            before = copy.copy(board.resources)
+        board.generate_money()
+        if self.event_sink is not None:
+            self.record_event(self.current_player, GamePhase.money_gain, NO_ACTION, before)
         self.log_player_state(self.current_player)
+        if stats is not None:
+            stats.record_phase(GamePhase.money_gain, perf_counter() - start)
 
-        self.action_game_step('Resource decision', self.current_player, self.generate_available_resource_actions)
+        yield from self.action_game_steps('Resource decision', self.current_player, self.generate_available_resource_actions, phase=GamePhase.resource)
 
-        self.action_game_step('Employee hire decision', self.current_player, self.generate_available_employee_hire_actions)
+        yield from self.action_game_steps('Employee hire decision', self.current_player, self.generate_available_employee_hire_actions, phase=GamePhase.hire)
 
-        self.action_game_step('Employee fire decision', self.current_player, self.generate_available_employee_fire_actions)
+        yield from self.action_game_steps('Employee fire decision', self.current_player, self.generate_available_employee_fire_actions, phase=GamePhase.fire)
 
-        while not self.players_board[self.current_player].check_is_salary_available():
-            self.action_game_step(
+        mandatory_fires = 0
+        while not board.check_is_salary_available():
+            mandatory_fires += 1
+            yield from self.action_game_steps(
                 'Employee fire decision',
                 self.current_player,
                 self.generate_available_employee_fire_actions,
                 is_mandotory=True,
+                phase=GamePhase.mandatory_fire,
             )
 
-        log(f'Game step: Salary')
-        self.players_board[self.current_player].pay_salary()
+        if stats is not None:
+            start = perf_counter()
+        if self._log_enabled:
+            log('Game step: Salary')
+        if self.event_sink is not None:
+            before = copy.copy(board.resources)
+        board.pay_salary()
+        if self.event_sink is not None:
+            self.record_event(self.current_player, GamePhase.salary, NO_ACTION, before)
         self.log_player_state(self.current_player)
+        if stats is not None:
+            stats.record_phase(GamePhase.salary, perf_counter() - start)
+            stats.record_turn(mandatory_fires)
 
         self.current_player_index += 1
         if self.current_player_index == len(self.players):
@@ -344,7 +713,8 @@ class Game:
     def is_game_over(self):
         for player in self.players:
             if self.players_board[player].resources.money > glb.MONEY_TO_STOP:
-                log(f'player {self.players.index(player)} gets {glb.MONEY_TO_STOP} money')
+                if self._log_enabled:
+                    log('player %s gets %s money', self.players.index(player), glb.MONEY_TO_STOP)
                 player.is_winner = True
                 return True
 
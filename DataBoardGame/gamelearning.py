@@ -3,9 +3,18 @@ This module contains classes and functions for implementing a Q-Learning player
 and a game farm for training multiple Q-Learning players in parallel.
 """
 
-from random import randint, random, shuffle
-from DataBoardGame.game import Action, Game, Player
-from DataBoardGame.utils import split_list_into_chunks
+from concurrent.futures import Executor
+import operator
+import random
+from typing import Callable
+import numpy as np
+from DataBoardGame.game import Action, Game, Player, action_catalog
+from DataBoardGame.abstraction import StateAbstraction
+from DataBoardGame.experience import ExperienceReplay
+from DataBoardGame.memory import MemoryBudget, state_key, states_memory, table_memory
+from DataBoardGame.qtable import ArrayQRow, ArrayQTable
+from DataBoardGame.replay import GameRecord
+from DataBoardGame.utils import resolve_rng, split_list_into_chunks
 
 
 class QLearningPlayer(Player):
@@ -13,39 +22,89 @@ class QLearningPlayer(Player):
 
     q_learning_table: dict
 
-    def __init__(self, learning_rate: float, discount_factor: float, random_rate: float) -> None:
-        """Initialize the QLearningPlayer with learning parameters."""
-        super().__init__()
-        self.q_learning_table = {}
+    def __init__(
+        self,
+        learning_rate: float,
+        discount_factor: float,
+        random_rate: float,
+        q_learning_table=None,
+        rng: random.Random = None,
+        memory_budget: MemoryBudget = None,
+        record_observations: bool = True,
+        experience: ExperienceReplay = None,
+        abstraction: StateAbstraction = None,
+        learning: bool = None,
+    ) -> None:
+        """
+        Initialize the QLearningPlayer with learning parameters.
+
+        :param q_learning_table: Storage of the Q-Table (e.g. ArrayQTable), an empty dict by default.
+        :param rng: Random generator of the exploration, the `random` module if None.
+        :param memory_budget: See `Player`, it also bounds the Q-Table.
+        :param experience: Record the transitions to it and replay minibatches of them after every
+            update, the Q-Table must then be an ArrayQTable of the `action_catalog` actions. Not supported
+            with a memory budget: the buffered transitions refer to the rows of the evicted states.
+        :param abstraction: Key the Q-Table by the abstract keys of the states (see
+            `DataBoardGame.abstraction`), by the states if None. The rewards use the real states.
+        :param learning: Update the Q-Table. A player that does not learn never adds states nor actions to
+            the Q-Table, e.g. a `MmapQTable` opened read-only, and takes the best known actions. By default
+            the player learns unless the Q-Table is read-only.
+        """
+        super().__init__(rng, memory_budget, record_observations)
+        if experience is not None:
+            if not isinstance(q_learning_table, ArrayQTable):
+                raise ValueError('Experience replay needs an ArrayQTable Q-Table')
+            if memory_budget is not None:
+                raise ValueError('Experience replay is not supported with a memory budget')
+            n_actions = len(action_catalog)
+            if q_learning_table.actions[:n_actions] != action_catalog.actions or experience.next_masks.shape[1] != n_actions:
+                raise ValueError('Experience replay needs the columns of the Q-Table and of the buffer to be the action_catalog actions')
+        self.experience = experience
+        self.abstraction = abstraction
+        self.q_learning_table = {} if q_learning_table is None else q_learning_table
+        self.learning = not getattr(self.q_learning_table, 'readonly', False) if learning is None else learning
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.random_rate = random_rate
 
+    def table_key(self, game_state):
+        """Key of the state in the Q-Table."""
+        return game_state if self.abstraction is None else self.abstraction(game_state)
+
     def decision(self, game_state, action_list: list[Action]) -> Action:
         """Make a decision based on the game state and action list."""
-        if game_state not in self.q_learning_table:
-            self.q_learning_table[game_state] = {action: 0 for action in action_list}
-        else:
-            for action in action_list:
-                if action not in self.q_learning_table[game_state]:
-                    self.q_learning_table[game_state][action] = 0
+        key = self.table_key(game_state)
+        if self.learning:
+            if key not in self.q_learning_table:
+                self.q_learning_table[key] = {action: 0 for action in action_list}
+            else:
+                for action in action_list:
+                    if action not in self.q_learning_table[key]:
+                        self.q_learning_table[key][action] = 0
+            if self.memory_budget is not None and self.abstraction is not None:
+                self.visits[key] = self.visits.pop(key, 0) + 1
 
-        if self.last_state and self.last_state != game_state:
-            self.update_q_table(game_state)
+            if self.last_state and self.last_state != game_state:
+                self.update_q_table(game_state, action_list)
 
-        if random() < (1 - self.random_rate):
+        rng = resolve_rng(self.rng)
+        if rng.random() < (1 - self.random_rate) and key in self.q_learning_table:
             _, max_action = self.find_max_reward_action(game_state, action_list)
             if max_action:
                 return max_action
 
-        i = randint(0, len(action_list) - 1)
+        i = rng.randint(0, len(action_list) - 1)
         return action_list[i]
 
     def find_max_reward_action(self, game_state, available_actions=None):
         """Find the action with the maximum reward for the given game state."""
+        actions = self.q_learning_table[self.table_key(game_state)]
+        if isinstance(actions, ArrayQRow):
+            return actions.max_item(available_actions)
+
         max_reward = float('-inf')
         max_action = None
-        for action, reward in self.q_learning_table[game_state].items():
+        for action, reward in actions.items():
             if available_actions and action not in available_actions:
                 continue
             if reward > max_reward:
@@ -54,15 +113,189 @@ class QLearningPlayer(Player):
 
         return max_reward, max_action
 
-    def update_q_table(self, game_state):
-        """Update the Q-Table based on the game state and last action."""
+    def update_q_table(self, game_state, action_list: list[Action] = None):
+        """
+        Update the Q-Table based on the game state and last action.
+
+        :param action_list: Actions available in the game state, for the experience replay. The actions of its row if None.
+        """
         reward = game_state.calc_value() - self.last_state.calc_value()
         max_potential_reward, _ = self.find_max_reward_action(game_state)
-        current_q_value = self.q_learning_table[self.last_state][self.last_action]
+        last_key = self.table_key(self.last_state)
+        current_q_value = self.q_learning_table[last_key][self.last_action]
 
         updated_q_value = (1 - self.learning_rate) * current_q_value + self.learning_rate * (reward + self.discount_factor * max_potential_reward)
 
-        self.q_learning_table[self.last_state][self.last_action] = updated_q_value
+        self.q_learning_table[last_key][self.last_action] = updated_q_value
+
+        if self.experience is not None:
+            table = self.q_learning_table
+            key = self.table_key(game_state)
+            next_actions = table[key] if action_list is None else action_list
+            self.experience.add(
+                table.intern_state(last_key),
+                table.intern_action(self.last_action),
+                reward,
+                table.intern_state(key),
+                [table.intern_action(action) for action in next_actions],
+            )
+            self.experience.replay(table.values, self.learning_rate, self.discount_factor)
+
+    def memory_tables(self) -> dict:
+        """The tables of the player bounded by the memory budget, including the Q-Table if the player learns."""
+        if not self.learning:
+            return super().memory_tables()
+        return {**super().memory_tables(), 'q_learning_table': self.q_learning_table}
+
+    def protected_keys(self) -> set:
+        """Keys of the states of the current game, with their abstract keys."""
+        protected = super().protected_keys()
+        if self.abstraction is not None:
+            states = [*self.decision_history, self.last_state]
+            protected.update(state_key(self.table_key(state)) for state in states if state is not None)
+        return protected
+
+    def get_learning_delta(self, states) -> dict:
+        """Collect the learning delta including the touched Q-Table rows, none for a shared Q-Table (updated in place)."""
+        delta = super().get_learning_delta(states)
+        if getattr(self.q_learning_table, 'shared', False) or not self.learning:
+            delta['q_learning_table'] = {}
+        else:
+            keys = {self.table_key(state) for state in states if state is not None}
+            delta['q_learning_table'] = {key: dict(self.q_learning_table[key]) for key in keys if key in self.q_learning_table}
+        return delta
+
+    def apply_learning_delta(self, delta: dict):
+        """Merge the learning delta including the touched Q-Table rows."""
+        super().apply_learning_delta(delta)
+        self.q_learning_table.update(delta['q_learning_table'])
+
+
+def play_learning_game(players: list[Player], seed: int = None) -> tuple[list[dict], list[int]]:
+    """
+    Play a learning game and return the learning delta of every player and the action log of the game.
+
+    This is the worker function of the executor-backed GameFarm mode. Only the states the
+    players touched during the game are sent back instead of the whole player tables.
+    """
+    start_states = [player.last_state for player in players]
+
+    game = Game(seed=seed)
+    for player in players:
+        game.add_player(player)
+    game.play()
+
+    deltas = [player.get_learning_delta([start_state, *player.decision_history]) for player, start_state in zip(players, start_states)]
+    return deltas, game.action_log
+
+
+def merge_tables(tables: list, combine: Callable) -> dict:
+    """
+    Merge tables of state -> dict of action -> value.
+
+    The row of the first table having a state is copied, the values of the next ones are combined with it.
+
+    :param combine: Function of the merged value and the value of the next table, e.g. `operator.add` or `max`.
+    """
+    res = {}
+    for table in tables:
+        for state, actions in table.items():
+            if state not in res:
+                res[state] = actions.copy()
+            else:
+                row = res[state]
+                for action, value in actions.items():
+                    if action not in row:
+                        row[action] = value
+                    else:
+                        row[action] = combine(row[action], value)
+    return res
+
+
+def merge_rows(rows: list, combine: Callable) -> dict:
+    """Merge the rows of a single state like `merge_tables`."""
+    res = rows[0].copy()
+    for actions in rows[1:]:
+        for action, value in actions.items():
+            res[action] = combine(res[action], value) if action in res else value
+    return res
+
+
+def _nan_add(merged: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(merged), values, merged + np.nan_to_num(values))
+
+
+# Vectorized combine functions of the sharded merge, NaN marking the missing values
+COLUMN_COMBINE = {operator.add: _nan_add, max: np.fmax}
+
+
+def merge_table_shard(parts: list[tuple[list, np.ndarray, np.ndarray]], combine: Callable) -> tuple[list, np.ndarray, np.ndarray]:
+    """
+    Merge the states of a shard, the worker function of `merge_tables_sharded`.
+
+    :param parts: Per table: the int keys of its states in the shard, the merged columns of its
+        actions having values and the value matrix of these states and columns, NaN where missing.
+    :return: The keys of the merged states, the merged columns having values and the merged matrix.
+    """
+    combine = COLUMN_COMBINE[combine]
+    index = {}
+    rows = [np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=len(keys)) for keys, _, _ in parts]
+    columns = np.unique(np.concatenate([table_columns for _, table_columns, _ in parts]))
+    merged = np.full((len(index), len(columns)), np.nan, dtype=np.float32)
+    for table_rows, (_, table_columns, values) in zip(rows, parts):
+        cells = np.ix_(table_rows, np.searchsorted(columns, table_columns))
+        merged[cells] = combine(merged[cells], values)
+    return list(index), columns, merged
+
+
+def merge_tables_sharded(tables: list[ArrayQTable], combine: Callable, executor: Executor, n_shards: int) -> ArrayQTable:
+    """
+    Merge ArrayQTables like `merge_tables`, with the states partitioned by hash of their keys into shards merged in the executor.
+
+    The workers get the int state keys and the value matrices restricted to the columns having values,
+    not the states nor per-state rows, and the merged matrices are assembled into an ArrayQTable, so
+    no row is copied value by value.
+
+    :param combine: `operator.add` or `max`.
+    """
+    if combine not in COLUMN_COMBINE:
+        raise ValueError('The sharded merge supports operator.add and max')
+    actions = {}
+    for table in tables:
+        for action in table.actions:
+            actions.setdefault(action, len(actions))
+
+    states = {}
+    shards = [[] for _ in range(n_shards)]
+    for table in tables:
+        table_states = list(table.state_ids)
+        keys = [state_key(state) for state in table_states]
+        states.update(zip(keys, table_states))
+        rows = np.fromiter(table.state_ids.values(), dtype=np.int64, count=len(keys))
+        values = table.values[rows, : len(table.actions)]
+        used = np.flatnonzero(~np.isnan(values).all(axis=0))
+        values = values[:, used]
+        columns = np.array([actions[action] for action in table.actions], dtype=np.int64)[used]
+
+        shard_ids = np.fromiter((hash(key) % n_shards for key in keys), dtype=np.int64, count=len(keys))
+        order = np.argsort(shard_ids, kind='stable')
+        bounds = np.searchsorted(shard_ids[order], np.arange(n_shards + 1))
+        for shard, parts in enumerate(shards):
+            selected = order[bounds[shard] : bounds[shard + 1]]
+            parts.append(([keys[i] for i in selected.tolist()], columns, values[selected]))
+
+    merged_keys = []
+    merged_values = np.full((len(states), len(actions)), np.nan, dtype=np.float32)
+    for future in [executor.submit(merge_table_shard, parts, combine) for parts in shards]:
+        keys, columns, values = future.result()
+        merged_values[len(merged_keys) : len(merged_keys) + len(keys), columns] = values
+        merged_keys += keys
+    return ArrayQTable.from_values([states[key] for key in merged_keys], list(actions), merged_values)
+
+
+def seed_from_sequence(seed_sequence: np.random.SeedSequence) -> int:
+    """Draw a 64 bit int seed from a SeedSequence."""
+    return int(seed_sequence.generate_state(1, np.uint64)[0])
 
 
 class GameFarm:
@@ -71,60 +304,249 @@ class GameFarm:
     number_of_players_per_game: int
     players: list[Player]
     game_results = []
+    game_records: list[GameRecord]
+
+    def __init__(
+        self,
+        number_of_players_per_game: int,
+        parallel: int,
+        executor: Executor = None,
+        q_table_factory: Callable = dict,
+        seed: int = None,
+        incremental_merge: bool = False,
+        memory_budget: MemoryBudget = None,
+        record_observations: bool = True,
+        experience_factory: Callable = None,
+        player_factory: Callable = None,
+        abstraction: StateAbstraction = None,
+    ) -> None:
+        """
+        Initialize the GameFarm with the number of players per game and parallel games.
+
+        If `executor` is given (e.g. a `ProcessPoolExecutor`), every game of a `learn` call is
+        played in it and the learning results are merged back into the farm players.
+        `q_table_factory` creates the Q-Table storage of every player (e.g. ArrayQTable).
+
+        With a `seed`, the farm is reproducible: the hyperparameters, the player shuffles and every
+        game get their own random stream spawned from a `numpy.random.SeedSequence`, independent of
+        the process the game is played in. `game_records` then holds the records of the games of
+        the last `learn` call, to rebuild them with `DataBoardGame.replay.replay_game`.
+
+        With `incremental_merge`, the farm keeps the merged tables and tracks the states the games
+        changed: `merge_q_tables` and `merge_best_decision_state` then only re-merge these states and
+        return the kept result (do not modify it).
+
+        To let all the players learn into one table during the games, return the same
+        `DataBoardGame.qstore.SharedQTable` from `q_table_factory`: the games played in the executor
+        update it concurrently and no Q-Table rows are sent back to the farm.
+
+        `memory_budget` and `record_observations` are passed to every player, see `Player`.
 
-    def __init__(self, number_of_players_per_game: int, parallel: int) -> None:
-        """Initialize the GameFarm with the number of players per game and parallel games."""
+        `experience_factory` creates the ExperienceReplay of every player (with an ArrayQTable of the
+        `action_catalog` actions from `q_table_factory`). The buffers refer to the rows of the player
+        tables, so experience replay is not supported with an executor nor with a memory budget. With
+        `incremental_merge`, the states of the rows updated by the replays are re-merged too.
+
+        `player_factory` creates the players instead of the QLearningPlayers, from the random
+        generator of the farm (e.g. a `DataBoardGame.linear.LinearQPlayer`). The merges only cover the
+        players with a Q-Table.
+
+        `abstraction` is passed to every QLearningPlayer, the merged Q-Tables are then keyed by the abstract keys.
+        """
+        if experience_factory is not None and executor is not None:
+            raise ValueError('Experience replay is not supported with an executor')
         self.number_of_players_per_game = number_of_players_per_game
         self.parallel = parallel
+        self.executor = executor
         self.number_of_players = number_of_players_per_game * parallel
         self.players = []
+        self.game_records = []
+
+        self.incremental_merge = incremental_merge
+        self._merged_q_tables = None
+        self._merged_best_decision_state = None
+        # States changed since the last merge of the Q-tables and of the best decision states
+        self._dirty_q_states = set()
+        self._dirty_best_states = set()
+
+        self.seed_sequence = None if seed is None else np.random.SeedSequence(seed)
+        self.rng = None if seed is None else random.Random(seed_from_sequence(self.seed_sequence.spawn(1)[0]))
+        rng = resolve_rng(self.rng)
 
         for _ in range(self.number_of_players):
-            self.players.append(QLearningPlayer(learning_rate=0.8 + random() * 0.1, discount_factor=0.8 + random() * 0.1, random_rate=random() * 0.1))
+            if player_factory is not None:
+                self.players.append(player_factory(rng))
+                continue
+            self.players.append(
+                QLearningPlayer(
+                    learning_rate=0.8 + rng.random() * 0.1,
+                    discount_factor=0.8 + rng.random() * 0.1,
+                    random_rate=rng.random() * 0.1,
+                    q_learning_table=q_table_factory(),
+                    memory_budget=memory_budget,
+                    record_observations=record_observations,
+                    experience=None if experience_factory is None else experience_factory(),
+                    abstraction=abstraction,
+                )
+            )
+            if incremental_merge and getattr(self.players[-1], 'experience', None) is not None:
+                self.players[-1].experience.updated_rows = set()
+
+    def spawn_game_seed(self, players: list[Player]) -> int:
+        """
+        Seed the players of the next game with their own random streams and return the game seed.
+
+        :return: The game seed, None (no seeding) if the farm has no seed.
+        """
+        if self.seed_sequence is None:
+            return None
+        game_sequence, *player_sequences = self.seed_sequence.spawn(1 + len(players))
+        for player, player_sequence in zip(players, player_sequences):
+            player.rng = random.Random(seed_from_sequence(player_sequence))
+        return seed_from_sequence(game_sequence)
 
     def learn(self):
         """Run the learning process for the players."""
-        shuffle(self.players)
+        resolve_rng(self.rng).shuffle(self.players)
         player_chunks = split_list_into_chunks(self.players, self.number_of_players_per_game)
+        seeds = [self.spawn_game_seed(player_chunks[i]) for i in range(self.parallel)]
+        self.game_records = []
 
-        for i in range(self.parallel):
-            self.make_learning(player_chunks[i])
+        if self.executor is None:
+            for i in range(self.parallel):
+                start_states = [player.last_state for player in player_chunks[i]]
+                self.make_learning(player_chunks[i], seeds[i])
+                if self.incremental_merge:
+                    for player, start_state in zip(player_chunks[i], start_states):
+                        self._mark_dirty([start_state, *player.decision_history], player)
+                        self._mark_replayed(player)
+            self._collect_evictions()
+            return
 
-    def make_learning(self, players: list[Player]):
+        futures = [self.executor.submit(play_learning_game, player_chunks[i], seeds[i]) for i in range(self.parallel)]
+        for players, seed, future in zip(player_chunks, seeds, futures):
+            deltas, action_log = future.result()
+            for player, delta in zip(players, deltas):
+                player.apply_learning_delta(delta)
+                if self.incremental_merge:
+                    self._mark_dirty([*delta.get('q_learning_table', ()), *delta['best_decision_state']])
+            if seed is not None:
+                self.game_records.append(GameRecord(seed, len(players), action_log))
+        self._collect_evictions()
+
+    def _collect_evictions(self) -> None:
+        """Mark the states evicted by the memory budgets as changed, so the merged tables drop them."""
+        for player in self.players:
+            if player.evicted_states:
+                if self.incremental_merge:
+                    self._mark_dirty(player.evicted_states)
+                player.evicted_states = set()
+
+    def memory_usage(self) -> dict:
+        """
+        Memory use of the farm players: the `Player.memory_usage` tables summed over the players.
+
+        A table shared by several players is counted once, so are the GameStates ('game_states')
+        held by several tables or players.
+        """
+        usage = {}
+        seen = set()
+        states_seen, seen_states = set(), set()
+        game_states = {'states': 0, 'bytes': 0}
+        for player in self.players:
+            tables = player.usage_tables()
+            for name, table in tables.items():
+                if id(table) in seen:
+                    continue
+                seen.add(id(table))
+                total = usage.setdefault(name, {'states': 0, 'bytes': 0})
+                total['states'] += len(table)
+                total['bytes'] += table_memory(table)
+            player_states = states_memory([*tables.values(), [player.last_state]], states_seen, seen_states)
+            game_states['states'] += player_states['states']
+            game_states['bytes'] += player_states['bytes']
+        usage['game_states'] = game_states
+        usage['bytes'] = sum(total['bytes'] for total in usage.values())
+        return usage
+
+    def _mark_dirty(self, states, player: Player = None) -> None:
+        """Mark the states as changed, `player` maps them to the keys of its Q-Table."""
+        states = [state for state in states if state is not None]
+        if isinstance(player, QLearningPlayer):
+            self._dirty_q_states.update(player.table_key(state) for state in states)
+        else:
+            self._dirty_q_states.update(states)
+        self._dirty_best_states.update(states)
+
+    def _mark_replayed(self, player: Player) -> None:
+        """Mark the Q-Table states whose rows the experience replay of the player updated as changed."""
+        experience = getattr(player, 'experience', None)
+        if experience is not None and experience.updated_rows:
+            states = player.q_learning_table.states
+            self._dirty_q_states.update(states[row] for row in experience.updated_rows)
+            experience.updated_rows = set()
+
+    def make_learning(self, players: list[Player], seed: int = None):
         """Run a learning game for the given list of players."""
-        game = Game()
+        game = Game(seed=seed)
 
         for player in players:
             game.add_player(player)
 
         game.play()
+        if seed is not None:
+            self.game_records.append(GameRecord.from_game(game))
 
-    def merge_q_tables(self) -> dict:
-        """Merge the Q-tables of all players."""
-        res = {}
-        for player in self.players:
-            for state, actions in player.q_learning_table.items():
-                if state not in res:
-                    res[state] = actions.copy()
-                else:
-                    for action, value in actions.items():
-                        if action not in res[state]:
-                            res[state][action] = value
-                        else:
-                            res[state][action] += value
-        return res
+    def merge_q_tables(self, executor: Executor = None, n_shards: int = None) -> dict:
+        """
+        Merge the Q-tables of all players, summing the values of the same state and action.
+
+        :param executor: Merge the ArrayQTables of the players with `merge_tables_sharded` in this
+            executor (e.g. a `ProcessPoolExecutor`), in `n_shards` shards (the number of tables by
+            default). The result is then an ArrayQTable. Other tables are merged with `merge_tables`.
+        """
+        # A table shared by several players is merged once
+        tables = list({id(player.q_learning_table): player.q_learning_table for player in self.players if hasattr(player, 'q_learning_table')}.values())
+        # The states updated in a shared table are not sent back, it is merged whole
+        if not self.incremental_merge or any(getattr(table, 'shared', False) for table in tables):
+            return self._merge_q(tables, executor, n_shards)
+
+        if self._merged_q_tables is None:
+            self._merged_q_tables = self._merge_q(tables, executor, n_shards)
+        else:
+            self._update_merged(self._merged_q_tables, tables, self._dirty_q_states, operator.add)
+        self._dirty_q_states = set()
+        return self._merged_q_tables
 
     def merge_best_decision_state(self) -> dict:
-        """Merge the best decision states of all players."""
-        res = {}
-        for player in self.players:
-            for state, actions in player.best_decision_state.items():
-                if state not in res:
-                    res[state] = actions.copy()
-                else:
-                    for action, value in actions.items():
-                        if action not in res[state]:
-                            res[state][action] = value
-                        else:
-                            res[state][action] = max(res[state][action], value)
-        return res
+        """
+        Merge the best decision states of all players, keeping the max value of the same state and action.
+
+        The best decision states are dicts, merged with `merge_tables`: `merge_tables_sharded` needs ArrayQTables.
+        """
+        tables = [player.best_decision_state for player in self.players]
+        if not self.incremental_merge:
+            return merge_tables(tables, max)
+
+        if self._merged_best_decision_state is None:
+            self._merged_best_decision_state = merge_tables(tables, max)
+        else:
+            self._update_merged(self._merged_best_decision_state, tables, self._dirty_best_states, max)
+        self._dirty_best_states = set()
+        return self._merged_best_decision_state
+
+    @staticmethod
+    def _merge_q(tables: list, executor: Executor, n_shards: int):
+        if executor is None or not tables or not all(isinstance(table, ArrayQTable) for table in tables):
+            return merge_tables(tables, operator.add)
+        return merge_tables_sharded(tables, operator.add, executor, n_shards or len(tables))
+
+    @staticmethod
+    def _update_merged(merged: dict, tables: list, states: set, combine: Callable) -> None:
+        """Re-merge the rows of `states` into `merged`."""
+        for state in states:
+            rows = [table[state] for table in tables if state in table]
+            if rows:
+                merged[state] = merge_rows(rows, combine)
+            else:
+                merged.pop(state, None)
@@ -0,0 +1,148 @@
+"""
+Batched decisions across concurrent games.
+
+`play_batched_games` runs many games side by side as resumable generators (`Game.turn_steps`).
+Each game pauses at its decision points. The decisions of the `BatchedPlayer`s are collected over
+all the paused games and handed to their `BatchPolicy` in one `decide_batch` call per policy, then
+the chosen actions are sent back to their games. The other players of the games decide
+synchronously as in `Game.play`.
+
+`ModelPolicy` scores every (state, available action) pair of a batch with one call of a model
+trained on the exported features (`DataBoardGame.export`), e.g. the `predict` of a scikit-learn
+regressor.
+"""
+
+from typing import Callable
+import numpy as np
+from DataBoardGame.export import ACTION_COLUMNS, StateKeyLayout, action_feature_table, feature_columns, state_columns
+from DataBoardGame.game import Action, Game, GameState, Player
+
+
+class BatchPolicy:
+    """Policy choosing the actions of many decisions at once."""
+
+    def decide_batch(self, states: list[GameState], action_lists: list[list[Action]]) -> list[Action]:
+        """
+        Choose an action for every decision.
+
+        :param states: States of the deciding players.
+        :param action_lists: Available actions of every decision.
+        :return: The chosen action of every decision, in order.
+        """
+        raise NotImplementedError()
+
+
+class ModelPolicy(BatchPolicy):
+    """Policy taking the action with the highest score of a model over the exported feature columns."""
+
+    def __init__(self, predict: Callable, columns: list[str] = None) -> None:
+        """
+        :param predict: Function of a (rows, columns) float array returning the score of every row.
+        :param columns: Feature columns of the rows, in order. All the state and action feature
+            columns of the export by default.
+        """
+        self.layout = StateKeyLayout()
+        self.actions = action_feature_table()
+        self.predict = predict
+        self.columns = columns or [name for name, _ in state_columns(self.layout) + ACTION_COLUMNS]
+
+    def features(self, states: list[GameState], action_lists: list[list[Action]]) -> np.ndarray:
+        """Feature matrix of every (state, available action) pair, the pairs of a state in a row block."""
+        keys = [state.key for state, actions in zip(states, action_lists) for _ in actions]
+        action_ids = [action.action_id for actions in action_lists for action in actions]
+        features = feature_columns(keys, action_ids, self.layout, self.actions)
+        return np.column_stack([features[name] for name in self.columns]).astype(np.float64)
+
+    def decide_batch(self, states: list[GameState], action_lists: list[list[Action]]) -> list[Action]:
+        scores = np.asarray(self.predict(self.features(states, action_lists)), dtype=np.float64).reshape(-1)
+        decisions = []
+        start = 0
+        for actions in action_lists:
+            decisions.append(actions[int(np.argmax(scores[start : start + len(actions)]))])
+            start += len(actions)
+        return decisions
+
+
+class BatchedPlayer(Player):
+    """
+    Player deciding with a BatchPolicy.
+
+    In `play_batched_games` its decisions are batched with the ones of the other games; in a plain
+    `Game.play` it asks the policy for a batch of one decision.
+    """
+
+    def __init__(self, policy: BatchPolicy, **kwargs) -> None:
+        """:param kwargs: See `Player`."""
+        super().__init__(**kwargs)
+        self.policy = policy
+        self._decided = None
+
+    def decision(self, game_state, action_list: list[Action]) -> Action:
+        if self._decided is not None:
+            action, self._decided = self._decided, None
+            return action
+        return self.policy.decide_batch([game_state], [action_list])[0]
+
+    def make_batched_decision(self, game_state, action_list: list[Action], action: Action) -> Action:
+        """Record the decision taken by the policy for a batch like a decision of `make_decision`."""
+        self._decided = action
+        return self.make_decision(game_state, action_list)
+
+
+def play_batched_games(games: list[Game], max_batch: int = 1024) -> list[Game]:
+    """
+    Play the games, batching the decisions of their BatchedPlayers.
+
+    :param games: Games with their players added, not started.
+    :param max_batch: Maximum number of decisions per `decide_batch` call.
+    :return: The finished games.
+    """
+    # Index of the game -> its running turn and its pending decision (player, state, actions)
+    turns = {}
+    pending = {}
+
+    def advance(index: int, decision: Action = None) -> None:
+        """Run the game until a BatchedPlayer decides or the game is over."""
+        game = games[index]
+        turn = turns.get(index)
+        while True:
+            try:
+                if turn is None:
+                    if game.is_game_over():
+                        game.post_game_init()
+                        turns.pop(index, None)
+                        return
+                    turn = game.turn_steps()
+                    player, actions = next(turn)
+                else:
+                    player, actions = turn.send(decision)
+            except StopIteration:
+                turn = None
+                continue
+
+            if isinstance(player, BatchedPlayer):
+                turns[index] = turn
+                pending[index] = (player, game.get_player_state(player), actions)
+                return
+            decision = game.decide(player, actions)
+
+    for index, game in enumerate(games):
+        game.pre_game_init()
+        advance(index)
+
+    while pending:
+        # Decisions grouped by policy, at most `max_batch` per call
+        by_policy = {}
+        for index, (player, _, _) in pending.items():
+            indexes = by_policy.setdefault(id(player.policy), [])
+            if len(indexes) < max_batch:
+                indexes.append(index)
+
+        for indexes in by_policy.values():
+            requests = [pending.pop(index) for index in indexes]
+            policy = requests[0][0].policy
+            decisions = policy.decide_batch([state for _, state, _ in requests], [actions for _, _, actions in requests])
+            for index, (player, state, actions), action in zip(indexes, requests, decisions):
+                advance(index, player.make_batched_decision(state, actions, action))
+
+    return games
@@ -0,0 +1,171 @@
+"""
+Q-Learning with linear function approximation.
+
+`LinearQPlayer` approximates Q(s, a) = w[type of a] . x(s, a) instead of keeping a table of the
+visited states. The feature vector x(s, a) has a fixed length: the state part (`StateFeatures`)
+summarizes the resources, the last generated resource, the employees per role, the salary and the
+open cards; the action part encodes the generated resource, the hire or fire role and the salary
+of the card. Every action type (`ACTION_TYPES` of `DataBoardGame.export`) has its own weights, so
+the memory of a player stays the same however many games it plays.
+"""
+
+import random
+import numpy as np
+from DataBoardGame import globalvars as glb
+from DataBoardGame.board import PlayerBoard
+from DataBoardGame.game import Action, GameState, Player
+from DataBoardGame.export import ACTION_TYPES
+from DataBoardGame.resources import ResourceType
+from DataBoardGame.utils import resolve_rng
+
+# Scale of the resource counts, so that the features are of the order of 1
+RESOURCE_SCALE = 10.0
+
+
+def _card_salary(card) -> float:
+    return card.salary.requirement[ResourceType.money]
+
+
+class StateFeatures:
+    """Fixed-length feature vectors of the (state, action) pairs."""
+
+    roles = list(PlayerBoard.employees_limits)
+
+    def __init__(self) -> None:
+        self.state_size = 2 * len(ResourceType) + 2 * len(self.roles) + 3
+        self.action_size = len(ResourceType) + 2 * len(self.roles) + 1
+        # Bias, state features, action features
+        self.size = 1 + self.state_size + self.action_size
+
+    def state_vector(self, game_state: GameState) -> np.ndarray:
+        """Features of the state: resources, last generated resource, employees and salary, open cards."""
+        board = game_state.player_board
+        x = np.zeros(self.state_size)
+        n = len(ResourceType)
+        x[:n] = board.resources.values
+        x[:n] /= RESOURCE_SCALE
+        x[ResourceType.money] = board.resources.money / glb.MONEY_TO_STOP
+        if board.last_generated_resource is not None:
+            x[n + board.last_generated_resource] = 1
+        offset = 2 * n
+        for index, role in enumerate(self.roles):
+            x[offset + index] = len(board.employees[role]) / board.employees_limits[role]
+        offset += len(self.roles)
+        x[offset] = board.calc_salary().requirement[ResourceType.money] / RESOURCE_SCALE
+        offset += 1
+
+        open_cards = game_state.game_board.employee_deck.open_cards
+        for card in open_cards:
+            if card.role in self.roles:
+                x[offset + self.roles.index(card.role)] += 1 / glb.MAX_EMPLOYEE_OPEN_CARDS
+        offset += len(self.roles)
+        if open_cards:
+            x[offset] = sum(_card_salary(card) for card in open_cards) / len(open_cards)
+            x[offset + 1] = min(_card_salary(card) for card in open_cards)
+        return x
+
+    def action_vector(self, action: Action) -> np.ndarray:
+        """Features of the action: the generated resource, the role of the hire or fire, the role and salary of the card."""
+        x = np.zeros(self.action_size)
+        params = action.params
+        if 'resource_type' in params:
+            x[params['resource_type']] = 1
+        offset = len(ResourceType)
+        if 'role' in params and params['role'] in self.roles:
+            x[offset + self.roles.index(params['role'])] = 1
+        offset += len(self.roles)
+        if 'employee' in params:
+            card = params['employee']
+            if card.role in self.roles:
+                x[offset + self.roles.index(card.role)] = 1
+            x[offset + len(self.roles)] = _card_salary(card)
+        return x
+
+    def matrix(self, game_state: GameState, action_list: list[Action]) -> np.ndarray:
+        """Feature matrix with a row per action of `action_list`."""
+        x = np.empty((len(action_list), self.size))
+        x[:, 0] = 1
+        x[:, 1 : 1 + self.state_size] = self.state_vector(game_state)
+        for row, action in enumerate(action_list):
+            x[row, 1 + self.state_size :] = self.action_vector(action)
+        return x
+
+
+def action_type_ids(action_list: list[Action]) -> np.ndarray:
+    return np.array([ACTION_TYPES.index(type(action)) for action in action_list], dtype=np.int64)
+
+
+class LinearQPlayer(Player):
+    """Q-Learning player over a linear model of the (state, action) features, one weight vector per action type."""
+
+    def __init__(self, learning_rate: float, discount_factor: float, random_rate: float, rng: random.Random = None, **kwargs) -> None:
+        """
+        :param learning_rate: Step of the normalized (by the squared norm of the features) gradient update.
+        :param kwargs: See `Player`. The decision history is not recorded by default, to keep the memory constant.
+        """
+        kwargs.setdefault('record_history', False)
+        super().__init__(rng, **kwargs)
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.random_rate = random_rate
+        self.features = StateFeatures()
+        self.weights = np.zeros((len(ACTION_TYPES), self.features.size))
+        # Features and action type of the last decision
+        self.last_features = None
+        self.last_type = None
+
+    def pre_game_init(self):
+        """Forget the last decision of the previous game, so that its features are not updated with the rewards of the new one."""
+        super().pre_game_init()
+        self.last_state = None
+        self.last_action = None
+        self.last_features = None
+        self.last_type = None
+
+    def q_values(self, game_state: GameState, action_list: list[Action]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the feature matrix, the action types and the Q-values of the actions."""
+        x = self.features.matrix(game_state, action_list)
+        types = action_type_ids(action_list)
+        return x, types, np.einsum('ij,ij->i', x, self.weights[types])
+
+    def decision(self, game_state, action_list: list[Action]) -> Action:
+        x, types, values = self.q_values(game_state, action_list)
+
+        if self.last_features is not None and self.last_state != game_state:
+            reward = game_state.calc_value() - self.last_state.calc_value()
+            self.update_weights(reward, values.max())
+
+        rng = resolve_rng(self.rng)
+        if rng.random() < (1 - self.random_rate):
+            i = int(np.argmax(values))
+        else:
+            i = rng.randint(0, len(action_list) - 1)
+        self.last_features = x[i]
+        self.last_type = types[i]
+        return action_list[i]
+
+    def update_weights(self, reward: float, max_next_value: float) -> None:
+        """Move the weights of the last action type toward the Q-Learning target."""
+        weights = self.weights[self.last_type]
+        error = reward + self.discount_factor * max_next_value - weights @ self.last_features
+        weights += self.learning_rate * error * self.last_features / (self.last_features @ self.last_features)
+
+    def get_learning_delta(self, states) -> dict:
+        """Collect the learning delta including the weights."""
+        delta = super().get_learning_delta(states)
+        delta['weights'] = self.weights
+        delta['last_features'] = self.last_features
+        delta['last_type'] = self.last_type
+        return delta
+
+    def apply_learning_delta(self, delta: dict):
+        """Merge the learning delta: the weights learned in the worker replace the player weights."""
+        super().apply_learning_delta(delta)
+        self.weights = delta['weights']
+        self.last_features = delta['last_features']
+        self.last_type = delta['last_type']
+
+
+def average_weights(players: list[Player]) -> np.ndarray:
+    """Mean of the weights of the LinearQPlayers, e.g. of the players of a GameFarm."""
+    return np.mean([player.weights for player in players if isinstance(player, LinearQPlayer)], axis=0)
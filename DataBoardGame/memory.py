@@ -0,0 +1,147 @@
+"""
+Memory budgets of the player histories.
+
+A `MemoryBudget` caps the number of states a player keeps in each of its tables
+(`best_decision_state`, `observation_history`, the Q-Table of a `QLearningPlayer`). When a table
+grows over the budget at the end of a game, the states chosen by the `EvictionPolicy` are dropped
+until it is back to `(1 - slack) * max_states` states:
+
+- lru: the states visited least recently,
+- least_visited: the states visited the least times (least recently first among equals),
+- zero_value: the states whose values are all zero, then the least recently visited ones.
+
+The visits are tracked by state key in `Player.visits`, in the order of the last visit.
+
+`table_memory` estimates the bytes of the tables without the GameState objects they are keyed by,
+which the tables of a player share; `states_memory` counts the distinct GameStates of the tables
+(with their board snapshots) once.
+"""
+
+from enum import IntEnum
+import sys
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+import numpy as np
+
+EvictionPolicy = IntEnum('EvictionPolicy', 'lru least_visited zero_value', start=0)
+
+
+def state_key(state):
+    """Key of a state in `Player.visits`: the packed key of a GameState, the state itself otherwise (e.g. an int key)."""
+    return getattr(state, 'key', state)
+
+
+def _is_zero_row(row) -> bool:
+    return all(value == 0 for value in row.values())
+
+
+class MemoryBudget:
+    """Maximum number of states per player table and the eviction policy."""
+
+    max_states: int
+    policy: EvictionPolicy
+    slack: float
+
+    def __init__(self, max_states: int, policy: EvictionPolicy = EvictionPolicy.lru, slack: float = 0.1) -> None:
+        """
+        :param max_states: Maximum number of states of every table.
+        :param policy: Order in which the states are evicted.
+        :param slack: Fraction of `max_states` freed by an eviction, so that it does not run after every game.
+        """
+        if max_states < 1:
+            raise ValueError('max_states must be positive')
+        self.max_states = max_states
+        self.policy = policy
+        self.slack = slack
+
+    def select_evictions(self, table, visits: dict, protected: set) -> list:
+        """
+        Choose the states to evict from a table.
+
+        :param table: Mapping of state -> row of values.
+        :param visits: State key -> visit count, ordered from the least to the most recent visit.
+        :param protected: State keys that must be kept (e.g. the states of the current game).
+        :return: The states to delete, empty if the table is within the budget.
+        """
+        if len(table) <= self.max_states:
+            return []
+        n_evictions = len(table) - int(self.max_states * (1 - self.slack))
+
+        recency = {key: index for index, key in enumerate(visits)}
+        candidates = [state for state in table if state_key(state) not in protected]
+        # States never visited (e.g. merged from another player) are the least recent ones
+        candidates.sort(key=lambda state: recency.get(state_key(state), -1))
+        if self.policy == EvictionPolicy.least_visited:
+            candidates.sort(key=lambda state: visits.get(state_key(state), 0))
+        elif self.policy == EvictionPolicy.zero_value:
+            candidates.sort(key=lambda state: not _is_zero_row(table[state]))
+        return candidates[:n_evictions]
+
+    def to_dict(self):
+        return {'max_states': self.max_states, 'policy': self.policy.name, 'slack': self.slack}
+
+
+def table_memory(table) -> int:
+    """
+    Approximate number of bytes of a table of state -> row.
+
+    Counts the containers, the values and the value arrays, not the GameState objects, see `states_memory`.
+    """
+    values = getattr(table, 'values', None)
+    if isinstance(values, np.ndarray):
+        return values.nbytes + sum(sys.getsizeof(value) for value in table.__dict__.values() if isinstance(value, (dict, list)))
+    size = sys.getsizeof(table)
+    if isinstance(table, dict):
+        for row in table.values():
+            size += sys.getsizeof(row)
+            if isinstance(row, dict):
+                size += sum(sys.getsizeof(value) for value in row.values())
+    return size
+
+
+def object_memory(obj, seen: set) -> int:
+    """
+    Approximate number of bytes of an object and of the objects it references.
+
+    :param seen: Ids of the objects already counted, updated. The objects shared with them (e.g. the
+        cards of the board snapshots) are counted once.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float, np.ndarray)):
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                stack.extend(getattr(obj, name) for name in getattr(cls, '__slots__', ()) if hasattr(obj, name))
+    return size
+
+
+def states_memory(tables, seen: set = None, seen_states: set = None) -> dict:
+    """
+    Number and approximate bytes of the distinct GameState objects of the tables, with their board snapshots.
+
+    :param tables: Mappings keyed by the states and lists of states. Int state keys are not counted.
+    :param seen: Ids of the objects already counted, see `object_memory`.
+    :param seen_states: Ids of the states already counted, updated, to count the states of several players once.
+    """
+    seen = set() if seen is None else seen
+    seen_states = set() if seen_states is None else seen_states
+    usage = {'states': 0, 'bytes': 0}
+    for table in tables:
+        for state in table:
+            if state is None or state_key(state) is state or id(state) in seen_states:
+                continue
+            seen_states.add(id(state))
+            usage['states'] += 1
+            usage['bytes'] += object_memory(state, seen)
+    return usage
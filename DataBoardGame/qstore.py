@@ -0,0 +1,380 @@
+"""
+Memory-mapped on-disk Q-Table store.
+
+`MmapQTable` keeps the Q-values in a single file: a header, an open-addressing hash index of the packed
+state keys (`GameState.key`) and a float32 matrix of the values indexed by (slot, action id). Opening
+a store only maps the file, so a table of a previous run is available in milliseconds and several
+processes can read it without copying.
+
+It behaves like the `ArrayQTable` used by `QLearningPlayer` (the rows are `ArrayQRow` views, the
+columns are the `action_catalog` action ids), but the states are only stored as their keys: iterating
+a store yields int state keys, not GameState objects.
+
+Modes of `MmapQTable.open`:
+
+- 'r': read-only, any write raises ValueError. A `QLearningPlayer` over it plays without learning,
+- 'c': copy-on-write, the table can be updated (e.g. by a learning player) but the file is not changed,
+- 'r+': read-write, updates are written to the file. A store has a single writer at a time.
+"""
+
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import os
+import tempfile
+import numpy as np
+from DataBoardGame.board import GameBoard, PlayerBoard
+from DataBoardGame.game import GameState, action_catalog
+from DataBoardGame.qtable import ArrayQRow
+
+try:
+    import fcntl
+except ImportError:
+    # No inter-process insert lock (e.g. on Windows): SharedQTable is not available, MmapQTable is
+    fcntl = None
+
+MAGIC = b'DBGQTAB1'
+HEADER_SIZE = 64
+# Slot states of the index
+EMPTY, USED, DELETED = 0, 1, 2
+MAX_LOAD_FACTOR = 0.7
+
+
+def state_key_bytes() -> int:
+    """Number of bytes of a packed state key."""
+    return (PlayerBoard.key_bits + GameBoard().key_bits + 7) // 8
+
+
+def _align(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+def _layout(capacity: int, key_bytes: int, n_actions: int) -> tuple[int, int, int, int]:
+    """Offsets of the slot states, keys and values and the total file size."""
+    slots_offset = HEADER_SIZE
+    keys_offset = slots_offset + _align(capacity)
+    values_offset = keys_offset + _align(capacity * key_bytes)
+    return slots_offset, keys_offset, values_offset, values_offset + capacity * n_actions * 4
+
+
+def _table_shape(capacity: int, n_actions: int = None, key_bytes: int = None) -> tuple[int, int, int]:
+    """Capacity rounded up to a power of two, number of actions and key size with their defaults."""
+    capacity = 1 << max(capacity - 1, 1).bit_length()
+    n_actions = len(action_catalog) if n_actions is None else n_actions
+    key_bytes = state_key_bytes() if key_bytes is None else key_bytes
+    return capacity, n_actions, key_bytes
+
+
+def _state_key(state) -> int:
+    return state.key if isinstance(state, GameState) else state
+
+
+class MmapQTable(MutableMapping):
+    """Q-Table of state key -> ArrayQRow of action -> value, stored in a memory-mapped file."""
+
+    def __init__(self, buffer: np.ndarray, path: str = None, mode: str = 'r+') -> None:
+        """Use `create` or `open` to get a store."""
+        self.path = path
+        self.mode = mode
+        self.readonly = mode == 'r'
+        self._attach(buffer)
+
+        # ArrayQRow interface: the columns are the action ids of the catalog
+        self.actions = action_catalog.actions[: self.n_actions]
+        self.action_ids = action_catalog.action_ids
+
+    def _attach(self, buffer: np.ndarray) -> None:
+        if bytes(buffer[:8]) != MAGIC:
+            raise ValueError('Not a Q-Table store')
+        self._buffer = buffer
+        self.header = buffer[:HEADER_SIZE].view(np.uint64)
+        self.capacity, self.key_bytes, self.n_actions = (int(value) for value in self.header[2:5])
+        slots_offset, keys_offset, values_offset, size = _layout(self.capacity, self.key_bytes, self.n_actions)
+        self.slots = buffer[slots_offset : slots_offset + self.capacity]
+        self.keys = buffer[keys_offset : keys_offset + self.capacity * self.key_bytes].reshape(self.capacity, self.key_bytes)
+        self.values = buffer[values_offset:size].view(np.float32).reshape(self.capacity, self.n_actions)
+
+    @staticmethod
+    def _init_buffer(buffer: np.ndarray, capacity: int, key_bytes: int, n_actions: int) -> np.ndarray:
+        """Write the header and an empty index and value matrix to a zeroed buffer of `_layout(...)[3]` bytes."""
+        buffer[:8] = np.frombuffer(MAGIC, dtype=np.uint8)
+        header = buffer[:HEADER_SIZE].view(np.uint64)
+        header[1] = 0
+        header[2:5] = (capacity, key_bytes, n_actions)
+        _, _, values_offset, size = _layout(capacity, key_bytes, n_actions)
+        buffer[values_offset:size].view(np.float32)[:] = np.nan
+        return buffer
+
+    @classmethod
+    def _new_buffer(cls, capacity: int, key_bytes: int, n_actions: int, path: str = None) -> np.ndarray:
+        size = _layout(capacity, key_bytes, n_actions)[3]
+        if path is None:
+            buffer = np.zeros(size, dtype=np.uint8)
+        else:
+            with open(path, 'wb') as file:
+                file.truncate(size)
+            buffer = np.memmap(path, dtype=np.uint8, mode='r+')
+        return cls._init_buffer(buffer, capacity, key_bytes, n_actions)
+
+    @classmethod
+    def create(cls, path: str = None, capacity: int = 1024, n_actions: int = None, key_bytes: int = None) -> 'MmapQTable':
+        """
+        Create an empty store.
+
+        :param path: File of the store, overwritten if it exists. The store is kept in memory if None.
+        :param capacity: Initial number of slots, rounded up to a power of two. The store grows (doubling) when it fills up.
+        :param n_actions: Number of action ids, `len(action_catalog)` by default.
+        :param key_bytes: Size of the packed state keys, `state_key_bytes()` by default.
+        """
+        capacity, n_actions, key_bytes = _table_shape(capacity, n_actions, key_bytes)
+        return cls(cls._new_buffer(capacity, key_bytes, n_actions, path), path, 'r+' if path is not None else 'c')
+
+    @classmethod
+    def open(cls, path: str, mode: str = 'r') -> 'MmapQTable':
+        """Map an existing store, see the module docstring for the modes."""
+        if mode not in ('r', 'c', 'r+'):
+            raise ValueError(f'Unsupported mode {mode!r}')
+        return cls(np.memmap(path, dtype=np.uint8, mode=mode), path, mode)
+
+    def flush(self) -> None:
+        """Write the changes of a read-write store to the file."""
+        if self.mode == 'r+' and isinstance(self._buffer, np.memmap):
+            self._buffer.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._buffer = self.header = self.slots = self.keys = self.values = None
+
+    def __getstate__(self):
+        """Pickle a file store as its path, reopened copy-on-write (a store has a single writer)."""
+        if self.path is not None and self.mode != 'c':
+            self.flush()
+            return {'path': self.path, 'mode': 'r' if self.readonly else 'c'}
+        return {'path': None, 'mode': 'c', 'buffer': np.array(self._buffer)}
+
+    def __setstate__(self, state):
+        buffer = np.memmap(state['path'], dtype=np.uint8, mode=state['mode']) if state['path'] is not None else state['buffer']
+        self.__init__(buffer, state['path'], state['mode'])
+
+    def _find(self, key_bytes: bytes, key: int) -> tuple[int, bool]:
+        """Return the slot of the key and True, or the slot to insert it to and False."""
+        mask = self.capacity - 1
+        slot = hash(key) & mask
+        insert_slot = None
+        slots, keys = self.slots, self.keys
+        while True:
+            state = slots[slot]
+            if state == EMPTY:
+                return (slot if insert_slot is None else insert_slot), False
+            if state == DELETED:
+                if insert_slot is None:
+                    insert_slot = slot
+            elif keys[slot].tobytes() == key_bytes:
+                return slot, True
+            slot = (slot + 1) & mask
+
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise ValueError('The Q-Table store is opened read-only')
+
+    def _grow(self) -> None:
+        """Double the capacity and reinsert all the states."""
+        used = np.flatnonzero(self.slots == USED)
+        keys = self.keys[used].copy()
+        values = self.values[used].copy()
+        capacity = self.capacity * 2
+
+        if self.mode == 'r+':
+            path = self.path + '.grow'
+            buffer = self._new_buffer(capacity, self.key_bytes, self.n_actions, path)
+        else:
+            buffer = self._new_buffer(capacity, self.key_bytes, self.n_actions)
+
+        old_buffer = self._buffer
+        self._attach(buffer)
+        for key_row, value_row in zip(keys, values):
+            key_bytes = key_row.tobytes()
+            slot, _ = self._find(key_bytes, int.from_bytes(key_bytes, 'little'))
+            self.slots[slot] = USED
+            self.keys[slot] = key_row
+            self.values[slot] = value_row
+        self.header[1] = len(used)
+
+        if self.mode == 'r+':
+            buffer.flush()
+            del old_buffer
+            os.replace(path, self.path)
+            self._attach(np.memmap(self.path, dtype=np.uint8, mode='r+'))
+
+    def intern_state(self, state) -> int:
+        """Return the slot of the state, adding an empty row if it is new."""
+        key = _state_key(state)
+        key_bytes = key.to_bytes(self.key_bytes, 'little')
+        slot, found = self._find(key_bytes, key)
+        if found:
+            return slot
+
+        self._check_writable()
+        if (int(self.header[1]) + 1) > MAX_LOAD_FACTOR * self.capacity:
+            self._grow()
+            slot, _ = self._find(key_bytes, key)
+        self.slots[slot] = USED
+        self.keys[slot] = np.frombuffer(key_bytes, dtype=np.uint8)
+        self.values[slot] = np.nan
+        self.header[1] += 1
+        return slot
+
+    def intern_action(self, action) -> int:
+        """Return the column of the action: its action id."""
+        column = action if isinstance(action, int) else self.action_ids[action]
+        if column >= self.n_actions:
+            raise KeyError(action)
+        return column
+
+    def __getitem__(self, state) -> ArrayQRow:
+        key = _state_key(state)
+        slot, found = self._find(key.to_bytes(self.key_bytes, 'little'), key)
+        if not found:
+            raise KeyError(state)
+        return ArrayQRow(self, slot)
+
+    def __setitem__(self, state, actions) -> None:
+        items = list(actions.items())
+        slot = self.intern_state(state)
+        self.values[slot] = np.nan
+        for action, value in items:
+            self.values[slot, self.intern_action(action)] = value
+
+    def __delitem__(self, state) -> None:
+        self._check_writable()
+        key = _state_key(state)
+        slot, found = self._find(key.to_bytes(self.key_bytes, 'little'), key)
+        if not found:
+            raise KeyError(state)
+        self.slots[slot] = DELETED
+        self.values[slot] = np.nan
+        self.header[1] -= 1
+
+    def __contains__(self, state) -> bool:
+        key = _state_key(state)
+        return self._find(key.to_bytes(self.key_bytes, 'little'), key)[1]
+
+    def __iter__(self):
+        for slot in np.flatnonzero(self.slots == USED):
+            yield int.from_bytes(self.keys[slot].tobytes(), 'little')
+
+    def __len__(self) -> int:
+        return int(self.header[1])
+
+
+class SharedQTable(MmapQTable):
+    """
+    Q-Table in a `multiprocessing.shared_memory` block, updated concurrently by the learners of several processes.
+
+    Values are read and written without locks (Hogwild): concurrent updates of the same entry may be
+    lost, which the Q-Learning updates tolerate. New states are inserted into the shared open-addressing
+    index under an inter-process lock (a `fcntl` lock on a lock file, so the table can be pickled to
+    executor workers). The capacity is fixed, inserting into a full table raises ValueError.
+    States cannot be deleted.
+
+    The creating process owns the block: call `unlink` there once all the processes are done. The
+    processes started by `multiprocessing` share its resource tracker, which frees the block if the
+    creating process dies without unlinking it. It needs `fcntl` (POSIX).
+    """
+
+    # Players sharing the table do not send their rows back from the workers
+    shared = True
+
+    def __init__(self, shm: shared_memory.SharedMemory, lock_path: str) -> None:
+        """Use `create` to get a table."""
+        if fcntl is None:
+            raise NotImplementedError('SharedQTable needs fcntl file locks')
+        self.shm = shm
+        self.lock_path = lock_path
+        self._lock_file = None
+        super().__init__(np.ndarray(shm.size, dtype=np.uint8, buffer=shm.buf), None, 'r+')
+
+    @classmethod
+    def create(cls, capacity: int, n_actions: int = None, key_bytes: int = None) -> 'SharedQTable':
+        """
+        Create an empty shared table.
+
+        :param capacity: Number of slots, rounded up to a power of two. At most `MAX_LOAD_FACTOR` of them
+            can be used. The table takes `capacity * n_actions * 4` bytes of values, e.g. 1.6 GB for 2^20
+            slots of the `action_catalog` actions.
+        """
+        capacity, n_actions, key_bytes = _table_shape(capacity, n_actions, key_bytes)
+        shm = shared_memory.SharedMemory(create=True, size=_layout(capacity, key_bytes, n_actions)[3])
+        cls._init_buffer(np.ndarray(shm.size, dtype=np.uint8, buffer=shm.buf), capacity, key_bytes, n_actions)
+        fd, lock_path = tempfile.mkstemp(prefix='dbg-qtable-', suffix='.lock')
+        os.close(fd)
+        return cls(shm, lock_path)
+
+    def __getstate__(self):
+        return {'name': self.shm.name, 'lock_path': self.lock_path}
+
+    def __setstate__(self, state):
+        # Attaching registers the block again to the resource tracker shared with the creating process, a no-op
+        self.__init__(shared_memory.SharedMemory(name=state['name']), state['lock_path'])
+
+    @contextmanager
+    def _insert_lock(self):
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'r+b')
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+
+    def intern_state(self, state) -> int:
+        """Return the slot of the state, adding an empty row if it is new."""
+        key = _state_key(state)
+        key_bytes = key.to_bytes(self.key_bytes, 'little')
+        slot, found = self._find(key_bytes, key)
+        if found:
+            return slot
+
+        with self._insert_lock():
+            # Another process may have inserted it since the lookup
+            slot, found = self._find(key_bytes, key)
+            if found:
+                return slot
+            if int(self.header[1]) + 1 > MAX_LOAD_FACTOR * self.capacity:
+                raise ValueError('The shared Q-Table is full')
+            # The key and the values are written before the slot is marked used for the lock-free readers
+            self.keys[slot] = np.frombuffer(key_bytes, dtype=np.uint8)
+            self.values[slot] = np.nan
+            self.slots[slot] = USED
+            self.header[1] += 1
+        return slot
+
+    def __setitem__(self, state, actions) -> None:
+        """
+        Set the values of the actions.
+
+        The row of a new state is initialised by `intern_state`. The other values of an existing row are
+        kept, another learner may be updating them.
+        """
+        items = list(actions.items())
+        slot = self.intern_state(state)
+        for action, value in items:
+            self.values[slot, self.intern_action(action)] = value
+
+    def __delitem__(self, state) -> None:
+        raise ValueError('States cannot be deleted from a shared Q-Table')
+
+    def close(self) -> None:
+        """Detach from the shared block."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._buffer = self.header = self.slots = self.keys = self.values = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Detach and free the shared block and the lock file (in the creating process)."""
+        self.close()
+        self.shm.unlink()
+        if os.path.exists(self.lock_path):
+            os.remove(self.lock_path)
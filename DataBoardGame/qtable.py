@@ -0,0 +1,182 @@
+"""
+Array-backed Q-Table storage for the Q-Learning players.
+
+`ArrayQTable` behaves like the `dict` of state -> dict of action -> value used by `QLearningPlayer`,
+but interns states and actions to integer ids and keeps the values in a growable float32 matrix.
+"""
+
+from collections.abc import MutableMapping
+import numpy as np
+
+
+class ArrayQRow(MutableMapping):
+    """View of the Q-values of a single state, behaves like a dict of action -> value."""
+
+    def __init__(self, table: 'ArrayQTable', row: int) -> None:
+        self.table = table
+        self.row = row
+
+    def _values(self):
+        return self.table.values[self.row, : len(self.table.actions)]
+
+    def __getitem__(self, action):
+        column = self.table.action_ids.get(action)
+        if column is None or np.isnan(self.table.values[self.row, column]):
+            raise KeyError(action)
+        return float(self.table.values[self.row, column])
+
+    def __setitem__(self, action, value):
+        column = self.table.intern_action(action)
+        self.table.values[self.row, column] = value
+
+    def __delitem__(self, action):
+        column = self.table.action_ids.get(action)
+        if column is None or np.isnan(self.table.values[self.row, column]):
+            raise KeyError(action)
+        self.table.values[self.row, column] = np.nan
+
+    def __contains__(self, action):
+        column = self.table.action_ids.get(action)
+        return column is not None and not np.isnan(self.table.values[self.row, column])
+
+    def __iter__(self):
+        actions = self.table.actions
+        return (actions[column] for column in np.flatnonzero(~np.isnan(self._values())))
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self._values())))
+
+    def __reduce__(self):
+        """Pickle the row as a plain dict, not as a view of the whole table."""
+        return dict, (dict(self.items()),)
+
+    def copy(self) -> dict:
+        """Return the row as a dict."""
+        return dict(self.items())
+
+    def max_item(self, available_actions=None):
+        """
+        Find the action with the maximum value with a masked argmax.
+
+        :param available_actions: Only consider these actions if given.
+        :return: Tuple of the maximum value and its action, (-inf, None) if there is no such action.
+        """
+        values = self._values()
+        if available_actions:
+            action_ids = self.table.action_ids
+            columns = np.array([action_ids[action] for action in available_actions if action in action_ids], dtype=np.int64)
+            values = values[columns]
+        else:
+            columns = np.arange(len(values))
+
+        present = ~np.isnan(values)
+        if not present.any():
+            return float('-inf'), None
+
+        best = np.argmax(np.where(present, values, -np.inf))
+        return float(values[best]), self.table.actions[columns[best]]
+
+
+class ArrayQTable(MutableMapping):
+    """
+    Q-Table mapping states to rows of Q-values over the interned actions.
+
+    Missing (state, action) entries are stored as NaN. Rows of deleted states are reused.
+    Passing `actions` (e.g. `action_catalog.actions`) fixes the first columns to these actions,
+    so the column of a catalog action is its action id.
+    """
+
+    def __init__(self, state_capacity: int = 1024, action_capacity: int = 64, actions: list = None) -> None:
+        self.state_ids = {}
+        self.states = []
+        self.action_ids = {}
+        self.actions = []
+        self.free_rows = []
+        self.values = np.full((state_capacity, action_capacity), np.nan, dtype=np.float32)
+
+        for action in actions or []:
+            self.intern_action(action)
+
+    def _grow(self, rows: int, columns: int) -> None:
+        """Grow the value matrix (doubling) to fit at least `rows` x `columns`."""
+        capacity_rows, capacity_columns = self.values.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+        while capacity_rows < rows:
+            capacity_rows *= 2
+        while capacity_columns < columns:
+            capacity_columns *= 2
+        values = np.full((capacity_rows, capacity_columns), np.nan, dtype=np.float32)
+        values[: self.values.shape[0], : self.values.shape[1]] = self.values
+        self.values = values
+
+    @classmethod
+    def from_values(cls, states: list, actions: list, values: np.ndarray) -> 'ArrayQTable':
+        """Build a table from its states, its actions and their value matrix (NaN where missing)."""
+        table = cls(max(len(states), 1), max(len(actions), 1), actions)
+        table.states = list(states)
+        table.state_ids = {state: row for row, state in enumerate(table.states)}
+        table.values[: len(states), : len(actions)] = values
+        return table
+
+    def intern_action(self, action) -> int:
+        """Return the column of the action, adding it if it is new."""
+        column = self.action_ids.get(action)
+        if column is None:
+            column = len(self.actions)
+            self._grow(len(self.states), column + 1)
+            self.action_ids[action] = column
+            self.actions.append(action)
+        return column
+
+    def intern_state(self, state) -> int:
+        """Return the row of the state, adding an empty row if it is new."""
+        row = self.state_ids.get(state)
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+                self.states[row] = state
+            else:
+                row = len(self.states)
+                self._grow(row + 1, len(self.actions))
+                self.states.append(state)
+            self.state_ids[state] = row
+        return row
+
+    def __getitem__(self, state) -> ArrayQRow:
+        return ArrayQRow(self, self.state_ids[state])
+
+    def __setitem__(self, state, actions) -> None:
+        items = list(actions.items())
+        row = self.intern_state(state)
+        self.values[row] = np.nan
+        for action, value in items:
+            column = self.intern_action(action)
+            self.values[row, column] = value
+
+    def __delitem__(self, state) -> None:
+        row = self.state_ids.pop(state)
+        self.values[row] = np.nan
+        self.states[row] = None
+        self.free_rows.append(row)
+
+    def __contains__(self, state) -> bool:
+        return state in self.state_ids
+
+    def __iter__(self):
+        return iter(self.state_ids)
+
+    def __len__(self) -> int:
+        return len(self.state_ids)
+
+    def __getstate__(self):
+        """Pickle only the used part of the value matrix."""
+        state = self.__dict__.copy()
+        state['values'] = self.values[: len(self.states), : len(self.actions)]
+        return state
+
+    def __setstate__(self, state):
+        values = state['values']
+        self.__dict__.update(state)
+        self.values = np.full((max(len(values), 1), max(values.shape[1], 1)), np.nan, dtype=np.float32)
+        self.values[: values.shape[0], : values.shape[1]] = values
@@ -0,0 +1,118 @@
+"""
+Replay of recorded games.
+
+A seeded `Game` is fully determined by its seed, its number of players and the action ids of its
+decisions (`Game.action_log`). `replay_game` rebuilds the game at any decision from a `GameRecord`
+without running the player policies.
+"""
+
+from array import array
+from DataBoardGame.game import UNCATALOGED_ACTION, Action, Game, Player
+
+
+class GameRecord:
+    """Compact record of a seeded game."""
+
+    seed: int
+    n_players: int
+    actions: array
+
+    def __init__(self, seed: int, n_players: int, actions) -> None:
+        """
+        :param actions: Action ids of the decisions, in order.
+        """
+        self.seed = seed
+        self.n_players = n_players
+        self.actions = array('H', actions)
+
+    @staticmethod
+    def from_game(game: Game) -> 'GameRecord':
+        """Record a game played with a seed."""
+        if game.seed is None:
+            raise ValueError('Only a game with a seed can be recorded')
+        return GameRecord(game.seed, len(game.players), game.action_log)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def to_dict(self):
+        return {'seed': self.seed, 'n_players': self.n_players, 'actions': self.actions.tolist()}
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return self.seed == other.seed and self.n_players == other.n_players and self.actions == other.actions
+
+    def __hash__(self):
+        return hash((self.seed, self.n_players, self.actions.tobytes()))
+
+
+class ReplayFinished(Exception):
+    """Raised by a ReplayPlayer when the replayed actions are exhausted."""
+
+
+class ReplayCursor:
+    """Position in the replayed action ids, shared by the players of a replay."""
+
+    def __init__(self, actions) -> None:
+        self.actions = actions
+        self.position = 0
+
+    def next_action(self, action_list: list[Action]) -> Action:
+        """Return the action of `action_list` with the next recorded action id."""
+        if self.position == len(self.actions):
+            raise ReplayFinished()
+        action_id = self.actions[self.position]
+        if action_id == UNCATALOGED_ACTION:
+            raise ValueError(f'Decision {self.position} took an action outside the action catalog, it cannot be replayed')
+        action = next((action for action in action_list if action.action_id == action_id), None)
+        if action is None:
+            raise ValueError(f'Recorded action id {action_id} of decision {self.position} is not available')
+        self.position += 1
+        return action
+
+
+class ReplayPlayer(Player):
+    """Player taking the recorded decisions, without keeping any history."""
+
+    needs_observation = False
+
+    def __init__(self, cursor: ReplayCursor) -> None:
+        super().__init__()
+        self.cursor = cursor
+
+    def make_decision(self, game_state, action_list: list[Action]) -> Action:
+        return self.cursor.next_action(action_list)
+
+    def make_blind_decision(self, action_list: list[Action]) -> Action:
+        return self.cursor.next_action(action_list)
+
+    def decision(self, game_state, action_list: list[Action]) -> Action:
+        return self.cursor.next_action(action_list)
+
+
+def replay_game(record: GameRecord, n_decisions: int = None) -> Game:
+    """
+    Rebuild a recorded game.
+
+    :param record: Record of the game.
+    :param n_decisions: Stop before this decision (0-based index in the record), replay the whole game if None.
+    :return: The game in the state right before the decision `n_decisions` (the deciding player is
+        `game.current_player`), or the finished game. Its players are ReplayPlayers.
+    """
+    actions = record.actions if n_decisions is None else record.actions[:n_decisions]
+    cursor = ReplayCursor(actions)
+
+    game = Game(verbose=False, seed=record.seed)
+    for _ in range(record.n_players):
+        game.add_player(ReplayPlayer(cursor))
+    game.pre_game_init()
+
+    try:
+        while not game.is_game_over():
+            game.next_game_step()
+    except ReplayFinished:
+        return game
+
+    game.post_game_init()
+    return game
@@ -4,188 +4,220 @@ resource conversion, and scaling.
 """
 
 from enum import IntEnum
+import operator
 from dataclasses import dataclass, asdict
 from typing import Type
 
 # Define an enumeration for ResourceType with specific resource types and starting index 0
 ResourceType = IntEnum('ResourceType', 'rawdata datamart dashboard insight money', start=0)
 
+# Width of a resource value in the packed Resources encoding
+RESOURCE_KEY_BITS = 16
+RESOURCE_KEY_MASK = (1 << RESOURCE_KEY_BITS) - 1
+
 
-@dataclass
 class Resources:
-    """Class representing different types of resources."""
+    """
+    Class representing different types of resources.
+
+    The values are kept in a list indexed by ResourceType, the named fields are properties over it.
+    """
+
+    __slots__ = ('values',)
+
+    # Field names in ResourceType order
+    field_names = ('raw_data', 'marts', 'dashboards', 'insights', 'money')
+
+    values: list[int]
+
+    def __init__(self, raw_data: int = 0, marts: int = 0, dashboards: int = 0, insights: int = 0, money: int = 0):
+        self.values = [raw_data, marts, dashboards, insights, money]
+
+    @classmethod
+    def from_values(cls, values) -> 'Resources':
+        """Create Resources from values indexed by ResourceType, the list is used as is."""
+        resources = cls.__new__(cls)
+        resources.values = values
+        return resources
+
+    def _field(resource_type: ResourceType):
+        def get(self):
+            return self.values[resource_type]
+
+        def set(self, value):
+            self.values[resource_type] = value
 
-    raw_data: int = 0
-    marts: int = 0
-    dashboards: int = 0
-    insights: int = 0
-    money: int = 0
+        return property(get, set)
+
+    raw_data = _field(ResourceType.rawdata)
+    marts = _field(ResourceType.datamart)
+    dashboards = _field(ResourceType.dashboard)
+    insights = _field(ResourceType.insight)
+    money = _field(ResourceType.money)
+    del _field
+
+    def __repr__(self):
+        return 'Resources(' + ', '.join(f'{name}={value!r}' for name, value in zip(self.field_names, self.values)) + ')'
+
+    def __copy__(self):
+        return Resources.from_values(self.values.copy())
+
+    def __deepcopy__(self, memo):
+        return Resources.from_values(self.values.copy())
 
     def __hash__(self):
         """Generate a hash based on the resource values."""
-        return hash((self.raw_data, self.marts, self.dashboards, self.insights, self.money))
+        return hash(tuple(self.values))
 
     def __add__(self, other):
         """Add corresponding resource values."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return Resources(
-            raw_data=self.raw_data + other.raw_data,
-            marts=self.marts + other.marts,
-            dashboards=self.dashboards + other.dashboards,
-            insights=self.insights + other.insights,
-            money=self.money + other.money,
-        )
+        return Resources.from_values(list(map(operator.add, self.values, other.values)))
 
     def __sub__(self, other):
         """Subtract corresponding resource values."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return Resources(
-            raw_data=self.raw_data - other.raw_data,
-            marts=self.marts - other.marts,
-            dashboards=self.dashboards - other.dashboards,
-            insights=self.insights - other.insights,
-            money=self.money - other.money,
-        )
+        return Resources.from_values(list(map(operator.sub, self.values, other.values)))
 
     def __iadd__(self, other):
         """In-place addition of corresponding resource values."""
         if not isinstance(other, Resources):
             return NotImplemented
-        self.raw_data += other.raw_data
-        self.marts += other.marts
-        self.dashboards += other.dashboards
-        self.insights += other.insights
-        self.money += other.money
+        self.values[:] = map(operator.add, self.values, other.values)
         return self
 
     def __isub__(self, other):
         """In-place subtraction of corresponding resource values."""
         if not isinstance(other, Resources):
             return NotImplemented
-        self.raw_data -= other.raw_data
-        self.marts -= other.marts
-        self.dashboards -= other.dashboards
-        self.insights -= other.insights
-        self.money -= other.money
+        self.values[:] = map(operator.sub, self.values, other.values)
         return self
 
     def __getitem__(self, res):
         """Get resource value based on ResourceType."""
-        if isinstance(res, int):
-            res = ResourceType(res)
-        if res == ResourceType.dashboard:
-            return self.dashboards
-        if res == ResourceType.datamart:
-            return self.marts
-        if res == ResourceType.rawdata:
-            return self.raw_data
-        if res == ResourceType.money:
-            return self.money
-        if res == ResourceType.insight:
-            return self.insights
+        return self.values[res]
 
     def __setitem__(self, key, value):
         """Set resource value based on ResourceType."""
-        if isinstance(key, int):
-            key = ResourceType(key)
-        if key == ResourceType.dashboard:
-            self.dashboards = value
-        if key == ResourceType.datamart:
-            self.marts = value
-        if key == ResourceType.rawdata:
-            self.raw_data = value
-        if key == ResourceType.money:
-            self.money = value
-        if key == ResourceType.insight:
-            self.insights = value
+        self.values[key] = value
 
     def __lt__(self, other):
         """Compare if all resource values are less than the other Resources."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return (
-            self.raw_data < other.raw_data
-            and self.dashboards < other.dashboards
-            and self.insights < other.insights
-            and self.money < other.money
-            and self.marts < other.marts
-        )
+        return all(map(operator.lt, self.values, other.values))
 
     def __le__(self, other):
         """Compare if all resource values are less than or equal to the other Resources."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return (
-            self.raw_data <= other.raw_data
-            and self.dashboards <= other.dashboards
-            and self.insights <= other.insights
-            and self.money <= other.money
-            and self.marts <= other.marts
-        )
+        return all(map(operator.le, self.values, other.values))
 
     def __gt__(self, other):
         """Compare if all resource values are greater than the other Resources."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return (
-            self.raw_data > other.raw_data
-            and self.dashboards > other.dashboards
-            and self.insights > other.insights
-            and self.money > other.money
-            and self.marts > other.marts
-        )
+        return all(map(operator.gt, self.values, other.values))
 
     def __ge__(self, other):
         """Compare if all resource values are greater than or equal to the other Resources."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return (
-            self.raw_data >= other.raw_data
-            and self.dashboards >= other.dashboards
-            and self.insights >= other.insights
-            and self.money >= other.money
-            and self.marts >= other.marts
-        )
+        return all(map(operator.ge, self.values, other.values))
 
     def __eq__(self, other):
         """Compare if all resource values are equal to the other Resources."""
         if not isinstance(other, Resources):
             return NotImplemented
-        return (
-            self.raw_data == other.raw_data
-            and self.marts == other.marts
-            and self.dashboards == other.dashboards
-            and self.insights == other.insights
-            and self.money == other.money
-        )
+        return self.values == other.values
 
     def apply_resource_conversion(self, resource_conversion: 'ResourceConvertion'):
-        """Apply resource conversion by subtracting and adding resources."""
-        self -= resource_conversion.resources_to_take
-        self += resource_conversion.resource_to_give
+        """Apply resource conversion by adding its precomputed net delta."""
+        self.values[:] = map(operator.add, self.values, resource_conversion.delta)
+
+    def apply_delta(self, delta):
+        """Add a net delta indexed by ResourceType, e.g. a row of the `Ruleset` tables."""
+        self.values[:] = map(operator.add, self.values, delta)
 
     def apply_resource_scale(self, resource_scale: 'ResourceScale'):
         """Apply resource scaling based on specified scale."""
-        mult = int(self[resource_scale.resources_to_scale_from] * resource_scale.scale)
-        self[resource_scale.resource_to_scale] += mult
+        self.values[resource_scale.resource_to_scale] += int(self.values[resource_scale.resources_to_scale_from] * resource_scale.scale)
 
     def check_pay_aval(self, resource_conversion: 'ResourceConvertion'):
         """Check if resources are available to cover the conversion."""
-        return self >= resource_conversion.resources_to_take
+        return all(map(operator.ge, self.values, resource_conversion.requirement))
+
+    def check_requirement(self, requirement):
+        """Check if resources are available to cover a requirement indexed by ResourceType."""
+        return all(map(operator.ge, self.values, requirement))
 
     def to_dict(self):
         """Convert Resources object to dictionary."""
-        return asdict(self)
+        return dict(zip(self.field_names, self.values))
+
+    def encode(self) -> int:
+        """
+        Pack the resource values into an int of `len(ResourceType) * RESOURCE_KEY_BITS` bits.
+
+        The value of a ResourceType is stored at bit `RESOURCE_KEY_BITS * resource_type`, values outside
+        of the field range are clamped to it.
+        """
+        key = 0
+        for value in reversed(self.values):
+            key = (key << RESOURCE_KEY_BITS) | min(max(value, 0), RESOURCE_KEY_MASK)
+        return key
 
 
-@dataclass
 class ResourceConvertion:
-    """Class representing the conversion between different resources."""
+    """
+    Class representing the conversion between different resources.
+
+    `requirement` (the values of `resources_to_take`) and `delta` (give - take) are precomputed tuples
+    indexed by ResourceType. They are updated when the resources are assigned or added to, not when
+    the Resources objects are modified in place.
+    """
+
+    __slots__ = ('_resources_to_take', '_resource_to_give', 'requirement', 'delta')
 
-    resources_to_take: Resources = Resources()
-    resource_to_give: Resources = Resources()
+    requirement: tuple[int, ...]
+    delta: tuple[int, ...]
+
+    def __init__(self, resources_to_take: Resources = None, resource_to_give: Resources = None):
+        self._resources_to_take = Resources() if resources_to_take is None else resources_to_take
+        self._resource_to_give = Resources() if resource_to_give is None else resource_to_give
+        self._update_vectors()
+
+    @classmethod
+    def from_vectors(cls, requirement, delta) -> 'ResourceConvertion':
+        """Create the conversion taking `requirement` and adding the net `delta`, both indexed by ResourceType."""
+        return cls(Resources.from_values(list(requirement)), Resources.from_values(list(map(operator.add, requirement, delta))))
+
+    def _update_vectors(self):
+        self.requirement = tuple(self._resources_to_take.values)
+        self.delta = tuple(map(operator.sub, self._resource_to_give.values, self._resources_to_take.values))
+
+    @property
+    def resources_to_take(self) -> Resources:
+        return self._resources_to_take
+
+    @resources_to_take.setter
+    def resources_to_take(self, value: Resources):
+        self._resources_to_take = value
+        self._update_vectors()
+
+    @property
+    def resource_to_give(self) -> Resources:
+        return self._resource_to_give
+
+    @resource_to_give.setter
+    def resource_to_give(self, value: Resources):
+        self._resource_to_give = value
+        self._update_vectors()
+
+    def __repr__(self):
+        return f'ResourceConvertion(resources_to_take={self._resources_to_take!r}, resource_to_give={self._resource_to_give!r})'
 
     def __add__(self, other):
         """Add corresponding resources for conversion."""
@@ -200,13 +232,14 @@ class ResourceConvertion:
         """In-place addition of corresponding resources for conversion."""
         if not isinstance(other, ResourceConvertion):
             return NotImplemented
-        self.resource_to_give += other.resource_to_give
-        self.resources_to_take += other.resources_to_take
+        self._resource_to_give += other.resource_to_give
+        self._resources_to_take += other.resources_to_take
+        self._update_vectors()
         return self
 
     def to_dict(self):
         """Convert ResourceConvertion object to dictionary."""
-        return asdict(self)
+        return {'resources_to_take': self.resources_to_take.to_dict(), 'resource_to_give': self.resource_to_give.to_dict()}
 
     def __eq__(self, other):
         """Compare if resource conversions are equal."""
@@ -0,0 +1,137 @@
+"""
+Rules of the game compiled to integer lookup tables.
+
+The constants of the rules (`globalvars`, the base conversions of the resources, the employee limits
+and the start resources) and the conversions and salaries of the employee cards are compiled once into
+NumPy arrays by `Ruleset`. The tables are indexed by card type id (equal cards share the type, see
+`card_type_ids`), EmployeeRoles value and ResourceType, every card table has an extra zero row
+(`empty_type`) for an empty slot. `PlayerBoard` reads `RULESET` and `BatchRules` compiles its card
+list with `Ruleset`, so the object engine and the batch simulator share the rules.
+"""
+
+from types import MappingProxyType
+import numpy as np
+from DataBoardGame import globalvars as glb
+from DataBoardGame.card import EmployeeRoles, card_type_ids, employee_card_list
+from DataBoardGame.resources import ResourceConvertion, Resources, ResourceType, money_gain_per_insight
+
+# Role producing every ResourceType, indexed by ResourceType
+ROLE_FOR_RESOURCE = (EmployeeRoles.DE, EmployeeRoles.SA, EmployeeRoles.BI, EmployeeRoles.BA, EmployeeRoles.PM)
+
+# Conversion of a generated resource without any employee
+BASE_CONVERSIONS = {
+    ResourceType.rawdata: ResourceConvertion(Resources(), Resources(raw_data=1)),
+    ResourceType.datamart: ResourceConvertion(Resources(raw_data=2), Resources(marts=1)),
+    ResourceType.dashboard: ResourceConvertion(Resources(marts=2), Resources(dashboards=1)),
+    ResourceType.insight: ResourceConvertion(Resources(dashboards=2), Resources(insights=1)),
+}
+
+# Employee slots per role, the order of the roles is the one of the packed PlayerBoard key
+EMPLOYEE_LIMITS = {EmployeeRoles.BA: 2, EmployeeRoles.DE: 2, EmployeeRoles.BI: 2, EmployeeRoles.SA: 2}
+
+# Resources of a new player, indexed by ResourceType
+START_RESOURCES = (5, 0, 0, 5, 10)
+
+MONEY_GAIN = money_gain_per_insight(glb.MONEY_PER_INSIGHT)
+
+
+class Ruleset:
+    """
+    Rules of the game with the employee cards `cards` as lookup arrays.
+
+    Per card type and role: `basic_take`/`basic_give` and `motivated_take`/`motivated_give`, the
+    conversions of the card working in the role. Per card type and generated resource: `check_take`,
+    the resources the card requires to generate it (basic conversion of the producing role), and
+    `gain`, the net resources it adds (motivated conversion if the card has the producing role).
+    `base_conversions` is a read-only view of `BASE_CONVERSIONS`, the source of the `base_*` tables.
+    """
+
+    def __init__(self, cards: list) -> None:
+        n_resources = len(ResourceType)
+        self.cards = cards
+        self.type_ids = card_type_ids(cards)
+        self.n_types = len(self.type_ids)
+        self.empty_type = self.n_types
+        # The role axes are indexed by the EmployeeRoles value
+        self.n_roles = max(EmployeeRoles) + 1
+
+        self.open_size = glb.MAX_EMPLOYEE_OPEN_CARDS
+        self.money_to_stop = glb.MONEY_TO_STOP
+        self.round_to_stop = glb.ROUND_TO_STOP
+        self.money_gain_from = int(MONEY_GAIN.resources_to_scale_from)
+        self.money_gain_to = int(MONEY_GAIN.resource_to_scale)
+        self.money_gain_scale = MONEY_GAIN.scale
+        self.start_resources = np.array(START_RESOURCES, dtype=np.int64)
+
+        self.limits = np.zeros(self.n_roles, dtype=np.int64)
+        for role, limit in EMPLOYEE_LIMITS.items():
+            self.limits[role] = limit
+
+        self.resource_role = np.array(ROLE_FOR_RESOURCE, dtype=np.int64)
+        self._base_conversions = dict(BASE_CONVERSIONS)
+        self.generated = list(self.base_conversions)
+        self.base_take = np.zeros((n_resources, n_resources), dtype=np.int64)
+        self.base_give = np.zeros((n_resources, n_resources), dtype=np.int64)
+        for resource_type, conversion in self.base_conversions.items():
+            self.base_take[resource_type] = conversion.resources_to_take.values
+            self.base_give[resource_type] = conversion.resource_to_give.values
+
+        n_rows = self.n_types + 1
+        self.card_role = np.zeros(n_rows, dtype=np.int64)
+        self.salary_take = np.zeros((n_rows, n_resources), dtype=np.int64)
+        self.salary_give = np.zeros((n_rows, n_resources), dtype=np.int64)
+        self.basic_take = np.zeros((n_rows, self.n_roles, n_resources), dtype=np.int64)
+        self.basic_give = np.zeros((n_rows, self.n_roles, n_resources), dtype=np.int64)
+        self.motivated_take = np.zeros((n_rows, self.n_roles, n_resources), dtype=np.int64)
+        self.motivated_give = np.zeros((n_rows, self.n_roles, n_resources), dtype=np.int64)
+
+        for card, type_id in self.type_ids.items():
+            self.card_role[type_id] = card.role
+            self.salary_take[type_id] = card.salary.resources_to_take.values
+            self.salary_give[type_id] = card.salary.resource_to_give.values
+            for role, conversion in card.basic_resource_conversion.items():
+                self.basic_take[type_id, role] = conversion.resources_to_take.values
+                self.basic_give[type_id, role] = conversion.resource_to_give.values
+            for role, conversion in card.motivated_resource_conversion.items():
+                self.motivated_take[type_id, role] = conversion.resources_to_take.values
+                self.motivated_give[type_id, role] = conversion.resource_to_give.values
+
+        types = np.arange(n_rows)[:, None]
+        roles = self.resource_role[None, :]
+        motivated = self.card_role[:, None] == roles
+        self.check_take = self.basic_take[types, roles]
+        self.gain = np.where(
+            motivated[:, :, None],
+            self.motivated_give[types, roles] - self.motivated_take[types, roles],
+            self.basic_give[types, roles] - self.basic_take[types, roles],
+        )
+        self.salary_gain = self.salary_give - self.salary_take
+        self.base_gain = self.base_give - self.base_take
+
+        # Generated resources of every role, for the caches of PlayerBoard
+        self.resources_of_role = {role: [] for role in EmployeeRoles}
+        for resource_type in self.generated:
+            self.resources_of_role[ROLE_FOR_RESOURCE[resource_type]].append(resource_type)
+        # The rows as tuples of Python ints, summed by PlayerBoard without NumPy overhead
+        self.check_take_rows = [[tuple(row) for row in rows] for rows in self.check_take.tolist()]
+        self.gain_rows = [[tuple(row) for row in rows] for rows in self.gain.tolist()]
+        self.salary_take_rows = [tuple(row) for row in self.salary_take.tolist()]
+        self.salary_gain_rows = [tuple(row) for row in self.salary_gain.tolist()]
+        self.base_take_rows = [tuple(row) for row in self.base_take.tolist()]
+        self.base_gain_rows = [tuple(row) for row in self.base_gain.tolist()]
+
+    @property
+    def base_conversions(self) -> MappingProxyType:
+        return MappingProxyType(self._base_conversions)
+
+    def to_dict(self):
+        return {
+            'n_types': self.n_types,
+            'open_size': self.open_size,
+            'limits': {role.name: int(self.limits[role]) for role in EMPLOYEE_LIMITS},
+            'resource_role': {resource_type.name: EmployeeRoles(role).name for resource_type, role in zip(ResourceType, self.resource_role)},
+            'start_resources': self.start_resources.tolist(),
+        }
+
+
+RULESET = Ruleset(employee_card_list)
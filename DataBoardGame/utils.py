@@ -33,6 +33,16 @@ def make_value_hashable(value):
     return value
 
 
+def resolve_rng(rng):
+    """
+    Return the random generator to use.
+
+    :param rng: `random.Random` instance, or None for the global generator of the `random` module.
+    :return: `rng` or the `random` module.
+    """
+    return random if rng is None else rng
+
+
 # Function to randomly sort items in a queue
 def random_sort_queue(queue):
     """
@@ -87,14 +97,23 @@ def set_log(level):
     logger.addHandler(logger.handler)
 
 
-def log(msg):
+def log(msg, *args):
     """
     Log a message at the INFO level.
 
-    :param msg: Message to log.
+    :param msg: Message to log, %-formatted with `args` only if the message is emitted.
     """
     logger = logging.getLogger('DBG')
-    logger.info(msg)
+    logger.info(msg, *args)
+
+
+def is_log_enabled():
+    """
+    Check if `log` messages are emitted, to skip building them otherwise.
+
+    :return: True if the INFO level is enabled.
+    """
+    return logging.getLogger('DBG').isEnabledFor(logging.INFO)
 
 
 def split_list_into_chunks(lst, chunk_size):
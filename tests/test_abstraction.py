@@ -0,0 +1,47 @@
+import operator
+from DataBoardGame.abstraction import CanonicalAbstraction
+from DataBoardGame.evaluation import PolicyPlayer
+from DataBoardGame.game import Game, RandomPlayer
+from DataBoardGame.gamelearning import GameFarm, merge_tables
+from DataBoardGame.memory import MemoryBudget
+from DataBoardGame.resources import RESOURCE_KEY_BITS, RESOURCE_KEY_MASK, ResourceType
+from tests.test_gamelearning import assert_same_tables
+
+
+def test_canonical_abstraction_key():
+    game = Game(verbose=False, seed=0)
+    for _ in range(2):
+        game.add_player(RandomPlayer())
+    game.pre_game_init()
+    for _ in range(12):
+        game.next_game_step()
+    state = game.get_current_player_state()
+    deck = game.game_board.employee_deck
+    assert deck.trash_ids
+
+    assert CanonicalAbstraction(drop_trash=False)(state) == state.key
+    key = CanonicalAbstraction()(state)
+    assert key != state.key
+    assert key == state.key & ~(((1 << deck.key_bits) - 1 - deck.open_key_mask) << state.player_board.key_bits)
+
+    buckets = CanonicalAbstraction(drop_trash=False, resource_buckets={ResourceType.money: [0, 10, 100]})
+    money = state.player_board.resources.money
+    expected = 0 if money < 10 else 10 if money < 100 else 100
+    assert buckets.bucket(ResourceType.money, money) == expected
+    assert buckets(state) >> RESOURCE_KEY_BITS * ResourceType.money & RESOURCE_KEY_MASK == expected
+
+
+def test_game_farm_with_abstraction():
+    abstraction = CanonicalAbstraction(resource_buckets={resource_type: [0, 1, 2, 4, 8, 16] for resource_type in ResourceType})
+    gf = GameFarm(number_of_players_per_game=2, parallel=2, seed=11, abstraction=abstraction, incremental_merge=True, memory_budget=MemoryBudget(400))
+    full = GameFarm(number_of_players_per_game=2, parallel=2, seed=11)
+    for _ in range(3):
+        gf.learn()
+        full.learn()
+        assert_same_tables(gf.merge_q_tables(), merge_tables([player.q_learning_table for player in gf.players], operator.add))
+
+    player = gf.players[0]
+    assert all(isinstance(key, int) for key in player.q_learning_table)
+    assert len(gf.merge_q_tables()) < len(full.merge_q_tables())
+    state = player.last_state
+    assert PolicyPlayer.from_player(player)._row(state) is player.q_learning_table[abstraction(state)]
@@ -0,0 +1,101 @@
+import random
+import numpy as np
+import pytest
+from DataBoardGame.batch import BATCH_RESOURCES, BATCH_ROLES, BatchPhase, BatchSimulator, greedy_policy, random_policy
+from DataBoardGame.card import employee_card_list
+from DataBoardGame.game import EmptyAction, Game, Player
+
+
+def card_id(card):
+    return next(i for i, other in enumerate(employee_card_list) if other is card)
+
+
+class RecordingPolicy:
+    """Batched policy remembering the choices to replay them in the object engine."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.choices = []
+
+    def __call__(self, simulator, phase, games, mask):
+        choices = self.policy(simulator, phase, games, mask)
+        self.choices.extend((phase, choice) for choice in choices)
+        return choices
+
+
+class ScriptedPlayer(Player):
+    """Player translating the recorded batch choices to object engine actions."""
+
+    def __init__(self, game, choices):
+        super().__init__()
+        self.game = game
+        self.choices = choices
+
+    def decision(self, game_state, action_list):
+        phase, choice = self.choices.pop(0)
+        board = self.game.players_board[self]
+
+        if phase == BatchPhase.resource and choice < len(BATCH_RESOURCES):
+            params = {'resource_type': BATCH_RESOURCES[choice]}
+        elif phase == BatchPhase.hire and choice < len(self.game.game_board.employee_deck.open_cards) * len(BATCH_ROLES):
+            slot, role = divmod(choice, len(BATCH_ROLES))
+            params = {'employee': self.game.game_board.employee_deck.open_cards[slot], 'role': BATCH_ROLES[role]}
+        elif phase in (BatchPhase.fire, BatchPhase.mandatory_fire) and choice < len(BATCH_ROLES) * 2:
+            role, slot = divmod(choice, 2)
+            params = {'employee': board.employees[BATCH_ROLES[role]][slot], 'role': BATCH_ROLES[role]}
+        else:
+            return next(action for action in action_list if isinstance(action, EmptyAction))
+
+        return next(action for action in action_list if all(action.params.get(key) is value for key, value in params.items()))
+
+
+def assert_same_state(simulator, game):
+    deck = game.game_board.employee_deck
+    assert simulator.current_round[0] == game.current_round
+    assert simulator.current_player[0] == game.current_player_index
+    assert simulator.open[0].tolist() == [card_id(card) for card in deck.open_cards]
+    assert simulator.trash[0, : simulator.trash_size[0]].tolist() == [card_id(card) for card in deck.trash_card]
+    assert simulator.pile[0, simulator.pile_head[0] : simulator.pile_end[0]].tolist() == [card_id(card) for card in deck.closed_cards]
+
+    for index, player in enumerate(game.players):
+        board = game.players_board[player]
+        assert simulator.resources[0, index].tolist() == [board.resources[resource_type] for resource_type in range(5)]
+        for role_index, role in enumerate(BATCH_ROLES):
+            roster = simulator.roster[0, index, role_index, : simulator.roster_size[0, index, role_index]]
+            assert roster.tolist() == [card_id(card) for card in board.employees[role]]
+
+
+@pytest.mark.parametrize('seed, n_players', [(1, 2), (2, 3), (3, 4), (4, 4)])
+@pytest.mark.parametrize('policy_factory', [random_policy, lambda rng: greedy_policy])
+def test_batch_simulator_matches_game(seed, n_players, policy_factory):
+    policy = RecordingPolicy(policy_factory(np.random.default_rng(seed)))
+    simulator = BatchSimulator(n_games=1, n_players=n_players, rng=random.Random(seed))
+
+    random.seed(seed)
+    game = Game()
+    for _ in range(n_players):
+        game.add_player(ScriptedPlayer(game, policy.choices))
+    game.pre_game_init()
+    assert_same_state(simulator, game)
+
+    while not simulator.done[0]:
+        simulator.step(policy)
+        is_game_over = game.next_game_step()
+        assert_same_state(simulator, game)
+        assert not policy.choices
+        assert simulator.done[0] == is_game_over
+
+    assert [player.is_winner for player in game.players] == [index == simulator.winner[0] for index in range(n_players)]
+
+
+def test_batch_simulator_runs_many_games():
+    simulator = BatchSimulator(n_games=64, n_players=4, rng=np.random.default_rng(0))
+    simulator.run(random_policy(np.random.default_rng(0)))
+
+    assert simulator.done.all()
+    assert (simulator.resources >= 0).all()
+    assert (simulator.roster_size <= 2).all()
+    # Every card is either in a pile, open or hired
+    assert (
+        simulator.pile_end - simulator.pile_head + simulator.trash_size + (simulator.open != 48).sum(axis=1) + simulator.roster_size.sum(axis=(1, 2)) == 48
+    ).all()
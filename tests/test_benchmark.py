@@ -0,0 +1,26 @@
+import copy
+import pytest
+from DataBoardGame.benchmark import BENCHMARKS, compare_results, main, run_benchmarks, save_results
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(scale=0.001, repeat=1)
+    assert set(results['benchmarks']) == set(BENCHMARKS)
+    assert all(result['seconds_per_op'] > 0 for result in results['benchmarks'].values())
+
+
+def test_compare_results(tmp_path):
+    baseline = run_benchmarks(['card_deck.get_open_card'], scale=0.001, repeat=1)
+    current = copy.deepcopy(baseline)
+    assert compare_results(baseline, current) == []
+
+    current['benchmarks']['card_deck.get_open_card']['seconds_per_op'] *= 1.5
+    [(name, _, _, ratio)] = compare_results(baseline, current, threshold=0.2)
+    assert name == 'card_deck.get_open_card'
+    assert ratio == pytest.approx(1.5)
+    assert compare_results(baseline, current, threshold=0.6) == []
+
+    save_results(baseline, tmp_path / 'baseline.json')
+    save_results(current, tmp_path / 'current.json')
+    assert main(['compare', str(tmp_path / 'baseline.json'), str(tmp_path / 'current.json'), '--threshold', '0.2']) == 1
+    assert main(['compare', str(tmp_path / 'baseline.json'), str(tmp_path / 'baseline.json')]) == 0
@@ -1,3 +1,5 @@
+import copy
+import random
 import pytest
 from DataBoardGame.utils import create_queue_from_list, random_sort_queue
 from DataBoardGame.resources import Resources, ResourceType
@@ -7,9 +9,9 @@ def test_card_deck_initialization():
     cards = [1, 2, 3, 4, 5]
     deck = CardDeck(open_size=3, cards=cards)
     assert deck.open_size == 3
-    assert deck.card_queue.qsize() == 5
-    assert deck.open_cards == []
-    assert deck.trash_card == []
+    assert deck.pile_size == 5
+    assert deck.open_cards == ()
+    assert deck.trash_card == ()
     assert deck.all_cards == cards
 
 def test_card_deck_pre_game_init():
@@ -18,13 +20,15 @@ def test_card_deck_pre_game_init():
     deck.pre_game_init()
     assert len(deck.open_cards) == 3
     assert len(deck.trash_card) == 0
+    with pytest.raises(AttributeError):
+        deck.open_cards.append(1)
 
 def test_card_deck_get_closed_card():
     cards = [1, 2, 3, 4, 5]
     deck = CardDeck(open_size=3, cards=cards)
     card = deck.get_closed_card()
     assert card in cards
-    assert deck.card_queue.qsize() == 4
+    assert deck.pile_size == 4
 
 def test_card_deck_return_card():
     cards = [1, 2, 3, 4, 5]
@@ -55,7 +59,7 @@ def test_card_deck_move_trash_cards_to_queue():
     deck.pre_game_init()
     deck.move_open_cards_to_trash()
     deck.move_trash_cards_to_queue()
-    assert deck.card_queue.qsize() == 5
+    assert deck.pile_size == 5
     assert len(deck.trash_card) == 0
 
 def test_card_deck_get_open_card():
@@ -70,4 +74,43 @@ def test_card_deck_get_open_card():
 def test_card_deck_open_card():
     cards = [1, 2, 3, 4, 5]
     deck = CardDeck(open_size=3, cards=cards)
-    deck.open_card()
\ No newline at end of file
+    deck.open_card()
+
+def test_card_deck_encode():
+    cards = [1, 1, 2, 3, 4]
+    deck = CardDeck(open_size=3, cards=cards)
+    assert deck.key_count_bits == 2
+    assert deck.encode() == 0
+    deck.pre_game_init()
+    # Open cards are 1, 1, 2: two cards of type 0 and one of type 1
+    assert deck.encode() == 2 + (1 << 2)
+    assert deck.open_key_mask == 0xFF
+    deck.move_open_cards_to_trash()
+    assert deck.encode() == (2 + (1 << 2)) << 8
+    assert deck.encode() & deck.open_key_mask == 0
+
+def test_card_deck_seeded_reshuffle():
+    cards = list(range(10))
+    decks = [CardDeck(open_size=3, cards=cards, rng=random.Random(7)) for _ in range(2)]
+    for deck in decks:
+        deck.pre_game_init()
+        for _ in range(12):
+            deck.return_card(deck.get_open_card(deck.open_cards[0]))
+    assert decks[0].open_cards == decks[1].open_cards
+    assert decks[0].closed_cards == decks[1].closed_cards
+    assert sorted(decks[0].open_cards + decks[0].trash_card + decks[0].closed_cards) == cards
+
+def test_card_deck_copy_and_return_card():
+    cards = [1, 1, 2, 3, 4, 5]
+    deck = CardDeck(open_size=3, cards=cards)
+    deck.pre_game_init()
+    hired = deck.get_open_card(1)
+    deck_copy = copy.copy(deck)
+    deck.return_card(hired)
+    assert deck.trash_card == (1,)
+    assert deck_copy.trash_card == ()
+    assert deck.pile_size == deck_copy.pile_size
+    assert deck.encode() != deck_copy.encode()
+    deck.move_trash_cards_to_queue()
+    assert deck.encode() == deck_copy.encode()
+    assert sorted(deck.closed_cards) == sorted(deck_copy.closed_cards + (1,))
@@ -0,0 +1,31 @@
+from concurrent.futures import ProcessPoolExecutor
+from DataBoardGame.evaluation import PolicyPlayer, evaluate_policy
+from DataBoardGame.game import RandomPlayer
+from DataBoardGame.gamelearning import GameFarm
+
+
+def test_evaluate_policy():
+    gf = GameFarm(number_of_players_per_game=2, parallel=1, seed=7)
+    gf.learn()
+
+    result = evaluate_policy(gf.merge_q_tables(), opponents=[RandomPlayer], seed=1, max_games=40, min_games=40, batch_games=15)
+    assert result.games == 40 and not result.stopped_early
+    low, high = result.win_rate_interval
+    assert 0 <= low <= result.win_rate <= high <= 1
+    assert result.money_interval[0] <= result.money_mean <= result.money_interval[1]
+    assert result.money_percentiles[5] <= result.money_percentiles[50] <= result.money_percentiles[95]
+    if result.wins:
+        assert result.mean_rounds_to_win > 0
+
+    # Seeded games give the same results in a process pool
+    with ProcessPoolExecutor(2) as executor:
+        parallel = evaluate_policy(gf.players[0], opponents=[RandomPlayer], seed=1, max_games=40, min_games=40, batch_games=15, executor=executor, parallel=2)
+    serial = evaluate_policy(PolicyPlayer.from_player(gf.players[0]), opponents=[RandomPlayer], seed=1, max_games=40, min_games=40, batch_games=15)
+    assert parallel.to_dict() == serial.to_dict()
+
+
+def test_evaluate_policy_stops_early():
+    result = evaluate_policy({}, opponents=[RandomPlayer], seed=2, max_games=2000, min_games=20, batch_games=20, tolerance=0.2)
+    assert result.stopped_early and result.games < 2000
+    low, high = result.win_rate_interval
+    assert (high - low) / 2 <= 0.2
@@ -0,0 +1,100 @@
+import operator
+import numpy as np
+import pytest
+from DataBoardGame.experience import ExperienceReplay
+from DataBoardGame.game import action_catalog
+from DataBoardGame.gamelearning import GameFarm, QLearningPlayer, merge_tables
+from DataBoardGame.memory import MemoryBudget
+from DataBoardGame.qtable import ArrayQTable
+from tests.test_gamelearning import assert_same_tables
+
+
+def test_experience_replay_update():
+    replay = ExperienceReplay(capacity=3, batch_size=2, n_actions=3, seed=0)
+    values = np.array([[1, 2, np.nan], [0, 4, 3], [5, np.nan, 1]], dtype=np.float32)
+    replay.add(0, 0, 1.0, 1, [0, 2])
+    replay.add(1, 1, -1.0, 2, [1])
+    replay.add(2, 2, 2.0, 0, [0, 1])
+    replay.add(2, 0, 0.5, 1, [1, 2])
+    # The ring buffer overwrote the first transition
+    assert len(replay) == 3 and replay.states.tolist() == [2, 1, 2]
+
+    expected = values.copy()
+    # (2, 0): target 0.5 + 0.5 * max(4, 3); (1, 1): no available value in the next state, target -1
+    expected[2, 0] += 0.5 * (0.5 + 0.5 * 4 - 5)
+    expected[1, 1] += 0.5 * (-1 - 4)
+    replay.update(values, np.array([0, 1]), learning_rate=0.5, discount_factor=0.5)
+    assert values == pytest.approx(expected, nan_ok=True)
+
+
+def test_experience_replay_averages_duplicates():
+    replay = ExperienceReplay(capacity=4, batch_size=4, n_actions=2, seed=0)
+    replay.add(0, 1, 4.0, 1, [0])
+    replay.add(1, 0, 1.0, 0, [0])
+    values = np.array([[0, 0.6], [2, 0]], dtype=np.float32)
+
+    # The same transition 4 times in a minibatch moves the value like a single update
+    replay.update(values, np.array([0, 0, 0, 0, 1]), learning_rate=0.85, discount_factor=0.5)
+    assert values[0, 1] == pytest.approx(0.6 + 0.85 * (4.0 + 0.5 * 2 - 0.6))
+    assert values[1, 0] == pytest.approx(2 + 0.85 * (1.0 + 0.5 * 0 - 2))
+
+    # Repeated replays of one transition converge to its target instead of diverging
+    for _ in range(20):
+        replay.update(values, np.array([0, 0, 0, 0]), learning_rate=0.85, discount_factor=0.5)
+    assert values[0, 1] == pytest.approx(4.0 + 0.5 * values[1, 0], abs=1e-4)
+
+
+def test_game_farm_experience_replay():
+    def make_farm(experience_factory):
+        return GameFarm(
+            number_of_players_per_game=2,
+            parallel=1,
+            seed=8,
+            q_table_factory=lambda: ArrayQTable(actions=action_catalog.actions),
+            experience_factory=experience_factory,
+        )
+
+    replayed = make_farm(lambda: ExperienceReplay(capacity=1024, batch_size=16, updates_per_step=2, seed=0))
+    online = make_farm(None)
+    replayed.learn()
+    online.learn()
+
+    player = replayed.players[0]
+    assert len(player.experience) > 16
+    assert not np.array_equal(player.q_learning_table.values, online.players[0].q_learning_table.values, equal_nan=True)
+
+    with pytest.raises(ValueError):
+        GameFarm(number_of_players_per_game=2, parallel=1, executor=object(), experience_factory=ExperienceReplay)
+
+
+def test_experience_replay_checks_the_table():
+    def make_player(q_learning_table, experience=None, memory_budget=None):
+        experience = ExperienceReplay() if experience is None else experience
+        return QLearningPlayer(0.1, 0.9, 0.1, q_learning_table, memory_budget=memory_budget, experience=experience)
+
+    make_player(ArrayQTable(actions=action_catalog.actions))
+    with pytest.raises(ValueError):
+        make_player({})
+    with pytest.raises(ValueError):
+        make_player(ArrayQTable(actions=action_catalog.actions), memory_budget=MemoryBudget(max_states=100))
+    # Columns not starting with the action ids: the interned actions would be out of the buffer masks
+    with pytest.raises(ValueError):
+        make_player(ArrayQTable())
+    with pytest.raises(ValueError):
+        make_player(ArrayQTable(actions=action_catalog.actions[::-1]))
+    with pytest.raises(ValueError):
+        make_player(ArrayQTable(actions=action_catalog.actions), ExperienceReplay(n_actions=3))
+
+
+def test_experience_replay_with_incremental_merge():
+    gf = GameFarm(
+        number_of_players_per_game=2,
+        parallel=2,
+        seed=8,
+        q_table_factory=lambda: ArrayQTable(actions=action_catalog.actions),
+        experience_factory=lambda: ExperienceReplay(capacity=1024, batch_size=16, updates_per_step=2, seed=0),
+        incremental_merge=True,
+    )
+    for _ in range(3):
+        gf.learn()
+        assert_same_tables(gf.merge_q_tables(), merge_tables([player.q_learning_table for player in gf.players], operator.add))
@@ -0,0 +1,82 @@
+import json
+import random
+import numpy as np
+from DataBoardGame.board import PlayerBoard
+from DataBoardGame.export import ACTION_TYPES, StateKeyLayout, export_q_table, feature_columns, load_columns
+from DataBoardGame.game import Game, RandomPlayer
+from DataBoardGame.gamelearning import GameFarm
+from DataBoardGame.qtable import ArrayQTable
+from DataBoardGame.resources import Resources
+from DataBoardGame.ruleset import RULESET
+
+
+def test_export_q_table(tmp_path):
+    gf = GameFarm(number_of_players_per_game=2, parallel=1, seed=3)
+    gf.learn()
+    merged = gf.merge_q_tables()
+    entries = [(state, action, value) for state, actions in merged.items() for action, value in actions.items()]
+
+    rows = export_q_table(merged, tmp_path / 'q', chunk_size=100)
+    assert rows == len(entries)
+    columns = load_columns(tmp_path / 'q')
+    assert json.loads((tmp_path / 'q' / 'schema.json').read_text())['rows'] == rows
+    assert all(len(column) == rows for column in columns.values())
+
+    for index in (0, rows // 2, rows - 1):
+        state, action, value = entries[index]
+        resources = state.player_board.resources
+        assert [columns[name][index] for name in resources.field_names] == resources.values
+        assert columns['state_value'][index] == state.calc_value()
+        assert columns['action_id'][index] == action.action_id
+        assert ACTION_TYPES[columns['action_type'][index]] is type(action)
+        assert columns['target'][index] == np.float32(value)
+        board = state.player_board
+        assert [columns[f'employees_{role.name}'][index] for role in board.employees] == [len(employees) for employees in board.employees.values()]
+        deck = state.game_board.employee_deck
+        assert sum(columns[f'open_{type_id}'][index] for type_id in range(len(deck.card_type_ids))) == len(deck.open_ids)
+
+    assert export_q_table(merged, tmp_path / 'nonzero', skip_zero=True) == sum(value != 0 for _, _, value in entries)
+
+
+def test_export_array_q_table(tmp_path):
+    gf = GameFarm(number_of_players_per_game=2, parallel=1, seed=3, q_table_factory=ArrayQTable)
+    gf.learn()
+    table = gf.players[0].q_learning_table
+
+    rows = export_q_table(table, tmp_path / 'q', chunk_size=64)
+    assert rows == sum(len(row) for _, row in table.items())
+    columns = load_columns(tmp_path / 'q')
+    exported = {(int(state_value), int(action_id)) for state_value, action_id in zip(columns['state_value'], columns['action_id'])}
+    assert exported == {(int(state.calc_value()), action.action_id) for state, row in table.items() for action in row}
+
+
+def test_feature_columns_match_the_engine():
+    game = Game(verbose=False, seed=8)
+    for index in range(3):
+        game.add_player(RandomPlayer(random.Random(index)))
+    game.pre_game_init()
+    states = []
+    for _ in range(60):
+        game.next_game_step()
+        states += [game.get_player_state(player) for player in game.players]
+
+    layout = StateKeyLayout()
+    assert layout.key_bits == PlayerBoard.key_bits + game.game_board.key_bits
+    features = feature_columns([state.key for state in states], [0] * len(states), layout)
+    for index, state in enumerate(states):
+        board = state.player_board
+        assert features['state_value'][index] == state.calc_value()
+        assert [features[name][index] for name in Resources.field_names] == board.resources.values
+        last = board.last_generated_resource
+        assert features['last_generated_resource'][index] == (-1 if last is None else last)
+        for role, limit in PlayerBoard.employees_limits.items():
+            type_ids = sorted(RULESET.type_ids[card] for card in board.employees[role])
+            assert [features[f'employee_{role.name}_{slot}'][index] for slot in range(len(type_ids))] == type_ids
+            assert all(features[f'employee_{role.name}_{slot}'][index] == -1 for slot in range(len(type_ids), limit))
+
+        deck = state.game_board.employee_deck
+        for place, cards in (('open', deck.open_cards), ('trash', deck.trash_card)):
+            counts = [0] * layout.n_card_types
+            for card in cards:
+                counts[deck.card_type_ids[card]] += 1
+            assert [features[f'{place}_{type_id}'][index] for type_id in range(layout.n_card_types)] == counts
@@ -0,0 +1,148 @@
+import copy
+import random
+from DataBoardGame.board import PlayerBoard
+from DataBoardGame.card import employee_card_list
+from DataBoardGame.events import NO_ACTION, EventBuffer, GamePhase, GameStats
+from DataBoardGame.game import BlindRandomPlayer, Game, GameState, RandomPlayer, action_catalog
+from DataBoardGame.qtable import ArrayQTable
+
+
+def make_game(players=2):
+    game = Game()
+    for _ in range(players):
+        game.add_player(RandomPlayer())
+    game.pre_game_init()
+    return game
+
+
+def test_game_state_is_snapshot():
+    game = make_game()
+    state = game.get_current_player_state()
+    key = state.key
+    state_dict = dict(state.to_dict())
+    value = state.calc_value()
+
+    for _ in range(10):
+        game.next_game_step()
+
+    fresh_state = GameState(state.game_board, state.player_board, state.player_deck)
+    assert fresh_state.key == key
+    assert fresh_state.to_dict() == state_dict
+    assert fresh_state.calc_value() == value
+    assert fresh_state == state
+    assert hash(fresh_state) == hash(state)
+
+
+def test_game_state_snapshot_is_shared_until_change():
+    game = make_game()
+    player = game.current_player
+    state = game.get_player_state(player)
+    assert game.get_player_state(player).player_board is state.player_board
+    assert game.get_player_state(player).game_board is state.game_board
+
+    game.players_board[player].generate_money()
+    assert game.get_player_state(player).player_board is not state.player_board
+    assert game.get_player_state(player).game_board is state.game_board
+
+
+def test_action_catalog():
+    assert [action.action_id for action in action_catalog.actions] == list(range(len(action_catalog)))
+    assert len(set(action_catalog.actions)) == len(action_catalog)
+
+    game = make_game()
+    player = game.current_player
+    actions = game.generate_available_employee_hire_actions(player)
+    assert all(action == action_catalog.actions[action.action_id] for action in actions)
+    assert [a is b for a, b in zip(actions, game.generate_available_employee_hire_actions(player))] == [True] * len(actions)
+
+    action_ids = action_catalog.to_ids(actions)
+    assert action_catalog.from_ids(action_ids) == actions
+    mask = action_catalog.to_mask(actions)
+    assert [action_id for action_id in range(len(action_catalog)) if mask >> action_id & 1] == sorted(set(action_ids))
+
+
+def test_action_catalog_card_copies():
+    card = copy.deepcopy(employee_card_list[3])
+    role = list(PlayerBoard.employees_limits)[0]
+    action = action_catalog.hire_action(card, role)
+    assert action == action_catalog.hire_action(employee_card_list[3], role)
+    assert action.action_id == action_catalog.hire_action(employee_card_list[3], role).action_id
+    assert action_catalog.hire_action(card, role) is action
+    assert len(action_catalog) == len(set(action_catalog.actions))
+
+
+def test_array_q_table_uses_action_ids():
+    table = ArrayQTable(actions=action_catalog.actions)
+    assert [table.action_ids[action] for action in action_catalog.actions] == list(range(len(action_catalog)))
+
+
+def test_game_records_events():
+    events = EventBuffer()
+    game = Game(verbose=False, event_sink=events)
+    for _ in range(2):
+        game.add_player(RandomPlayer())
+    game.pre_game_init()
+    start = [copy.copy(game.players_board[player].resources) for player in game.players]
+
+    for _ in range(6):
+        game.next_game_step()
+
+    dump = events.dump()
+    for index, player in enumerate(game.players):
+        resources = game.players_board[player].resources
+        delta = dump['delta'][dump['player'] == index].sum(axis=0)
+        assert delta.tolist() == [resources[t] - start[index][t] for t in range(len(delta))]
+    assert set(dump['action_id'][dump['phase'] == GamePhase.salary].tolist()) == {NO_ACTION}
+    assert (dump['action_id'][dump['phase'] == GamePhase.hire] >= 0).all()
+
+
+def test_event_buffer_wraps():
+    events = EventBuffer(capacity=4)
+    game = make_game()
+    resources = game.players_board[game.current_player].resources
+    for round in range(6):
+        events.record(round, 0, GamePhase.money_gain, NO_ACTION, resources, resources)
+
+    assert len(events) == 4
+    assert events.dump()['round'].tolist() == [2, 3, 4, 5]
+
+
+def test_game_stats():
+    stats = GameStats()
+    game = Game(verbose=False, seed=1, stats=stats)
+    for index in range(3):
+        game.add_player(RandomPlayer(random.Random(index)))
+    game.play()
+
+    assert stats.turns > 0
+    assert stats.phase_calls[GamePhase.money_gain] == stats.phase_calls[GamePhase.salary] == stats.turns
+    assert stats.phase_calls[GamePhase.resource] == stats.phase_calls[GamePhase.hire] == stats.turns
+    assert sum(stats.phase_calls[phase] for phase in (GamePhase.resource, GamePhase.hire, GamePhase.fire, GamePhase.mandatory_fire)) == len(game.action_log)
+    assert stats.decision_count == {'RandomPlayer': len(game.action_log)}
+    assert stats.game_states == len(game.action_log)
+    assert stats.phase_actions[GamePhase.resource] >= stats.turns
+    assert stats.to_dict()['phases']['salary']['calls'] == stats.turns
+
+
+def test_blind_decisions():
+    games = []
+    for player_class in (BlindRandomPlayer, RandomPlayer):
+        stats = GameStats()
+        game = Game(verbose=False, seed=2, stats=stats)
+        for index in range(3):
+            game.add_player(player_class(random.Random(index)))
+        game.play()
+        games.append(game)
+
+    blind, observing = games
+    # Same decisions, without building the game states nor recording any history
+    assert blind.action_log == observing.action_log
+    assert blind.stats.game_states == 0 and observing.stats.game_states == len(observing.action_log)
+    assert all(not player.decision_history and player.last_state is None for player in blind.players)
+    assert all(player.decision_history for player in observing.players)
+
+    player = RandomPlayer(random.Random(0), record_history=False)
+    game = Game(verbose=False, seed=2)
+    game.add_player(player)
+    game.play()
+    assert not player.decision_history and not player.best_decision_state and player.last_state is not None
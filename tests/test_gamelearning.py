@@ -1,4 +1,9 @@
-from DataBoardGame.gamelearning import GameFarm
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import operator
+from DataBoardGame.game import action_catalog
+from DataBoardGame.gamelearning import GameFarm, merge_tables, merge_tables_sharded
+from DataBoardGame.qtable import ArrayQTable
 import pytest
 
 
@@ -7,3 +12,66 @@ def test_manual_schedule_tag():
     
     for i in range(5):
         gf.learn()
+
+
+def test_learn_in_process_pool():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        gf = GameFarm(number_of_players_per_game=2, parallel=2, executor=executor)
+        for i in range(2):
+            gf.learn()
+
+    assert all(len(player.q_learning_table) > 0 for player in gf.players)
+    assert all(len(player.best_decision_state) > 0 for player in gf.players)
+    assert len(gf.merge_q_tables()) > 0
+    assert len(gf.merge_best_decision_state()) > 0
+
+
+def assert_same_tables(merged, expected):
+    assert merged.keys() == expected.keys()
+    for state, actions in expected.items():
+        assert merged[state] == pytest.approx(actions)
+
+
+def test_incremental_merge():
+    gf = GameFarm(number_of_players_per_game=2, parallel=2, seed=4, incremental_merge=True)
+    gf.learn()
+    assert_same_tables(gf.merge_q_tables(), merge_tables([player.q_learning_table for player in gf.players], operator.add))
+
+    for i in range(2):
+        gf.learn()
+        assert_same_tables(gf.merge_q_tables(), merge_tables([player.q_learning_table for player in gf.players], operator.add))
+        assert_same_tables(gf.merge_best_decision_state(), merge_tables([player.best_decision_state for player in gf.players], max))
+
+
+def test_sharded_merge():
+    gf = GameFarm(number_of_players_per_game=2, parallel=2, seed=5, q_table_factory=lambda: ArrayQTable(actions=action_catalog.actions), incremental_merge=True)
+    gf.learn()
+    tables = [player.q_learning_table for player in gf.players]
+    # A table with its own column order
+    tables.append(ArrayQTable())
+    for state, actions in list(tables[0].items())[:20]:
+        tables[-1][state] = {action: 1.0 for action in reversed(list(actions))}
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for combine in (operator.add, max):
+            merged = merge_tables_sharded(tables, combine, executor, n_shards=3)
+            assert isinstance(merged, ArrayQTable)
+            assert_same_tables(merged, merge_tables(tables, combine))
+
+        # The incremental merge updates the sharded result
+        assert_same_tables(gf.merge_q_tables(executor), merge_tables(tables[:-1], operator.add))
+        gf.learn()
+        assert_same_tables(gf.merge_q_tables(executor), merge_tables(tables[:-1], operator.add))
+
+
+def catalog_hashes():
+    from DataBoardGame.game import action_catalog
+
+    return [hash(action) for action in action_catalog.actions]
+
+
+def test_action_hashes_in_spawned_process():
+    from DataBoardGame.game import action_catalog
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        assert executor.submit(catalog_hashes).result() == [hash(action) for action in action_catalog.actions]
@@ -0,0 +1,46 @@
+import random
+import numpy as np
+from DataBoardGame.game import Game, RandomPlayer
+from DataBoardGame.inference import BatchedPlayer, ModelPolicy, play_batched_games
+
+
+class CountingModel:
+    """Deterministic scores of the feature rows, counting the calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.rows = 0
+
+    def predict(self, features):
+        self.calls += 1
+        self.rows += len(features)
+        return features @ np.linspace(1, 2, features.shape[1])
+
+
+def make_games(policy, n_games):
+    games = []
+    for seed in range(n_games):
+        game = Game(verbose=False, seed=seed)
+        game.add_player(BatchedPlayer(policy))
+        game.add_player(RandomPlayer(random.Random(seed)))
+        game.add_player(BatchedPlayer(policy))
+        games.append(game)
+    return games
+
+
+def test_batched_games_match_sequential_games():
+    model = CountingModel()
+    policy = ModelPolicy(model.predict)
+    batched = play_batched_games(make_games(policy, 6), max_batch=4)
+    batched_calls = model.calls
+
+    model.calls = 0
+    sequential = make_games(policy, 6)
+    for game in sequential:
+        game.play()
+
+    assert [game.action_log for game in batched] == [game.action_log for game in sequential]
+    assert all(game.is_game_over() for game in batched)
+    # One call per decision of a BatchedPlayer when playing the games one by one
+    assert batched_calls * 4 >= model.calls > batched_calls * 2
+    assert [len(player.decision_history) for player in batched[0].players] == [len(player.decision_history) for player in sequential[0].players]
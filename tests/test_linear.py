@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+import random
+import numpy as np
+from DataBoardGame.game import Game, GenerateRsourceAction, RandomPlayer
+from DataBoardGame.gamelearning import GameFarm, QLearningPlayer
+from DataBoardGame.linear import LinearQPlayer, StateFeatures, average_weights
+from DataBoardGame.resources import ResourceType
+import pytest
+
+
+def make_linear_player(rng):
+    return LinearQPlayer(learning_rate=0.1, discount_factor=0.8, random_rate=rng.random() * 0.1)
+
+
+def test_state_features():
+    game = Game(verbose=False, seed=0)
+    game.add_player(RandomPlayer())
+    game.pre_game_init()
+    actions = game.generate_available_employee_hire_actions(game.current_player)
+    features = StateFeatures()
+    x = features.matrix(game.get_current_player_state(), actions)
+    assert x.shape == (len(actions), features.size)
+    assert np.all(x[:, 0] == 1)
+    # Same state part, different action parts
+    assert np.all(x[:, 1 : 1 + features.state_size] == x[0, 1 : 1 + features.state_size])
+    assert len({row.tobytes() for row in x}) > 1
+
+
+def test_action_params_are_read_only():
+    action = GenerateRsourceAction({'resource_type': ResourceType.rawdata})
+    assert action.params == {'resource_type': ResourceType.rawdata}
+    with pytest.raises(TypeError):
+        action.params['resource_type'] = ResourceType.money
+
+
+def test_linear_player_forgets_the_last_game():
+    player = make_linear_player(random.Random(0))
+    game = Game(verbose=False, seed=1)
+    game.add_player(player)
+    game.add_player(RandomPlayer(random.Random(1)))
+    game.play()
+    assert player.last_features is not None and player.last_state is not None
+
+    game.pre_game_init()
+    assert player.last_features is None and player.last_type is None and player.last_state is None
+    weights = player.weights.copy()
+    # The first decision of a game has no previous decision to update
+    player.decision(game.get_current_player_state(), game.generate_available_employee_hire_actions(player))
+    assert np.array_equal(player.weights, weights)
+
+
+def test_game_farm_with_linear_players():
+    gf = GameFarm(number_of_players_per_game=2, parallel=2, seed=9, player_factory=make_linear_player)
+    for _ in range(2):
+        gf.learn()
+    assert all(isinstance(player, LinearQPlayer) for player in gf.players)
+    assert all(np.any(player.weights != 0) and np.all(np.isfinite(player.weights)) for player in gf.players)
+    # No table grows with the games
+    assert all(not player.decision_history and not player.best_decision_state for player in gf.players)
+    assert gf.merge_q_tables() == {}
+    assert average_weights(gf.players).shape == gf.players[0].weights.shape
+
+
+def test_linear_players_next_to_q_learning_players_in_process_pool():
+    def make_player(rng):
+        if rng.random() < 0.5:
+            return make_linear_player(rng)
+        return QLearningPlayer(learning_rate=0.8, discount_factor=0.8, random_rate=0.1)
+
+    with ProcessPoolExecutor(2) as executor:
+        gf = GameFarm(number_of_players_per_game=2, parallel=2, executor=executor, seed=10, player_factory=make_player)
+        gf.learn()
+
+    linear = [player for player in gf.players if isinstance(player, LinearQPlayer)]
+    assert linear and all(np.any(player.weights != 0) for player in linear)
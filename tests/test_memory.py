@@ -0,0 +1,58 @@
+import gc
+import operator
+import tracemalloc
+from DataBoardGame.gamelearning import GameFarm, merge_tables
+from DataBoardGame.memory import EvictionPolicy, MemoryBudget
+
+
+def test_select_evictions():
+    table = {1: {'a': 0}, 2: {'a': 1}, 3: {'a': 0}, 4: {'a': 2}, 5: {'a': 3}}
+    # Least recent first: 4, 1, 2, 5, 3
+    visits = {4: 1, 1: 3, 2: 1, 5: 2, 3: 1}
+
+    assert MemoryBudget(5).select_evictions(table, visits, set()) == []
+    assert MemoryBudget(4, slack=0.5).select_evictions(table, visits, set()) == [4, 1, 2]
+    assert MemoryBudget(4, slack=0.5).select_evictions(table, visits, {1}) == [4, 2, 5]
+    assert MemoryBudget(3, EvictionPolicy.least_visited).select_evictions(table, visits, set()) == [4, 2, 3]
+    assert MemoryBudget(4, EvictionPolicy.zero_value).select_evictions(table, visits, set()) == [1, 3]
+
+
+def test_game_farm_memory_budget():
+    budget = MemoryBudget(200, EvictionPolicy.lru)
+    gf = GameFarm(number_of_players_per_game=2, parallel=2, seed=6, incremental_merge=True, memory_budget=budget, record_observations=False)
+    for i in range(3):
+        gf.learn()
+        for player in gf.players:
+            assert not player.observation_history
+            # The states of the last game are kept, the older ones are evicted down to the budget
+            assert len(player.q_learning_table) <= max(budget.max_states, len(player.decision_history) + 1)
+            assert all(state in player.q_learning_table for state in player.decision_history)
+            assert player.visits.keys() <= {state.key for state in player.q_learning_table} | {state.key for state in player.best_decision_state}
+
+    assert gf.merge_q_tables() == merge_tables([player.q_learning_table for player in gf.players], operator.add)
+
+    usage = gf.memory_usage()
+    assert usage['q_learning_table']['states'] == sum(len(player.q_learning_table) for player in gf.players)
+    assert usage['observation_history']['states'] == 0
+    assert usage['bytes'] > 0
+    assert gf.players[0].memory_usage()['best_decision_state']['states'] == len(gf.players[0].best_decision_state)
+
+
+def test_memory_usage_counts_the_game_states():
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        gf = GameFarm(number_of_players_per_game=2, parallel=2, seed=7)
+        for i in range(2):
+            gf.learn()
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    usage = gf.memory_usage()
+    assert usage['game_states']['states'] >= len(gf.merge_q_tables())
+    assert usage['bytes'] == sum(total['bytes'] for name, total in usage.items() if name != 'bytes')
+    assert 0.7 * traced < usage['bytes'] < 1.5 * traced
+    player_usage = gf.players[0].memory_usage()
+    assert player_usage['game_states']['states'] >= len(gf.players[0].q_learning_table)
@@ -0,0 +1,123 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pickle
+import numpy as np
+import pytest
+from DataBoardGame.game import Game, RandomPlayer, action_catalog
+from DataBoardGame.gamelearning import GameFarm, QLearningPlayer
+from DataBoardGame.qstore import MmapQTable, SharedQTable
+
+
+def test_mmap_q_table_mapping(tmp_path):
+    path = str(tmp_path / 'q.bin')
+    store = MmapQTable.create(path, capacity=2)
+    empty, raw_data = action_catalog.empty, action_catalog.actions[1]
+
+    # More states than the initial capacity, the store grows
+    for key in range(10):
+        store[key << 100] = {empty: key, raw_data: -key}
+    store[3 << 100][raw_data] = 0.5
+    del store[4 << 100]
+
+    assert len(store) == 9
+    assert 4 << 100 not in store and 5 << 100 in store
+    assert store[3 << 100].copy() == {empty: 3, raw_data: 0.5}
+    assert store[5 << 100].max_item() == (5, empty)
+    store.flush()
+
+    reader = MmapQTable.open(path)
+    assert sorted(reader) == sorted(key << 100 for key in range(10) if key != 4)
+    assert {key: row.copy() for key, row in reader.items()} == {key: row.copy() for key, row in store.items()}
+    with pytest.raises(ValueError):
+        reader[1] = {empty: 1}
+
+    private = MmapQTable.open(path, mode='c')
+    private[1] = {empty: 1}
+    assert 1 in private and 1 not in MmapQTable.open(path)
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored.mode == 'c'
+    assert dict(restored[5 << 100]) == dict(store[5 << 100])
+
+
+def test_q_learning_player_with_mmap_q_table(tmp_path):
+    path = str(tmp_path / 'q.bin')
+    gf = GameFarm(number_of_players_per_game=2, parallel=1, seed=1, q_table_factory=lambda: MmapQTable.create(capacity=64))
+    gf.learn()
+    player = gf.players[0]
+    table = player.q_learning_table
+    assert len(table) > 64
+
+    store = MmapQTable.create(path)
+    store.update({key: row.copy() for key, row in table.items()})
+    store.close()
+
+    reader = MmapQTable.open(path)
+    assert len(reader) == len(table)
+    for state in player.decision_history:
+        assert np.allclose(list(reader[state].values()), list(table[state].values()))
+
+    attached = QLearningPlayer(learning_rate=0.8, discount_factor=0.8, random_rate=0.1, q_learning_table=MmapQTable.open(path, mode='c'))
+    state = next(iter(player.decision_history))
+    assert attached.find_max_reward_action(state) == player.find_max_reward_action(state)
+
+    # A player over a read-only store takes the best known actions without adding states
+    frozen = QLearningPlayer(learning_rate=0.8, discount_factor=0.8, random_rate=0.0, q_learning_table=reader)
+    assert not frozen.learning
+    actions = list(reader[state])
+    assert frozen.make_decision(state, actions) == player.find_max_reward_action(state, actions)[1]
+    game = Game(verbose=False, seed=2)
+    game.add_player(frozen)
+    game.add_player(RandomPlayer())
+    game.play()
+    assert len(reader) == len(table)
+
+
+def _fill_shared(table: SharedQTable, worker: int) -> None:
+    # Both workers insert the same states, each one updates its own action column
+    for key in range(200):
+        if key not in table:
+            table[key] = {}
+        table[key][action_catalog.actions[worker]] = key + worker
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_shared_q_table_concurrent_updates(start_method):
+    table = SharedQTable.create(capacity=512)
+    try:
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context(start_method)) as executor:
+            list(executor.map(_fill_shared, [table, table], [1, 2]))
+
+        assert len(table) == 200
+        assert table[7].copy() == {action_catalog.actions[1]: 8, action_catalog.actions[2]: 9}
+        # Setting the row of an existing state keeps the other values
+        table[7] = {action_catalog.empty: 1}
+        assert table[7].copy() == {action_catalog.empty: 1, action_catalog.actions[1]: 8, action_catalog.actions[2]: 9}
+        with pytest.raises(ValueError):
+            del table[7]
+
+        small = SharedQTable.create(capacity=4)
+        with pytest.raises(ValueError):
+            for key in range(4):
+                small[key] = {action_catalog.empty: 0}
+        small.unlink()
+    finally:
+        table.unlink()
+
+
+def test_game_farm_with_shared_q_table():
+    table = SharedQTable.create(capacity=1 << 14)
+    try:
+        with ProcessPoolExecutor(2) as executor:
+            gf = GameFarm(number_of_players_per_game=2, parallel=2, executor=executor, seed=3, q_table_factory=lambda: table)
+            gf.learn()
+
+        # The players learned into the shared table in the workers, no rows were sent back
+        assert all(player.q_learning_table is table for player in gf.players)
+        assert len(table) > 0
+        merged = gf.merge_q_tables()
+        assert len(merged) == len(table)
+        key = next(iter(table))
+        assert merged[key] == table[key].copy()
+    finally:
+        table.unlink()
@@ -0,0 +1,47 @@
+import pickle
+from DataBoardGame.game import EmptyAction, GenerateRsourceAction
+from DataBoardGame.gamelearning import GameFarm, QLearningPlayer
+from DataBoardGame.qtable import ArrayQTable
+from DataBoardGame.resources import ResourceType
+
+
+def test_array_q_table_mapping():
+    table = ArrayQTable(state_capacity=1, action_capacity=1)
+    empty = EmptyAction()
+    raw_data = GenerateRsourceAction({'resource_type': ResourceType.rawdata})
+    marts = GenerateRsourceAction({'resource_type': ResourceType.datamart})
+
+    table['a'] = {empty: 0, raw_data: 1.5}
+    table['b'] = {marts: 2}
+    table['a'][marts] = -1
+
+    assert 'a' in table and 'c' not in table
+    assert len(table) == 2
+    assert table['a'].copy() == {empty: 0, raw_data: 1.5, marts: -1}
+    assert table['b'].copy() == {marts: 2}
+    assert raw_data not in table['b']
+
+    assert table['a'].max_item() == (1.5, raw_data)
+    assert table['a'].max_item([empty, marts]) == (0, empty)
+    assert table['b'].max_item([empty]) == (float('-inf'), None)
+
+    del table['a']
+    table['c'] = {empty: 3}
+    assert len(table) == 2
+    assert table['c'].copy() == {empty: 3}
+
+    restored = pickle.loads(pickle.dumps(table))
+    assert {state: row.copy() for state, row in restored.items()} == {state: row.copy() for state, row in table.items()}
+
+
+def test_q_learning_player_with_array_q_table():
+    player = QLearningPlayer(learning_rate=0.8, discount_factor=0.8, random_rate=0.1, q_learning_table=ArrayQTable())
+    assert isinstance(player.q_learning_table, ArrayQTable)
+
+    gf = GameFarm(number_of_players_per_game=2, parallel=2, q_table_factory=ArrayQTable)
+    gf.learn()
+
+    merged = gf.merge_q_tables()
+    assert len(merged) > 0
+    assert all(isinstance(actions, dict) for actions in merged.values())
+    assert sum(len(player.q_learning_table) for player in gf.players) >= len(merged)
@@ -0,0 +1,91 @@
+import random
+import pytest
+from DataBoardGame.game import UNCATALOGED_ACTION, Action, EmptyAction, Game, RandomPlayer, action_catalog
+from DataBoardGame.gamelearning import GameFarm
+from DataBoardGame.replay import GameRecord, replay_game
+
+
+class KeyRecordingPlayer(RandomPlayer):
+    """Random player remembering the key of every state it decided in."""
+
+    def __init__(self, rng, keys):
+        super().__init__(rng)
+        self.keys = keys
+
+    def decision(self, game_state, action_list):
+        self.keys.append(game_state.key)
+        return super().decision(game_state, action_list)
+
+
+def play_seeded_game(seed, n_players=3):
+    keys = []
+    game = Game(verbose=False, seed=seed)
+    for index in range(n_players):
+        game.add_player(KeyRecordingPlayer(random.Random(seed * 10 + index), keys))
+    game.play()
+    return game, keys
+
+
+def test_seeded_game_is_reproducible():
+    game, keys = play_seeded_game(3)
+    other_game, other_keys = play_seeded_game(3)
+    assert keys == other_keys
+    assert GameRecord.from_game(game) == GameRecord.from_game(other_game)
+
+
+def test_replay_game():
+    game, keys = play_seeded_game(5)
+    record = GameRecord.from_game(game)
+    assert len(record) == len(keys)
+
+    replayed = replay_game(record)
+    assert replayed.current_round == game.current_round
+    assert [replayed.players_board[player].encode() for player in replayed.players] == [game.players_board[player].encode() for player in game.players]
+    assert [player.is_winner for player in replayed.players] == [player.is_winner for player in game.players]
+
+    for n_decisions in (0, 1, 7, len(keys) // 2, len(keys) - 1):
+        assert replay_game(record, n_decisions).get_current_player_state().key == keys[n_decisions]
+
+
+def test_seeded_game_farm_is_reproducible():
+    farms = [GameFarm(number_of_players_per_game=2, parallel=2, seed=11) for _ in range(2)]
+    for farm in farms:
+        for _ in range(2):
+            farm.learn()
+
+    assert [record.to_dict() for record in farms[0].game_records] == [record.to_dict() for record in farms[1].game_records]
+    assert len(farms[0].game_records) == 2
+    assert [player.learning_rate for player in farms[0].players] == [player.learning_rate for player in farms[1].players]
+    assert [dict(player.q_learning_table) for player in farms[0].players] == [dict(player.q_learning_table) for player in farms[1].players]
+
+    record = farms[0].game_records[-1]
+    assert len(record) == len(replay_game(record).action_log)
+
+
+class NoopAction(Action):
+    def action(self, player, game):
+        pass
+
+
+class UncatalogedPlayer(RandomPlayer):
+    """Random player skipping its decisions with an action it creates."""
+
+    def __init__(self, rng, action):
+        super().__init__(rng)
+        self.action = action
+
+    def decision(self, game_state, action_list):
+        return self.action
+
+
+def test_uncataloged_actions_are_logged():
+    game = Game(verbose=False, seed=2)
+    game.add_player(UncatalogedPlayer(random.Random(0), EmptyAction()))
+    game.add_player(UncatalogedPlayer(random.Random(1), NoopAction({})))
+    game.pre_game_init()
+    for _ in range(2):
+        game.next_game_step()
+    assert set(game.action_log) == {action_catalog.empty.action_id, UNCATALOGED_ACTION}
+
+    with pytest.raises(ValueError, match='outside the action catalog'):
+        replay_game(GameRecord.from_game(game))
@@ -1,3 +1,5 @@
+import copy
+import pickle
 import pytest
 from DataBoardGame.resources import Resources, ResourceType, ResourceConvertion, ResourceScale
 
@@ -120,4 +122,34 @@ def test_check_pay_aval():
         resources_to_take=Resources(raw_data=15, marts=2, dashboards=1, insights=4, money=10),
         resource_to_give=Resources()
     )
-    assert res.check_pay_aval(conversion) is False
\ No newline at end of file
+    assert res.check_pay_aval(conversion) is False
+def test_resources_encode():
+    res = Resources(raw_data=10, marts=5, dashboards=3, insights=8, money=20)
+    key = res.encode()
+    assert key == Resources(raw_data=10, marts=5, dashboards=3, insights=8, money=20).encode()
+    assert key != Resources(raw_data=5, marts=10, dashboards=3, insights=8, money=20).encode()
+    assert [(key >> (16 * resource_type)) & 0xFFFF for resource_type in ResourceType] == [10, 5, 3, 8, 20]
+
+def test_resource_convertion_vectors():
+    conversion = ResourceConvertion(
+        resources_to_take=Resources(raw_data=2, money=5),
+        resource_to_give=Resources(marts=1)
+    )
+    assert conversion.requirement == (2, 0, 0, 0, 5)
+    assert conversion.delta == (-2, 1, 0, 0, -5)
+
+    conversion += ResourceConvertion(resources_to_take=Resources(money=1), resource_to_give=Resources(money=3))
+    assert conversion.requirement == (2, 0, 0, 0, 6)
+    assert conversion.delta == (-2, 1, 0, 0, -3)
+    assert conversion.to_dict() == {
+        'resources_to_take': {'raw_data': 2, 'marts': 0, 'dashboards': 0, 'insights': 0, 'money': 6},
+        'resource_to_give': {'raw_data': 0, 'marts': 1, 'dashboards': 0, 'insights': 0, 'money': 3},
+    }
+
+def test_resources_copy_is_independent():
+    res = Resources(raw_data=10, money=20)
+    res_copy = copy.copy(res)
+    res_copy.money += 1
+    assert res.money == 20
+    assert res_copy == Resources(raw_data=10, money=21)
+    assert pickle.loads(pickle.dumps(res)) == res
@@ -0,0 +1,82 @@
+import random
+from DataBoardGame.board import PlayerBoard, resource_type_to_role_mapping
+from DataBoardGame.card import EmployeeRoles, employee_card_list
+from DataBoardGame.resources import ResourceConvertion, Resources, ResourceType
+from DataBoardGame.ruleset import BASE_CONVERSIONS, RULESET, Ruleset
+import pytest
+
+
+def test_role_for_resource():
+    expected = {
+        ResourceType.rawdata: EmployeeRoles.DE,
+        ResourceType.datamart: EmployeeRoles.SA,
+        ResourceType.dashboard: EmployeeRoles.BI,
+        ResourceType.insight: EmployeeRoles.BA,
+        ResourceType.money: EmployeeRoles.PM,
+    }
+    for resource_type, role in expected.items():
+        assert resource_type_to_role_mapping(resource_type) == role
+        assert RULESET.resource_role[resource_type] == role
+
+
+def test_card_tables_match_the_cards():
+    for card in employee_card_list:
+        type_id = RULESET.type_ids[card]
+        assert RULESET.card_role[type_id] == card.role
+        assert RULESET.salary_take[type_id].tolist() == card.salary.resources_to_take.values
+        for role, conversion in card.basic_resource_conversion.items():
+            assert RULESET.basic_take[type_id, role].tolist() == conversion.resources_to_take.values
+            assert RULESET.basic_give[type_id, role].tolist() == conversion.resource_to_give.values
+        for role, conversion in card.motivated_resource_conversion.items():
+            assert RULESET.motivated_take[type_id, role].tolist() == conversion.resources_to_take.values
+            assert RULESET.motivated_give[type_id, role].tolist() == conversion.resource_to_give.values
+
+        for resource_type in RULESET.generated:
+            role = resource_type_to_role_mapping(resource_type)
+            conversion = card.motivated_resource_conversion[role] if card.role == role else card.basic_resource_conversion[role]
+            assert tuple(RULESET.check_take[type_id, resource_type]) == card.basic_resource_conversion[role].requirement
+            assert tuple(RULESET.gain[type_id, resource_type]) == conversion.delta
+
+    assert not RULESET.check_take[RULESET.empty_type].any()
+    assert not RULESET.gain[RULESET.empty_type].any()
+    assert Ruleset(employee_card_list[:3]).n_types == len(set(employee_card_list[:3]))
+
+
+def test_board_caches_match_the_conversions():
+    rng = random.Random(3)
+    board = PlayerBoard()
+    for _ in range(30):
+        roles = board.get_available_roles()
+        if roles and rng.random() < 0.6:
+            board.hire_employee(rng.choice(employee_card_list), rng.choice(roles))
+        elif board.employees_count():
+            board.fire_employee(rng.choice(board.get_employee_list())[0])
+
+        salary = ResourceConvertion()
+        for employee, _ in board.get_employee_list():
+            salary += employee.salary
+        assert board.calc_salary() == salary
+
+        for resource_type, base in RULESET.base_conversions.items():
+            role = resource_type_to_role_mapping(resource_type)
+            requirement = ResourceConvertion() + base
+            gain = ResourceConvertion() + base
+            for employee in board.employees[role]:
+                requirement += employee.basic_resource_conversion[role]
+                gain += employee.motivated_resource_conversion[role] if employee.role == role else employee.basic_resource_conversion[role]
+
+            for money in range(4):
+                board.resources = Resources(2, 3, 4, 5, money)
+                assert board.check_pay_resource_to_player(resource_type) == board.resources.check_pay_aval(requirement)
+            board.action_pay_resource_to_player(resource_type)
+            expected = Resources(2, 3, 4, 5, 3)
+            expected.apply_resource_conversion(gain)
+            assert board.resources == expected
+
+
+def test_board_conversion_rules_are_the_ruleset():
+    board = PlayerBoard()
+    assert board.convertion_rules == RULESET.base_conversions == BASE_CONVERSIONS
+    assert set(board.to_dict()['convertion_rules']) == {str(resource_type) for resource_type in RULESET.generated}
+    with pytest.raises(TypeError):
+        board.convertion_rules[ResourceType.rawdata] = ResourceConvertion()